@@ -0,0 +1,85 @@
+"""
+Typed representation of standardized agent actions.
+
+The parser emits Action records and scoring, alignment and refinement read
+their fields directly. The legacy string form, e.g.
+
+    execute_bash(command='ls -la')
+    send_message(recipient='Sarah', content='Hello Sarah, ...')
+
+is only produced for output (results, reports, refinement suggestions) and
+parsed back with parse_action where strings come in (golden paths, stored
+results).
+"""
+
+import re
+from typing import NamedTuple, Optional, Union
+
+
+class Action(NamedTuple):
+    """
+    One standardized action.
+
+    The first KEY_FIELDS fields describe what was done; event_id and
+    timestamp only record where it happened in the trajectory.
+    """
+    type: str
+    path: Optional[str] = None
+    url: Optional[str] = None
+    recipient: Optional[str] = None
+    command: Optional[str] = None
+    content: Optional[str] = None
+    event_id: Optional[int] = None
+    timestamp: Optional[str] = None
+
+    def render(self) -> str:
+        """The legacy action string, e.g. "goto_url(url='...')"."""
+        args = ', '.join(
+            f"{name}='{value}'"
+            for name, value in zip(ARGUMENT_FIELDS, self[1:KEY_FIELDS])
+            if value is not None
+        )
+        return f"{self.type}({args})"
+
+    def key(self) -> tuple:
+        """The fields that identify the action, without its event metadata."""
+        return self[:KEY_FIELDS]
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+# Number of leading fields that make up Action.key()
+KEY_FIELDS = 6
+
+# Argument fields in the order they are rendered
+ARGUMENT_FIELDS = Action._fields[1:KEY_FIELDS]
+
+# Parsed actions or their legacy strings; every scoring function takes both
+ActionLike = Union[Action, str]
+
+_ACTION_TYPE_RE = re.compile(r'^(\w+)\(')
+# A quoted value ends at the quote before the next argument or the end, so
+# values may themselves contain quotes
+_ARGUMENT_RE = re.compile(r"(\w+)='(.*?)'(?=, \w+='|\s*\)?\s*$)", re.DOTALL)
+
+
+def parse_action(text: str) -> Optional[Action]:
+    """
+    Parse a legacy action string. Returns None if it does not start with
+    an action type, e.g. 'name('; unknown arguments are ignored.
+    """
+    type_match = _ACTION_TYPE_RE.match(text)
+    if not type_match:
+        return None
+    fields = {
+        name: value
+        for name, value in _ARGUMENT_RE.findall(text, type_match.end())
+        if name in ARGUMENT_FIELDS
+    }
+    return Action(type_match.group(1), **fields)
+
+
+def render_action(action: ActionLike) -> str:
+    """Legacy string form of an action (strings are returned unchanged)."""
+    return action if isinstance(action, str) else action.render()
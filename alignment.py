@@ -0,0 +1,682 @@
+"""
+Alignment engine for matching golden path steps to agent actions.
+
+Every action is normalized exactly once, candidates are bucketed by
+action type and normalized form, and the golden -> agent assignment is
+solved optimally with the Hungarian algorithm instead of greedily.
+Order preservation is measured on the matched agent positions in
+O(n log n) (longest increasing subsequence, Kendall tau inversions).
+Alternative golden paths of a task are held in a GoldenPathTrie. The
+assignment is solved one golden step at a time (AssignmentSolver), so
+variants that share a prefix solve it once and branch from a snapshot.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from profiling import PROFILER
+
+# Weight of a golden position vs agent position mismatch. Small enough that
+# it only breaks ties between candidates of equal similarity.
+ORDER_TIE_BREAK = 1e-6
+
+# Order metrics an Alignment provides (see Alignment.order):
+#   golden  - adjacent matched golden positions in sequence (the original
+#             metric; 1.0 whenever anything matched, since golden steps are
+#             visited in order)
+#   lis     - longest increasing run of matched agent positions / matches
+#             (the default)
+#   kendall - 1 - Kendall tau distance of the matched agent positions
+ORDER_METRICS = ('golden', 'lis', 'kendall')
+DEFAULT_ORDER_METRIC = 'lis'
+
+
+@dataclass
+class Alignment:
+    """
+    Result of aligning a golden path to an agent path.
+
+    pairs holds one (golden_index, agent_index, similarity) entry per golden
+    step, in golden order; agent_index is None for unmatched steps.
+    """
+    pairs: List[Tuple[int, Optional[int], float]]
+    used_indices: set = field(default_factory=set)
+    matched_count: int = 0
+    avg_similarity: float = 0.0
+    order_score: float = 0.0
+    lis_order: float = 0.0
+    kendall_order: float = 0.0
+
+    def matched_agent_indices(self) -> List[int]:
+        """Agent indices of the matched golden steps, in golden order."""
+        return [agent_idx for _, agent_idx, _ in self.pairs if agent_idx is not None]
+
+    def order(self, metric: str = DEFAULT_ORDER_METRIC) -> float:
+        """Order preservation (0-1) under one of ORDER_METRICS."""
+        if metric == 'golden':
+            return self.order_score
+        if metric == 'lis':
+            return self.lis_order
+        if metric == 'kendall':
+            return self.kendall_order
+        raise ValueError(f"Unknown order metric {metric!r}; expected one of {', '.join(ORDER_METRICS)}")
+
+
+def longest_increasing_subsequence(sequence: Sequence[int]) -> int:
+    """Length of the longest strictly increasing subsequence, O(n log n)."""
+    # tails[k] is the smallest last element of an increasing run of length k + 1
+    tails: List[int] = []
+    for value in sequence:
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+        else:
+            tails[k] = value
+    return len(tails)
+
+
+def count_inversions(sequence: Sequence[int]) -> int:
+    """Number of pairs i < j with sequence[i] > sequence[j], by merge sort in O(n log n)."""
+    values = list(sequence)
+    buffer = values[:]
+    inversions = 0
+    width = 1
+    n = len(values)
+    # Bottom-up merge sort, alternating between values and buffer
+    while width < n:
+        for start in range(0, n, 2 * width):
+            mid = min(start + width, n)
+            end = min(start + 2 * width, n)
+            i, j, k = start, mid, start
+            while i < mid and j < end:
+                if values[j] < values[i]:
+                    buffer[k] = values[j]
+                    inversions += mid - i
+                    j += 1
+                else:
+                    buffer[k] = values[i]
+                    i += 1
+                k += 1
+            buffer[k:end] = values[i:mid] if i < mid else values[j:end]
+        values, buffer = buffer, values
+        width *= 2
+    return inversions
+
+
+def lis_order(agent_indices: Sequence[int]) -> float:
+    """
+    Share of matched steps that lie on the longest in-order run of agent
+    positions (1.0 for one match, 0.0 for none).
+    """
+    if not agent_indices:
+        return 0.0
+    return longest_increasing_subsequence(agent_indices) / len(agent_indices)
+
+
+def kendall_order(agent_indices: Sequence[int]) -> float:
+    """
+    1 - normalized Kendall tau distance between the matched agent positions
+    and golden order: the share of matched pairs done in the right order
+    (1.0 for one match, 0.0 for none).
+    """
+    n = len(agent_indices)
+    if n == 0:
+        return 0.0
+    if n == 1:
+        return 1.0
+    return 1.0 - count_inversions(agent_indices) / (n * (n - 1) / 2)
+
+
+def action_type_of(normalized: str) -> str:
+    """Return the action type prefix of a normalized action (e.g. 'goto_url')."""
+    return normalized.split('(', 1)[0]
+
+
+@dataclass(frozen=True)
+class CompiledGoldenPath:
+    """
+    Golden path with its normalized forms and lookup tables precomputed.
+
+    Behaves like the raw list of actions (len, iteration, indexing), so it
+    can be passed anywhere a golden path is expected; engines that share its
+    normalizer skip golden-side normalization entirely.
+    """
+    actions: Tuple[str, ...]
+    normalized: Tuple[str, ...]
+    action_types: Tuple[str, ...]
+    indices_by_type: Dict[str, Tuple[int, ...]]
+    indices_by_norm: Dict[str, Tuple[int, ...]]
+    normalizer: Callable[[str], str] = field(repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.actions)
+
+    def __getitem__(self, index):
+        return self.actions[index]
+
+
+GoldenPath = Union[Sequence[str], CompiledGoldenPath]
+
+
+class GoldenPathTrie:
+    """
+    Alternative golden paths (variants) of one task, stored as a trie of
+    their normalized steps.
+
+    Node 0 is the root; every other node is one normalized step, and a
+    variant is the chain of nodes from the root to its terminal node
+    (paths[variant_index]). Variants that start with the same steps share
+    those nodes, and with them the assignment work for the shared steps
+    (see AlignmentEngine.align_variants).
+
+    Args:
+        variants: The task's golden paths, compiled with one normalizer;
+            the first one is the primary path
+    """
+
+    def __init__(self, variants: Sequence[CompiledGoldenPath]):
+        if not variants:
+            raise ValueError("A golden path trie needs at least one variant")
+        self.variants: Tuple[CompiledGoldenPath, ...] = tuple(variants)
+        self.norms: List[Optional[str]] = [None]
+        self.depths: List[int] = [0]
+        self.children: List[Dict[str, int]] = [{}]
+        # node -> indices of the variants ending there
+        self.terminals: Dict[int, List[int]] = {}
+        self.paths: List[Tuple[int, ...]] = []
+        for variant_index, variant in enumerate(self.variants):
+            node = 0
+            path = []
+            for norm in variant.normalized:
+                child = self.children[node].get(norm)
+                if child is None:
+                    child = len(self.norms)
+                    self.children[node][norm] = child
+                    self.norms.append(norm)
+                    self.depths.append(self.depths[node] + 1)
+                    self.children.append({})
+                node = child
+                path.append(node)
+            self.paths.append(tuple(path))
+            self.terminals.setdefault(node, []).append(variant_index)
+
+    def __len__(self) -> int:
+        return len(self.variants)
+
+    @property
+    def primary(self) -> CompiledGoldenPath:
+        return self.variants[0]
+
+    @property
+    def node_count(self) -> int:
+        """Number of step nodes (excluding the root)."""
+        return len(self.norms) - 1
+
+
+def compile_golden_path(
+    golden_path: Sequence[str],
+    normalizer: Callable[[str], str]
+) -> CompiledGoldenPath:
+    """Normalize a golden path once and index its steps by type and form."""
+    actions = tuple(golden_path)
+    normalized = tuple(normalizer(action) for action in actions)
+    action_types = tuple(action_type_of(norm) for norm in normalized)
+
+    indices_by_type: Dict[str, List[int]] = {}
+    indices_by_norm: Dict[str, List[int]] = {}
+    for idx, (norm, action_type) in enumerate(zip(normalized, action_types)):
+        indices_by_type.setdefault(action_type, []).append(idx)
+        indices_by_norm.setdefault(norm, []).append(idx)
+
+    return CompiledGoldenPath(
+        actions=actions,
+        normalized=normalized,
+        action_types=action_types,
+        indices_by_type={key: tuple(value) for key, value in indices_by_type.items()},
+        indices_by_norm={key: tuple(value) for key, value in indices_by_norm.items()},
+        normalizer=normalizer
+    )
+
+
+class AssignmentSolver:
+    """
+    Maximum-weight assignment of rows to columns (Hungarian algorithm),
+    built up one row at a time.
+
+    After each add_row() the rows added so far are optimally assigned, and
+    the solver state depends only on those rows. copy() snapshots it, so
+    weight matrices that start with the same rows solve them once.
+
+    Args:
+        num_columns: Number of real columns (the length of every row)
+        max_rows: Most rows that will be added; zero-weight dummy columns
+            are padded up to it so every row can be assigned
+    """
+
+    def __init__(self, num_columns: int, max_rows: int):
+        self.num_columns = num_columns
+        self.width = max(num_columns, max_rows)
+        self.rows: List[Sequence[float]] = []
+        self.u = [0.0]
+        self.v = [0.0] * (self.width + 1)
+        self.p = [0] * (self.width + 1)
+
+    def copy(self) -> 'AssignmentSolver':
+        clone = AssignmentSolver.__new__(AssignmentSolver)
+        clone.num_columns = self.num_columns
+        clone.width = self.width
+        clone.rows = self.rows[:]
+        clone.u = self.u[:]
+        clone.v = self.v[:]
+        clone.p = self.p[:]
+        return clone
+
+    def add_row(self, row: Sequence[float]) -> None:
+        """Add a row of weights and re-solve the assignment."""
+        self.rows.append(row)
+        self.u.append(0.0)
+        weights, u, v, p = self.rows, self.u, self.v, self.p
+        m_real, m = self.num_columns, self.width
+        inf = float('inf')
+        way = [0] * (m + 1)
+
+        p[0] = len(weights)
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = weights[i0 - 1]
+            u_i0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                cost = -row[j - 1] if j <= m_real else 0.0
+                cur = cost - u_i0 - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    def assignment(self) -> List[Optional[int]]:
+        """
+        For each row added so far, the assigned column index, or None if the
+        row could not be given a column with positive weight.
+        """
+        weights, p = self.rows, self.p
+        assignment: List[Optional[int]] = [None] * len(weights)
+        for j in range(1, self.num_columns + 1):
+            row_idx = p[j] - 1
+            if row_idx >= 0 and weights[row_idx][j - 1] > 0:
+                assignment[row_idx] = j - 1
+        return assignment
+
+
+def solve_assignment(weights: List[List[float]]) -> List[Optional[int]]:
+    """
+    Maximum-weight assignment of rows to columns (Hungarian algorithm).
+
+    Args:
+        weights: Row-major weight matrix; every row must have the same length
+
+    Returns:
+        For each row, the assigned column index, or None if the row could not
+        be given a column with positive weight
+    """
+    if not weights:
+        return []
+    solver = AssignmentSolver(len(weights[0]), len(weights))
+    for row in weights:
+        solver.add_row(row)
+    return solver.assignment()
+
+
+class AlignmentEngine:
+    """
+    Optimal golden -> agent aligner with pluggable normalization.
+
+    Args:
+        normalizer: Maps a raw action string to its normalized form
+        similarity: Similarity of two normalized actions in [0, 1], called as
+            similarity(norm_1, norm_2, score_cutoff); it may return 0.0 for
+            pairs below score_cutoff instead of scoring them exactly
+        min_similarity: Minimum similarity for a pair to count as a match
+        exact_only_types: Action types whose actions only match an identical
+            normalized action of the same type (their same-type bucket is
+            never fuzzily compared)
+    """
+
+    def __init__(
+        self,
+        normalizer: Callable[[str], str],
+        similarity: Callable[[str, str, float], float],
+        min_similarity: float = 0.45,
+        exact_only_types: Sequence[str] = ()
+    ):
+        self.normalizer = normalizer
+        self.similarity = similarity
+        self.min_similarity = min_similarity
+        self.exact_only_types = frozenset(exact_only_types)
+
+    def compile(self, golden_path: Sequence[str]) -> CompiledGoldenPath:
+        """Compile a golden path with this engine's normalizer."""
+        return compile_golden_path(golden_path, self.normalizer)
+
+    def compile_variants(self, golden_paths: Sequence[GoldenPath]) -> GoldenPathTrie:
+        """Compile alternative golden paths of one task into a trie."""
+        return GoldenPathTrie([
+            path if isinstance(path, CompiledGoldenPath) and path.normalizer is self.normalizer
+            else self.compile(path)
+            for path in golden_paths
+        ])
+
+    def golden_norms(self, golden_path: GoldenPath) -> Sequence[str]:
+        """Normalized golden steps, reused from a compiled path when possible."""
+        if isinstance(golden_path, CompiledGoldenPath) and golden_path.normalizer is self.normalizer:
+            return golden_path.normalized
+        return [self.normalizer(action) for action in golden_path]
+
+    def pair_similarity(self, golden_norm: str, agent_norm: str, score_cutoff: float = 0.0) -> float:
+        """Similarity of a normalized golden/agent pair under the engine's rules."""
+        if golden_norm == agent_norm:
+            # Exact match: similarity is 1.0 whatever the backend
+            return 1.0
+        golden_type = action_type_of(golden_norm)
+        if golden_type in self.exact_only_types and action_type_of(agent_norm) == golden_type:
+            return 0.0
+        return self.similarity(golden_norm, agent_norm, score_cutoff)
+
+    def align(
+        self,
+        golden_path: GoldenPath,
+        agent_path: Sequence[str],
+        min_similarity: Optional[float] = None,
+        agent_norms: Optional[Sequence[str]] = None
+    ) -> Alignment:
+        """
+        Align golden steps to agent actions.
+
+        The assignment maximizes the number of matched golden steps first,
+        then total similarity, then agreement between golden and agent
+        positions, so an early golden step cannot steal a later step's only
+        good match the way greedy matching does.
+
+        golden_path may be a CompiledGoldenPath, in which case its
+        precomputed normalized forms are used. agent_norms, if given, are
+        the agent actions already normalized with this engine's normalizer.
+        """
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+
+        with PROFILER.stage('align'):
+            golden_norms = self.golden_norms(golden_path)
+            if agent_norms is None:
+                agent_norms = [self.normalizer(action) for action in agent_path]
+            return self.align_normalized(golden_norms, agent_norms, min_similarity)
+
+    def align_variants(
+        self,
+        trie: GoldenPathTrie,
+        agent_path: Sequence[str],
+        min_similarity: Optional[float] = None,
+        agent_norms: Optional[Sequence[str]] = None
+    ) -> List[Alignment]:
+        """
+        Align every variant of a golden path trie to the agent actions.
+
+        Candidate matches are collected once per distinct normalized step.
+        Assignment weights are scaled by the longest variant rather than
+        each variant's own length, so one depth-first walk of the trie
+        covers every variant: it adds one row per step to an
+        AssignmentSolver and copies the solver where paths branch. A step
+        on a prefix shared by k variants is solved once instead of k times.
+
+        The optimum is the one align() finds for each variant on its own;
+        among equally good assignments the choice may differ, since the
+        order tie-break is scaled by the longest variant.
+
+        Returns:
+            One Alignment per variant, in trie.variants order
+        """
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+
+        with PROFILER.stage('align'):
+            if agent_norms is None:
+                agent_norms = [self.normalizer(action) for action in agent_path]
+            candidate_row = self._candidate_rows(agent_norms, min_similarity)
+            num_agent = len(agent_norms)
+            node_rows = [()] + [candidate_row(norm) for norm in trie.norms[1:]]
+            with PROFILER.stage('align.assign'):
+                return self._solve_trie(trie, node_rows, num_agent)
+
+    @staticmethod
+    def _solve_trie(
+        trie: GoldenPathTrie,
+        node_rows: Sequence[Sequence[Tuple[int, float]]],
+        num_agent: int
+    ) -> List[Alignment]:
+        # The agent columns any step can match, the longest variant (which
+        # scales the weights), and the most rows (non-empty steps) any one
+        # variant adds to a solver
+        columns = sorted({idx for row in node_rows for idx, _ in row})
+        column_of = {idx: col for col, idx in enumerate(columns)}
+        max_golden = max(len(path) for path in trie.paths)
+        max_rows = max(sum(1 for node in path if node_rows[node]) for path in trie.paths)
+
+        alignments: List[Optional[Alignment]] = [None] * len(trie)
+        stack = [(0, AssignmentSolver(len(columns), max_rows), ())]
+        while stack:
+            node, solver, rows = stack.pop()
+            depth = trie.depths[node]
+            if depth and node_rows[node]:
+                golden_index = depth - 1
+                solver.add_row(candidate_weights(
+                    node_rows[node], golden_index, max_golden, num_agent, column_of
+                ))
+                rows += (golden_index,)
+            for variant_index in trie.terminals.get(node, ()):
+                candidates = [node_rows[n] for n in trie.paths[variant_index]]
+                alignments[variant_index] = build_alignment(
+                    candidates, rows, solver.assignment(), columns
+                )
+            # Every branch but the first continues from a snapshot
+            for i, child in enumerate(trie.children[node].values()):
+                stack.append((child, solver if i == 0 else solver.copy(), rows))
+        return alignments
+
+    def _candidate_rows(
+        self,
+        agent_norms: Sequence[str],
+        min_similarity: float
+    ) -> Callable[[str], List[Tuple[int, float]]]:
+        """
+        Memoized golden_norm -> [(agent_index, similarity), ...] of the agent
+        actions reaching min_similarity.
+        """
+        # Bucket agent positions by normalized form, and forms by action type,
+        # so each distinct (golden, agent) pair is scored once
+        positions_by_norm: Dict[str, List[int]] = {}
+        for idx, norm in enumerate(agent_norms):
+            positions_by_norm.setdefault(norm, []).append(idx)
+        norms_by_type: Dict[str, List[str]] = {}
+        for norm in positions_by_norm:
+            norms_by_type.setdefault(action_type_of(norm), []).append(norm)
+
+        # Golden steps with the same normalized form share one candidate row
+        rows_by_norm: Dict[str, List[Tuple[int, float]]] = {}
+
+        def candidate_row(golden_norm: str) -> List[Tuple[int, float]]:
+            row = rows_by_norm.get(golden_norm)
+            if row is not None:
+                return row
+            row = []
+            if golden_norm in positions_by_norm:
+                # Exact match: similarity is 1.0 whatever the backend
+                row.extend((idx, 1.0) for idx in positions_by_norm[golden_norm])
+            golden_type = action_type_of(golden_norm)
+            for action_type, norms in norms_by_type.items():
+                if action_type == golden_type and golden_type in self.exact_only_types:
+                    continue
+                for norm in norms:
+                    if norm == golden_norm:
+                        continue
+                    score = self.similarity(golden_norm, norm, min_similarity)
+                    if score >= min_similarity:
+                        row.extend((idx, score) for idx in positions_by_norm[norm])
+            rows_by_norm[golden_norm] = row
+            return row
+
+        return candidate_row
+
+    def align_normalized(
+        self,
+        golden_norms: Sequence[str],
+        agent_norms: Sequence[str],
+        min_similarity: Optional[float] = None
+    ) -> Alignment:
+        """Align already-normalized golden and agent actions."""
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+
+        candidate_row = self._candidate_rows(agent_norms, min_similarity)
+        candidates = [candidate_row(golden_norm) for golden_norm in golden_norms]
+
+        with PROFILER.stage('align.assign'):
+            return assign_candidates(candidates, len(agent_norms))
+
+
+def candidate_weights(
+    candidate_row: Sequence[Tuple[int, float]],
+    golden_index: int,
+    max_golden: int,
+    num_agent: int,
+    column_of: Dict[int, int]
+) -> List[float]:
+    """
+    Assignment weights of one golden step over the candidate columns.
+    max_golden bounds the length of the golden path(s) solved with these
+    weights; it does not have to be the exact length, so golden paths of
+    different lengths can share solver rows.
+    """
+    # Lexicographic objective: match count, then similarity, then order
+    match_bonus = max_golden + 1.0
+    golden_scale = 1.0 / max(max_golden, 1)
+    agent_scale = 1.0 / max(num_agent, 1)
+    row_weights = [0.0] * len(column_of)
+    for idx, score in candidate_row:
+        disorder = abs(golden_index * golden_scale - idx * agent_scale)
+        row_weights[column_of[idx]] = match_bonus + score - ORDER_TIE_BREAK * disorder
+    return row_weights
+
+
+def assign_candidates(
+    candidates: Sequence[Sequence[Tuple[int, float]]],
+    num_agent: int
+) -> Alignment:
+    """
+    Solve the golden -> agent assignment for precomputed candidates.
+
+    Args:
+        candidates: For each golden step, the (agent_index, similarity)
+            pairs that reach the match threshold
+        num_agent: Length of the agent path
+
+    Returns:
+        Alignment maximizing match count, then total similarity, then
+        agreement between golden and agent positions
+    """
+    num_golden = len(candidates)
+    columns = sorted({idx for row in candidates for idx, _ in row})
+    column_of = {idx: col for col, idx in enumerate(columns)}
+
+    rows = [g for g in range(num_golden) if candidates[g]]
+    weights = [
+        candidate_weights(candidates[g], g, num_golden, num_agent, column_of)
+        for g in rows
+    ]
+    return build_alignment(candidates, rows, solve_assignment(weights), columns)
+
+
+def build_alignment(
+    candidates: Sequence[Sequence[Tuple[int, float]]],
+    rows: Sequence[int],
+    assignment: Sequence[Optional[int]],
+    columns: Sequence[int]
+) -> Alignment:
+    """
+    Alignment from a solved assignment: rows are the golden indices of the
+    assignment's rows, and columns the agent index of each column.
+    """
+    num_golden = len(candidates)
+    assigned: Dict[int, Tuple[int, float]] = {}
+    for g, col in zip(rows, assignment):
+        if col is not None:
+            idx = columns[col]
+            score = next(s for i, s in candidates[g] if i == idx)
+            assigned[g] = (idx, score)
+
+    pairs: List[Tuple[int, Optional[int], float]] = []
+    for g in range(num_golden):
+        if g in assigned:
+            idx, score = assigned[g]
+            pairs.append((g, idx, score))
+        else:
+            pairs.append((g, None, 0.0))
+
+    used_indices = {idx for idx, _ in assigned.values()}
+    matched_count = len(assigned)
+    avg_similarity = (
+        sum(score for _, score in assigned.values()) / matched_count
+        if matched_count else 0.0
+    )
+
+    # Order score over the matched golden positions (same definition as
+    # the original greedy calculate_coverage_score)
+    matched_positions = [g for g, idx, _ in pairs if idx is not None]
+    if not matched_positions:
+        order_score = 0.0
+    elif len(matched_positions) == 1:
+        order_score = 1.0
+    else:
+        ordered_pairs = sum(
+            1 for a, b in zip(matched_positions, matched_positions[1:]) if a < b
+        )
+        order_score = ordered_pairs / (len(matched_positions) - 1)
+
+    # Order of the agent positions the golden steps were matched to
+    agent_indices = [idx for _, idx, _ in pairs if idx is not None]
+
+    return Alignment(
+        pairs=pairs,
+        used_indices=used_indices,
+        matched_count=matched_count,
+        avg_similarity=avg_similarity,
+        order_score=order_score,
+        lis_order=lis_order(agent_indices),
+        kendall_order=kendall_order(agent_indices)
+    )
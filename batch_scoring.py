@@ -0,0 +1,422 @@
+"""
+Vectorized bulk scoring of many agent paths against one golden path.
+
+Normalized actions are integer-encoded once per task, and coverage, order,
+length efficiency and redundancy are computed for every path of the task
+as NumPy arrays. Raw (weight independent) components are kept, so weight
+sweeps only redo the final weighted combination.
+
+Requires NumPy (see requirements.txt). Scores match
+scoring.calculate_efficiency_score for the same golden path, with two
+limits: only the one golden path passed in is used (no best-of-variants
+choice as in calculate_best_variant_score), and there is no runtime
+penalty, since agent paths carry no wall time or token usage. For tasks
+with variants or a runtime budget, evaluator scores can therefore differ.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import scoring
+from actions import ActionLike
+from alignment import AlignmentEngine, GoldenPath, assign_candidates
+from scoring import ACTION_NORMALIZER, ALIGNMENT_ENGINE, RedundancyTracker
+
+# Same defaults as calculate_efficiency_score
+DEFAULT_WEIGHTS = {
+    'coverage_weight': 0.6,
+    'order_weight': 0.15,
+    'length_weight': 0.1,
+    'redundancy_weight': 0.15,
+}
+HIGH_COVERAGE_THRESHOLD = 0.9
+
+
+class ActionEncoder:
+    """
+    Maps normalized actions to dense integer codes.
+
+    Args:
+        normalizer: Maps an action (or action string) to its normalized form
+    """
+
+    def __init__(self, normalizer: Callable[[ActionLike], str] = ACTION_NORMALIZER):
+        self.normalizer = normalizer
+        self.codes: Dict[str, int] = {}
+        self.vocabulary: List[str] = []
+
+    def encode(self, path: Sequence[ActionLike]) -> np.ndarray:
+        """Encode a path of actions as an int64 array of codes."""
+        encoded = np.empty(len(path), dtype=np.int64)
+        for i, action in enumerate(path):
+            norm = self.normalizer(action)
+            code = self.codes.get(norm)
+            if code is None:
+                code = len(self.vocabulary)
+                self.codes[norm] = code
+                self.vocabulary.append(norm)
+            encoded[i] = code
+        return encoded
+
+
+def redundancy_penalties(
+    encoded_paths: Sequence[np.ndarray],
+    vocabulary_size: int,
+    window_size: int = 5
+) -> np.ndarray:
+    """
+    Raw redundancy penalty (as detect_harmful_redundancy) for every path.
+
+    An occurrence is redundant in a window when two earlier occurrences of
+    the same action are also in it, so it contributes to every full window
+    that starts between its own position - window_size + 1 and the position
+    of its second previous occurrence. This turns the sliding-window count
+    into a handful of array operations over all paths at once.
+    """
+    num_paths = len(encoded_paths)
+    lengths = np.array([len(codes) for codes in encoded_paths], dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(num_paths)
+
+    window_limit = RedundancyTracker.WINDOW_REPEAT_THRESHOLD - 1
+    overall_limit = RedundancyTracker.OVERALL_REPEAT_THRESHOLD - 1
+
+    codes = np.concatenate(encoded_paths)
+    path_ids = np.repeat(np.arange(num_paths), lengths)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = np.arange(total) - np.repeat(starts, lengths)
+    path_lengths = lengths[path_ids]
+
+    # Group occurrences of the same action within the same path, in order
+    keys = path_ids * max(vocabulary_size, 1) + codes
+    order = np.lexsort((positions, keys))
+    sorted_keys = keys[order]
+    continues_group = np.zeros(total, dtype=bool)
+    continues_group[1:] = sorted_keys[1:] == sorted_keys[:-1]
+
+    # Occurrence rank within its group (0 for the first occurrence)
+    group_starts = np.where(continues_group, 0, np.arange(total))
+    np.maximum.accumulate(group_starts, out=group_starts)
+    ranks_sorted = np.arange(total) - group_starts
+
+    # Position of the occurrence window_limit steps back in the same group
+    back = np.full(total, -1, dtype=np.int64)
+    has_back = ranks_sorted >= window_limit
+    back[order[has_back]] = positions[order[np.nonzero(has_back)[0] - window_limit]]
+
+    last_start = path_lengths - window_size
+    first_window = np.maximum(0, positions - window_size + 1)
+    last_window = np.minimum(back, last_start)
+    contributions = np.where(back >= 0, np.clip(last_window - first_window + 1, 0, None), 0)
+    redundancy_count = np.bincount(path_ids, weights=contributions, minlength=num_paths)
+
+    excessive = np.bincount(
+        path_ids[order], weights=(ranks_sorted >= overall_limit), minlength=num_paths
+    )
+
+    safe_lengths = np.maximum(lengths, 1)
+    window_penalty = np.minimum(redundancy_count / safe_lengths, 1.0)
+    overall_penalty = np.minimum(excessive / safe_lengths, 1.0)
+    penalty = np.minimum(np.maximum(window_penalty, overall_penalty * 0.5), 1.0)
+    return np.where(lengths <= 1, 0.0, penalty)
+
+
+def length_efficiencies(
+    agent_lengths,
+    golden_lengths,
+    coverage,
+    high_coverage_threshold=HIGH_COVERAGE_THRESHOLD
+) -> np.ndarray:
+    """
+    Vectorized calculate_path_length_efficiency.
+
+    Arguments broadcast against each other, so one golden length can be
+    used for a whole task or one per trajectory, and thresholds can vary
+    along another axis (e.g. one row per weight configuration).
+    """
+    agent_lengths = np.asarray(agent_lengths, dtype=float)
+    golden_lengths = np.asarray(golden_lengths, dtype=float)
+
+    ratio = agent_lengths / np.where(golden_lengths > 0, golden_lengths, 1.0)
+    base_penalty = np.select(
+        [ratio <= 1.0, ratio <= 1.5, ratio <= 2.0],
+        [0.0, (ratio - 1.0) * 0.2, 0.1 + (ratio - 1.5) * 0.3],
+        default=np.minimum(0.25 + (ratio - 2.0) * 0.15, 0.5)
+    )
+    base_penalty = np.where(coverage >= high_coverage_threshold, base_penalty * 0.5, base_penalty)
+    efficiency = np.where(ratio <= 1.0, 1.0, np.maximum(0.0, 1.0 - base_penalty))
+    empty_golden = np.where(agent_lengths == 0, 1.0, 0.0)
+    return np.where(golden_lengths > 0, efficiency, empty_golden)
+
+
+def combine_components(
+    coverage,
+    order_score,
+    length_efficiency,
+    redundancy_penalty_raw,
+    coverage_weight=0.6,
+    order_weight=0.15,
+    length_weight=0.1,
+    redundancy_weight=0.15,
+    high_coverage_threshold=HIGH_COVERAGE_THRESHOLD,
+    penalty_cap=15.0,
+    completeness_bonus_points=10.0,
+    time_efficiency=None,
+    token_efficiency=None,
+    time_weight=0.1,
+    token_weight=0.1
+) -> Dict[str, np.ndarray]:
+    """
+    Weighted combination of raw components, as in calculate_efficiency_score.
+
+    Arguments broadcast, so passing weights as column vectors scores every
+    configuration against every trajectory in one call. time_efficiency and
+    token_efficiency are budget efficiencies (see
+    scoring.calculate_runtime_efficiency); NaN entries, like None in
+    calculate_efficiency_score, carry no penalty.
+
+    Returns:
+        Dictionary of arrays: efficiency_score, length_efficiency and
+        redundancy_penalty (after coverage discount and penalty cap),
+        completeness_bonus and runtime_penalty
+    """
+    perfect = coverage >= 1.0
+
+    # Reduce redundancy penalty by 50% if coverage is high (>=0.9 by default)
+    redundancy_penalty = np.where(
+        coverage >= high_coverage_threshold, redundancy_penalty_raw * 0.5, redundancy_penalty_raw
+    )
+
+    # Cap total penalties at penalty_cap points when coverage is perfect
+    total_penalty = (
+        (1.0 - length_efficiency) * length_weight * 100 +
+        redundancy_penalty * redundancy_weight * 100
+    )
+    capped = perfect & (total_penalty > penalty_cap)
+    scale = np.where(capped, penalty_cap / np.where(capped, total_penalty, 1.0), 1.0)
+    length_efficiency = np.where(capped, 1.0 - (1.0 - length_efficiency) * scale, length_efficiency)
+    redundancy_penalty = redundancy_penalty * scale
+
+    completeness_bonus = np.where(perfect & (order_score >= 0.9), completeness_bonus_points, 0.0)
+
+    efficiency_score = (
+        coverage_weight * coverage * 100 +
+        order_weight * order_score * 100 +
+        length_weight * length_efficiency * 100 -
+        redundancy_weight * redundancy_penalty * 100 +
+        completeness_bonus
+    )
+
+    runtime_penalty = 0.0
+    for efficiency, weight in ((time_efficiency, time_weight), (token_efficiency, token_weight)):
+        if efficiency is not None:
+            efficiency = np.asarray(efficiency, dtype=float)
+            runtime_penalty = runtime_penalty + np.where(
+                np.isnan(efficiency), 0.0, weight * (1.0 - efficiency) * 100
+            )
+    efficiency_score = efficiency_score - runtime_penalty
+
+    return {
+        'efficiency_score': np.clip(efficiency_score, 0, 100),
+        'length_efficiency': length_efficiency,
+        'redundancy_penalty': redundancy_penalty,
+        'completeness_bonus': completeness_bonus,
+        'runtime_penalty': np.broadcast_to(runtime_penalty, np.shape(efficiency_score)),
+    }
+
+
+@dataclass
+class BatchScores:
+    """
+    Columnar scores for N agent paths against one golden path.
+
+    Every array has one entry per agent path, in input order. Components
+    are stored before weighting and before the high-coverage discount, so
+    combine() can re-weight (or change high_coverage_threshold) cheaply.
+    """
+    golden_path_length: int
+    agent_path_length: np.ndarray
+    coverage: np.ndarray
+    order_score: np.ndarray
+    order_lis: np.ndarray
+    order_kendall: np.ndarray
+    matched_count: np.ndarray
+    avg_similarity: np.ndarray
+    redundancy_penalty_raw: np.ndarray
+    weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+
+    def __len__(self) -> int:
+        return len(self.agent_path_length)
+
+    @property
+    def path_length_ratio(self) -> np.ndarray:
+        if self.golden_path_length > 0:
+            return self.agent_path_length / self.golden_path_length
+        return np.where(self.agent_path_length > 0, float('inf'), 1.0)
+
+    def combine(self, **weights: float) -> Dict[str, np.ndarray]:
+        """Weighted scores; weights default to the ones used to build the batch."""
+        weights = {**self.weights, **weights}
+        # One threshold discounts both the length and the redundancy penalty
+        length_efficiency = length_efficiencies(
+            self.agent_path_length,
+            self.golden_path_length,
+            self.coverage,
+            weights.get('high_coverage_threshold', HIGH_COVERAGE_THRESHOLD)
+        )
+        return combine_components(
+            self.coverage,
+            self.order_score,
+            length_efficiency,
+            self.redundancy_penalty_raw,
+            **weights
+        )
+
+    @property
+    def efficiency_score(self) -> np.ndarray:
+        return self.combine()['efficiency_score']
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """All score columns, keyed like calculate_efficiency_score's output."""
+        combined = self.combine()
+        return {
+            'efficiency_score': combined['efficiency_score'],
+            'coverage': self.coverage,
+            'order_score': self.order_score,
+            'order_lis': self.order_lis,
+            'order_kendall': self.order_kendall,
+            'length_efficiency': combined['length_efficiency'],
+            'redundancy_penalty': combined['redundancy_penalty'],
+            'path_similarity': self.coverage,  # Legacy compatibility
+            'path_length_ratio': self.path_length_ratio,
+            'agent_path_length': self.agent_path_length,
+            'golden_path_length': np.full(len(self), self.golden_path_length),
+            'matched_count': self.matched_count,
+            'total_count': np.full(len(self), self.golden_path_length),
+            'avg_similarity': self.avg_similarity,
+            'completeness_bonus': combined['completeness_bonus'],
+        }
+
+    def to_records(self) -> List[Dict[str, float]]:
+        """Row-oriented view with the same keys as calculate_efficiency_score."""
+        columns = self.columns()
+        return [
+            {key: values[i].item() for key, values in columns.items()}
+            for i in range(len(self))
+        ]
+
+
+def score_paths_batch(
+    agent_paths: Sequence[Sequence[ActionLike]],
+    golden_path: GoldenPath,
+    coverage_weight: float = 0.6,
+    order_weight: float = 0.15,
+    length_weight: float = 0.1,
+    redundancy_weight: float = 0.15,
+    engine: AlignmentEngine = ALIGNMENT_ENGINE,
+    order_metric: Optional[str] = None
+) -> BatchScores:
+    """
+    Score many agent paths against one golden path.
+
+    Unlike the evaluator, golden path variants are not considered and no
+    runtime penalty is applied (see the module docstring).
+
+    Args:
+        agent_paths: Agent paths (lists of Actions or action strings)
+        golden_path: Golden path for the task (raw or CompiledGoldenPath)
+        coverage_weight, order_weight, length_weight, redundancy_weight:
+            Component weights, as in calculate_efficiency_score
+        engine: Alignment engine providing normalization and similarity
+        order_metric: Metric behind order_score (default: scoring.ORDER_METRIC)
+
+    Returns:
+        BatchScores with one entry per agent path
+    """
+    order_metric = order_metric or scoring.ORDER_METRIC
+    encoder = ActionEncoder(engine.normalizer)
+    golden_norms = engine.golden_norms(golden_path)
+    encoded_paths = [encoder.encode(path) for path in agent_paths]
+
+    # Similarity of every distinct golden step to every distinct agent
+    # action, once per task
+    vocabulary = encoder.vocabulary
+    similarity = np.zeros((len(golden_norms), len(vocabulary)))
+    rows_by_norm: Dict[str, int] = {}
+    for g, golden_norm in enumerate(golden_norms):
+        if golden_norm in rows_by_norm:
+            similarity[g] = similarity[rows_by_norm[golden_norm]]
+            continue
+        rows_by_norm[golden_norm] = g
+        for code, norm in enumerate(vocabulary):
+            similarity[g, code] = engine.pair_similarity(golden_norm, norm, engine.min_similarity)
+    allowed = similarity >= engine.min_similarity
+
+    num_paths = len(agent_paths)
+    num_golden = len(golden_norms)
+    agent_lengths = np.array([len(codes) for codes in encoded_paths], dtype=np.int64)
+    coverage = np.zeros(num_paths)
+    order_score = np.zeros(num_paths)
+    order_lis = np.zeros(num_paths)
+    order_kendall = np.zeros(num_paths)
+    matched_count = np.zeros(num_paths, dtype=np.int64)
+    avg_similarity = np.zeros(num_paths)
+
+    for i, codes in enumerate(encoded_paths):
+        if num_golden == 0:
+            coverage[i] = 1.0
+            order_score[i] = order_lis[i] = order_kendall[i] = 1.0
+            continue
+        if len(codes) == 0:
+            continue
+        path_allowed = allowed[:, codes]
+        path_similarity = similarity[:, codes]
+        candidates = []
+        for g in range(num_golden):
+            indices = np.nonzero(path_allowed[g])[0]
+            candidates.append(list(zip(indices.tolist(), path_similarity[g, indices].tolist())))
+        alignment = assign_candidates(candidates, len(codes))
+        matched_count[i] = alignment.matched_count
+        coverage[i] = alignment.matched_count / num_golden
+        order_score[i] = alignment.order(order_metric)
+        order_lis[i] = alignment.lis_order
+        order_kendall[i] = alignment.kendall_order
+        avg_similarity[i] = alignment.avg_similarity
+
+    return BatchScores(
+        golden_path_length=num_golden,
+        agent_path_length=agent_lengths,
+        coverage=coverage,
+        order_score=order_score,
+        order_lis=order_lis,
+        order_kendall=order_kendall,
+        matched_count=matched_count,
+        avg_similarity=avg_similarity,
+        redundancy_penalty_raw=redundancy_penalties(encoded_paths, len(vocabulary)),
+        weights={
+            'coverage_weight': coverage_weight,
+            'order_weight': order_weight,
+            'length_weight': length_weight,
+            'redundancy_weight': redundancy_weight,
+        }
+    )
+
+
+def score_tasks_batch(
+    agent_paths_by_task: Dict[str, Sequence[Sequence[ActionLike]]],
+    golden_paths: Dict[str, GoldenPath],
+    **weights: float
+) -> Dict[str, BatchScores]:
+    """
+    Score N agent paths for each of M tasks.
+
+    Tasks without a golden path are skipped.
+    """
+    return {
+        task_name: score_paths_batch(paths, golden_paths[task_name], **weights)
+        for task_name, paths in agent_paths_by_task.items()
+        if golden_paths.get(task_name)
+    }
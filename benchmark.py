@@ -0,0 +1,681 @@
+"""
+Evaluator performance benchmarks on synthetic trajectories.
+
+Trajectories are synthesized from the OpenHands event schemas seen in the
+bundled traj_*.json files (user message, run / run_ipython /
+browse_interactive actions with their run / run_ipython / browse
+observations, browse observations carrying set_of_marks screenshots, and a
+final finish). The agent actions follow a real task's golden path with
+detours and repeated actions mixed in, so scoring does realistic work.
+
+A case is EVENTS[:SIZE[:FILES]], e.g. 1000:1MB or 100000:200MB:1.
+Observation payloads are padded so the file reaches SIZE; when SIZE is below
+what EVENTS fully detailed events take, the optional event fields
+(tool_call_metadata, timestamps, messages) are dropped and the actual size is
+reported. FILES trajectories are generated per case for the end-to-end run.
+Generated files are kept in --data-dir and reused while the generator
+settings are unchanged.
+
+Benchmarks, each run in a fresh process so peak RSS is per benchmark:
+- parse: parser.parse_trajectory
+- parse-streaming: parser.parse_trajectory(streaming=True)
+- score: scoring.calculate_efficiency_score
+- evaluate: evaluator.evaluate_multiple_trajectories over the case directory
+
+Similarity and normalization caches are cleared before every timed call.
+
+Usage:
+    python benchmark.py                                   # quick preset
+    python benchmark.py --case 10000:10MB --case 100000:200MB:1
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json --max-regression 0.15
+
+With --baseline, median times and peak RSS are compared with the stored
+results and the exit status is 1 if any benchmark regressed by more than
+--max-regression. Baselines are only meaningful on the same machine.
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import similarity
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Bump when generated trajectories change, so cached data is rebuilt
+GENERATOR_VERSION = 1
+
+DEFAULT_DATA_DIR = Path('.benchmark_data')
+
+BENCHMARKS = ('parse', 'parse-streaming', 'score', 'evaluate')
+
+PRESETS = {
+    'quick': ['10:1KB', '1000:1MB', '10000:10MB'],
+    'full': ['10:1KB', '1000:1MB', '10000:10MB', '100000:200MB:1'],
+}
+
+DEFAULT_FILES = 4
+
+# Synthetic tasks bench-000, bench-001, ... reuse these golden paths in turn
+SOURCE_TASKS = (
+    'pm-schedule-meeting-1',
+    'hr-new-grad-job-description-3',
+    'sde-create-new-repo',
+    'pm-send-hello-message',
+    'qa-escalate-emergency',
+)
+
+_SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?$', re.IGNORECASE)
+_SIZE_UNITS = {'B': 1, 'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+_GOLDEN_ACTION_RE = re.compile(r"^(\w+)\((?:recipient='[^']*', )?(?:\w+='(.*)')?\)$", re.DOTALL)
+
+_PNG_PREFIX = 'data:image/png;base64,'
+
+# Detours the synthetic agent takes between golden steps
+NOISE_ACTIONS = [
+    ('run', 'ls -la /workspace'),
+    ('run', 'pwd && ls'),
+    ('run', 'cat /workspace/notes.txt'),
+    ('run', 'cd /workspace && git status'),
+    ('run', 'grep -rn "TODO" /workspace/src'),
+    ('run', 'python3 -m pip list | head -20'),
+    ('run', 'find /workspace -name "*.md"'),
+    ('run', 'curl -s http://the-agent-company.com:3000/api/v1/info'),
+    ('run_ipython', ('view', '/workspace/README.md')),
+    ('run_ipython', ('view', '/instruction/task.md')),
+    ('run_ipython', ('create', '/workspace/scratch.py')),
+    ('run_ipython', ('str_replace', '/workspace/scratch.py')),
+    ('browse_interactive', "goto('http://the-agent-company.com:3000/home')"),
+    ('browse_interactive', "goto('http://the-agent-company.com:8929/root')"),
+    ('browse_interactive', "goto('http://the-agent-company.com:8092/index.php/apps/files')"),
+    ('browse_interactive', "click('a51')"),
+    ('browse_interactive', "scroll(0, 400)"),
+    ('browse_interactive', "fill('a72', 'search')"),
+]
+
+# Share of agent actions that repeat the previous action
+REPEAT_RATE = 0.15
+
+
+def parse_size(text: str) -> int:
+    """'200MB' -> bytes (binary units)."""
+    match = _SIZE_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid size: {text} (expected e.g. 512KB, 10MB)")
+    return int(float(match.group(1)) * _SIZE_UNITS[(match.group(2) or 'B').upper()])
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f}{unit}" if unit == 'B' else f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}GB"
+
+
+def parse_case(spec: str) -> Dict:
+    """'EVENTS[:SIZE[:FILES]]' -> case dictionary."""
+    parts = spec.split(':')
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Invalid case: {spec} (expected EVENTS[:SIZE[:FILES]])")
+    try:
+        events = int(parts[0])
+        files = int(parts[2]) if len(parts) == 3 else DEFAULT_FILES
+    except ValueError:
+        raise ValueError(f"Invalid case: {spec} (expected EVENTS[:SIZE[:FILES]])")
+    target_bytes = parse_size(parts[1]) if len(parts) > 1 and parts[1] else None
+    if events < 2 or files < 1:
+        raise ValueError(f"Invalid case: {spec} (need at least 2 events and 1 file)")
+    size_label = parts[1].upper() if target_bytes else 'natural'
+    return {
+        'name': f"{events}ev-{size_label}-{files}f",
+        'events': events,
+        'target_bytes': target_bytes,
+        'files': files,
+    }
+
+
+class TrajectoryGenerator:
+    """
+    Deterministic generator of synthetic OpenHands trajectories.
+
+    Args:
+        golden_path: Golden path the agent works towards
+        num_events: Number of events in the trajectory
+        seed: Random seed
+    """
+
+    def __init__(self, golden_path: List[str], num_events: int, seed: int = 0):
+        self.golden_path = list(golden_path)
+        self.num_events = num_events
+        self.seed = seed
+        self._pad_block = base64.b64encode(random.Random(seed).randbytes(3 << 16)).decode('ascii')
+
+    def _plan(self) -> List[Tuple[str, object]]:
+        # One (action type, payload) per action/observation pair, with the
+        # golden steps in order at random positions and detours in between
+        rng = random.Random(self.seed)
+        steps = [step for step in map(self._golden_step, self.golden_path) if step is not None]
+        num_actions = (self.num_events - 2) // 2
+        steps = steps[:num_actions]
+        golden_positions = set(rng.sample(range(num_actions), len(steps)))
+
+        plan = []
+        golden_steps = iter(steps)
+        for position in range(num_actions):
+            if position in golden_positions:
+                plan.append(next(golden_steps))
+            elif plan and rng.random() < REPEAT_RATE:
+                plan.append(plan[-1])
+            else:
+                plan.append(rng.choice(NOISE_ACTIONS))
+        return plan
+
+    @staticmethod
+    def _golden_step(action: str) -> Optional[Tuple[str, object]]:
+        # Invert the parser: golden path action string -> event payload
+        match = _GOLDEN_ACTION_RE.match(action)
+        if not match:
+            return None
+        name, value = match.group(1), match.group(2) or ''
+        if name == 'execute_bash':
+            return ('run', value)
+        if name == 'read_file':
+            return ('run_ipython', ('view', value))
+        if name == 'write_file':
+            return ('run_ipython', ('create', value))
+        if name == 'goto_url':
+            return ('browse_interactive', f"goto('{value}')")
+        if name == 'send_message':
+            quote = '"' if "'" in value else "'"
+            return ('browse_interactive', f"fill('a95', {quote}{value}{quote})\npress('a95', 'Enter')")
+        return None
+
+    def events(self, detailed: bool = True, padding: int = 0) -> Iterator[Dict]:
+        """
+        Yield the trajectory's events.
+
+        Args:
+            detailed: Include the optional fields real logs carry
+                (tool_call_metadata, timestamps, messages, ...)
+            padding: Total payload bytes spread over the observations
+        """
+        plan = self._plan()
+        extra_message = (self.num_events - 2) % 2
+        per_observation, remainder = divmod(padding, len(plan)) if plan else (0, 0)
+        clock = datetime(2024, 12, 10, 4, 35, 0)
+        event_id = 0
+
+        def base(source):
+            nonlocal clock, event_id
+            event = {'id': event_id, 'source': source}
+            if detailed:
+                event['timestamp'] = clock.isoformat()
+            event_id += 1
+            clock += timedelta(seconds=1.7)
+            return event
+
+        event = base('user')
+        event.update(action='message', args={'content': 'Complete the task in /instruction/task.md'})
+        if detailed:
+            event['message'] = event['args']['content']
+        yield event
+
+        for i, (action_type, payload) in enumerate(plan):
+            pad = per_observation + (remainder if i == len(plan) - 1 else 0)
+            action = base('agent')
+            action['action'] = action_type
+            action['args'] = self._action_args(action_type, payload, detailed)
+            if detailed:
+                action['message'] = f"Running {action_type}"
+                action['tool_call_metadata'] = self._tool_call_metadata(action_type, action['args'], i)
+                action['timeout'] = 300
+            yield action
+
+            observation = base('agent')
+            observation.update(cause=action['id'], observation='browse' if action_type == 'browse_interactive' else action_type)
+            observation.update(self._observation_payload(action_type, action['args'], self._pad(pad), detailed))
+            if detailed:
+                observation['message'] = f"Observed {action_type}"
+            yield observation
+
+        if extra_message:
+            event = base('agent')
+            event.update(action='message', args={'content': 'Continuing with the task.', 'wait_for_response': False})
+            yield event
+
+        event = base('agent')
+        event.update(action='finish', args={'outputs': {}, 'thought': 'The task is complete.'})
+        yield event
+
+    def _pad(self, length: int) -> str:
+        block = self._pad_block
+        if length <= len(block):
+            return block[:length]
+        return (block * (length // len(block) + 1))[:length]
+
+    @staticmethod
+    def _action_args(action_type: str, payload, detailed: bool) -> Dict:
+        if action_type == 'run':
+            args = {'command': payload, 'thought': '', 'blocking': True, 'keep_prompt': True,
+                    'hidden': False, 'confirmation_state': 'confirmed'}
+        elif action_type == 'run_ipython':
+            command, path = payload
+            body = ", 'file_text': '# generated\\n'" if command == 'create' else ''
+            args = {'code': f"print(file_editor(**{{'command': '{command}', 'path': '{path}'{body}}}))",
+                    'thought': '', 'include_extra': True, 'confirmation_state': 'confirmed'}
+        else:
+            args = {'browser_actions': payload, 'thought': '', 'browsergym_send_msg_to_user': ''}
+        if not detailed:
+            # Only the field the parser reads
+            return dict([next(iter(args.items()))])
+        return args
+
+    @staticmethod
+    def _observation_payload(action_type: str, args: Dict, pad: str, detailed: bool) -> Dict:
+        if not detailed:
+            if action_type == 'browse_interactive':
+                return {'content': '', 'extras': {'set_of_marks': _PNG_PREFIX + pad}}
+            return {'content': pad}
+        if action_type == 'run':
+            return {'content': pad, 'extras': {'command_id': -1, 'command': args['command'], 'exit_code': 0}}
+        if action_type == 'run_ipython':
+            return {'content': pad, 'extras': {'code': args['code']}}
+        url = 'http://the-agent-company.com:3000/home'
+        return {
+            'content': '<::before><::after> Home',
+            'extras': {
+                'url': url,
+                'trigger_by_action': 'browse_interactive',
+                'set_of_marks': _PNG_PREFIX + pad,
+                'error': False,
+                'goal_image_urls': [],
+                'open_pages_urls': [url],
+                'filter_visible_only': False,
+            },
+        }
+
+    @staticmethod
+    def _tool_call_metadata(action_type: str, args: Dict, index: int) -> Dict:
+        function_name, arguments = {
+            'run': ('execute_bash', {'command': args.get('command')}),
+            'run_ipython': ('str_replace_editor', {'code': args.get('code')}),
+            'browse_interactive': ('browser', {'code': args.get('browser_actions')}),
+        }[action_type]
+        call_id = f"toolu_{index + 1:02d}"
+        return {
+            'function_name': function_name,
+            'tool_call_id': call_id,
+            'model_response': {
+                'id': f"chatcmpl-{index:08x}",
+                'created': 1733805330 + index,
+                'model': 'gemini-1.5-pro',
+                'object': 'chat.completion',
+                'choices': [{
+                    'finish_reason': 'stop',
+                    'index': 0,
+                    'message': {
+                        'content': '',
+                        'role': 'assistant',
+                        'tool_calls': [{
+                            'index': 1,
+                            'function': {'arguments': json.dumps(arguments), 'name': function_name},
+                            'id': call_id,
+                            'type': 'function',
+                        }],
+                    },
+                }],
+                'usage': {'completion_tokens': 40, 'prompt_tokens': 4800 + index, 'total_tokens': 4840 + index},
+            },
+            'total_calls_in_response': 1,
+        }
+
+    def _document_size(self, detailed: bool) -> int:
+        # Bytes write() produces without padding
+        sizes = [len(json.dumps(event)) for event in self.events(detailed)]
+        return sum(sizes) + 2 * len(sizes) + 1
+
+    def write(self, path: Path, target_bytes: Optional[int] = None) -> int:
+        """
+        Write the trajectory as a JSON array, padded up to target_bytes.
+
+        Returns:
+            Size of the written file in bytes
+        """
+        detailed, padding = True, 0
+        if target_bytes is not None:
+            natural = self._document_size(detailed=True)
+            if natural > target_bytes:
+                detailed = False
+                natural = self._document_size(detailed=False)
+            padding = max(0, target_bytes - natural)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        written = 0
+        with open(tmp_path, 'w') as f:
+            for i, event in enumerate(self.events(detailed, padding)):
+                chunk = ('[' if i == 0 else ',\n') + json.dumps(event)
+                f.write(chunk)
+                written += len(chunk)
+            f.write('\n]')
+            written += 2
+        os.replace(tmp_path, path)
+        return written
+
+
+def _registry_dir(data_dir: Path) -> Path:
+    return data_dir / 'registry'
+
+
+def _case_task(index: int) -> str:
+    return f"bench-{index:03d}"
+
+
+def _source_golden_path(index: int) -> List[str]:
+    from golden_paths import get_golden_path
+    return get_golden_path(SOURCE_TASKS[index % len(SOURCE_TASKS)])
+
+
+def prepare_case(case: Dict, data_dir: Path, seed: int = 0) -> Dict:
+    """
+    Generate (or reuse) a case's trajectories and the synthetic golden paths.
+
+    Returns:
+        The case with 'dir', 'bytes' (of the first trajectory) and
+        'total_bytes' filled in
+    """
+    registry = _registry_dir(data_dir)
+    for index in range(case['files']):
+        entry_file = registry / f"{_case_task(index)}.json"
+        if not entry_file.exists():
+            registry.mkdir(parents=True, exist_ok=True)
+            with open(entry_file, 'w') as f:
+                json.dump({
+                    'task_name': _case_task(index),
+                    'goal': f"Synthetic benchmark task based on {SOURCE_TASKS[index % len(SOURCE_TASKS)]}",
+                    'golden_path': _source_golden_path(index),
+                }, f, indent=2)
+
+    case_dir = data_dir / case['name']
+    manifest_file = case_dir / 'manifest.json'
+    settings = {
+        'generator_version': GENERATOR_VERSION,
+        'seed': seed,
+        'events': case['events'],
+        'target_bytes': case['target_bytes'],
+    }
+    manifest = {}
+    if manifest_file.exists():
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('settings') != settings:
+            manifest = {}
+
+    names = [f"traj_{_case_task(index)}-image.json" for index in range(case['files'])]
+    previous = manifest.get('sizes', {})
+    sizes = {}
+    for index, name in enumerate(names):
+        if name in previous and (case_dir / name).exists():
+            sizes[name] = previous[name]
+            continue
+        print(f"Generating {case['name']}/{name}...")
+        generator = TrajectoryGenerator(_source_golden_path(index), case['events'], seed + index)
+        sizes[name] = generator.write(case_dir / name, case['target_bytes'])
+
+    with open(manifest_file, 'w') as f:
+        json.dump({'settings': settings, 'sizes': sizes}, f, indent=2)
+
+    return {**case, 'dir': str(case_dir), 'bytes': sizes[names[0]], 'total_bytes': sum(sizes.values())}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def _clear_caches() -> None:
+    # Every timed call starts cold, as a fresh evaluator process would
+    import scoring
+    scoring.SIMILARITY.cache_clear()
+    scoring.ACTION_NORMALIZER.cache_clear()
+
+
+def _run_benchmark(benchmark: str, case: Dict, repeat: int, workers: int) -> Dict:
+    # Runs in a fresh process (see run_benchmarks)
+    import scoring
+    from evaluator import evaluate_multiple_trajectories
+    from golden_paths import get_compiled_golden_path
+    from parser import parse_trajectory
+
+    trajectory = Path(case['dir']) / f"traj_{_case_task(0)}-image.json"
+    if benchmark == 'parse':
+        call = lambda: parse_trajectory(trajectory)
+    elif benchmark == 'parse-streaming':
+        call = lambda: parse_trajectory(trajectory, streaming=True)
+    elif benchmark == 'score':
+        # Streaming keeps the document out of the peak RSS measured for scoring
+        agent_path = parse_trajectory(trajectory, streaming=True)
+        golden_path = get_compiled_golden_path(_case_task(0))
+
+        def call():
+            _clear_caches()
+            return scoring.calculate_efficiency_score(agent_path, golden_path)
+    elif benchmark == 'evaluate':
+        def call():
+            _clear_caches()
+            with contextlib.redirect_stdout(io.StringIO()):
+                return evaluate_multiple_trajectories(case['dir'], workers=workers)
+    else:
+        raise ValueError(f"Unknown benchmark: {benchmark}")
+
+    timer = timeit.Timer(call)
+    loops, _ = timer.autorange()
+    times = [elapsed / loops for elapsed in timer.repeat(repeat, loops)]
+
+    median = statistics.median(times)
+    if benchmark == 'score':
+        throughput, unit = len(agent_path) / median, 'actions/s'
+    elif benchmark == 'evaluate':
+        throughput, unit = case['total_bytes'] / (1 << 20) / median, 'MB/s'
+    else:
+        throughput, unit = case['bytes'] / (1 << 20) / median, 'MB/s'
+    return {
+        'case': case['name'],
+        'benchmark': benchmark,
+        'events': case['events'],
+        'bytes': case['bytes'],
+        'files': case['files'] if benchmark == 'evaluate' else 1,
+        'median_s': median,
+        'min_s': min(times),
+        'throughput': throughput,
+        'throughput_unit': unit,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(cases: List[Dict], benchmarks: List[str], repeat: int = 3, workers: int = 1) -> List[Dict]:
+    """Run every benchmark on every prepared case, each in a new process."""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for case in cases:
+        for benchmark in benchmarks:
+            print(f"Running {case['name']} {benchmark}...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(pool.submit(_run_benchmark, benchmark, case, repeat, workers).result())
+    return results
+
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def _delta(value: Optional[float], reference: Optional[float]) -> Optional[float]:
+    if value is None or not reference:
+        return None
+    return (value - reference) / reference
+
+
+def compare_with_baseline(results: List[Dict], baseline: Dict, max_regression: float) -> List[str]:
+    """
+    Annotate results with their change vs the baseline.
+
+    Returns:
+        Descriptions of the benchmarks that regressed by more than max_regression
+    """
+    reference = baseline.get('results', {})
+    regressions = []
+    for result in results:
+        key = f"{result['case']}/{result['benchmark']}"
+        previous = reference.get(key)
+        if previous is None:
+            continue
+        result['time_delta'] = _delta(result['median_s'], previous['median_s'])
+        result['rss_delta'] = _delta(result['peak_rss_mb'], previous.get('peak_rss_mb'))
+        if result['time_delta'] is not None and result['time_delta'] > max_regression:
+            regressions.append(f"{key}: median time {result['time_delta']:+.1%}")
+        if result['rss_delta'] is not None and result['rss_delta'] > max_regression:
+            regressions.append(f"{key}: peak RSS {result['rss_delta']:+.1%}")
+    return regressions
+
+
+def print_results(results: List[Dict]) -> None:
+    print("\n" + "=" * 60)
+    print("BENCHMARK RESULTS")
+    print("=" * 60)
+    header = f"{'case':<20} {'benchmark':<16} {'median':>9} {'min':>9} {'throughput':>20} {'peak RSS':>10}"
+    with_baseline = any('time_delta' in result for result in results)
+    if with_baseline:
+        header += f" {'time':>8} {'RSS':>8}"
+    print(header)
+    for result in results:
+        rss = 'n/a' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}MB"
+        line = (f"{result['case']:<20} {result['benchmark']:<16} {_format_time(result['median_s']):>9} "
+                f"{_format_time(result['min_s']):>9} "
+                f"{result['throughput']:>10.1f} {result['throughput_unit']:<9} {rss:>10}")
+        if with_baseline:
+            deltas = [result.get('time_delta'), result.get('rss_delta')]
+            line += ''.join(f" {'-' if d is None else format(d, '+.1%'):>8}" for d in deltas)
+        print(line.rstrip())
+
+
+def baseline_payload(results: List[Dict]) -> Dict:
+    from evaluator import evaluator_version
+    return {
+        'generator_version': GENERATOR_VERSION,
+        'evaluator_version': evaluator_version(),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        'results': {f"{result['case']}/{result['benchmark']}": result for result in results},
+    }
+
+
+def build_cli() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Benchmark trajectory parsing, scoring and evaluation on synthetic trajectories'
+    )
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick',
+                        help='Predefined set of cases, used unless --case is given (default: quick)')
+    parser.add_argument('--case', action='append', default=None, metavar='EVENTS[:SIZE[:FILES]]',
+                        help=f'Benchmark case, e.g. 1000:1MB or 100000:200MB:1 (repeatable; '
+                             f'FILES defaults to {DEFAULT_FILES})')
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per benchmark (default: 3)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for the evaluate benchmark (0 = all CPUs)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for generated trajectories')
+    parser.add_argument('--data-dir', default=str(DEFAULT_DATA_DIR),
+                        help=f'Where generated trajectories are kept (default: {DEFAULT_DATA_DIR})')
+    parser.add_argument('--similarity', choices=sorted(similarity.BACKENDS), default=None,
+                        help=f'Fuzzy action similarity backend to benchmark (default: {similarity.DEFAULT_BACKEND})')
+    parser.add_argument('--generate-only', action='store_true', help='Only generate the trajectories')
+    parser.add_argument('--baseline', default=None, help='Compare with results saved by --save-baseline')
+    parser.add_argument('--max-regression', type=float, default=0.15,
+                        help='Allowed relative increase of median time or peak RSS vs --baseline (default: 0.15)')
+    parser.add_argument('--save-baseline', default=None, help='Save the results as a baseline JSON file')
+    parser.add_argument('--save-json', default=None, help='Save the results as JSON')
+    return parser
+
+
+def main() -> None:
+    cli = build_cli()
+    args = cli.parse_args()
+
+    try:
+        cases = [parse_case(spec) for spec in (args.case or PRESETS[args.preset])]
+    except ValueError as e:
+        cli.error(str(e))
+
+    import scoring
+    from golden_paths import use_registry_dirs
+
+    if args.similarity:
+        scoring.set_similarity_backend(args.similarity)
+
+    data_dir = Path(args.data_dir)
+    cases = [prepare_case(case, data_dir, args.seed) for case in cases]
+    for case in cases:
+        print(f"  {case['name']}: {case['files']} x {format_size(case['bytes'])}")
+    if args.generate_only:
+        return
+
+    # Exported through GOLDEN_PATH_DIRS, so benchmark processes see the synthetic tasks
+    use_registry_dirs([str(_registry_dir(data_dir))])
+
+    results = run_benchmarks(cases, args.benchmarks, args.repeat, args.workers)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('generator_version') != GENERATOR_VERSION:
+            print(f"Warning: {args.baseline} was generated with different trajectories")
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+
+    print_results(results)
+
+    for path in (args.save_baseline, args.save_json):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(baseline_payload(results), f, indent=2)
+            print(f"\nResults saved to {path}")
+
+    if args.baseline:
+        if regressions:
+            print(f"\nRegressions over {args.max_regression:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.max_regression:.0%} vs {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""
+Weight and threshold calibration for the efficiency score.
+
+Raw score components (coverage, order, path lengths, unweighted redundancy,
+time and token efficiency against the task budget) are computed once per
+trajectory and cached on disk. Any number of
+weight/threshold configurations are then scored against every trajectory
+with NumPy broadcasting and ranked by Spearman rank correlation with a
+set of human grades.
+
+Grades file (JSON): maps a trajectory filename (e.g.
+"traj_pm-schedule-meeting-1-image.json") or a task name to a numeric grade.
+
+Grid file (JSON): maps parameter names to lists of values; every
+combination is evaluated. Parameters not listed keep their defaults.
+
+Requires NumPy.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from batch_scoring import combine_components, length_efficiencies
+from evaluator import extract_task_name_from_filename, is_result_current, trajectory_fingerprint
+from golden_paths import get_golden_variants, get_task_budget
+from parse_cache import parse_trajectory_cached
+from parser import find_trajectory_files
+from scoring import calculate_best_variant_score, detect_harmful_redundancy
+
+# Tunable parameters and their current defaults in calculate_efficiency_score
+DEFAULT_CONFIG = {
+    'coverage_weight': 0.6,
+    'order_weight': 0.15,
+    'length_weight': 0.1,
+    'redundancy_weight': 0.15,
+    'high_coverage_threshold': 0.9,
+    'penalty_cap': 15.0,
+    'completeness_bonus_points': 10.0,
+    'time_weight': 0.1,
+    'token_weight': 0.1,
+}
+
+DEFAULT_GRID = {
+    'coverage_weight': [0.4, 0.5, 0.6, 0.7, 0.8],
+    'order_weight': [0.05, 0.1, 0.15, 0.2, 0.25],
+    'length_weight': [0.05, 0.1, 0.15, 0.2],
+    'redundancy_weight': [0.05, 0.1, 0.15, 0.2, 0.25],
+    'high_coverage_threshold': [0.8, 0.9, 1.0],
+    'penalty_cap': [10.0, 15.0, 20.0],
+    'completeness_bonus_points': [0.0, 5.0, 10.0],
+    'time_weight': [0.0, 0.1, 0.2],
+    'token_weight': [0.0, 0.1, 0.2],
+}
+
+# Per-trajectory components the sweep reads; time/token efficiency are
+# None when the task has no budget or the trajectory no runtime data
+COMPONENT_KEYS = (
+    'coverage', 'order_score', 'agent_path_length', 'golden_path_length',
+    'redundancy_penalty_raw', 'time_efficiency', 'token_efficiency',
+)
+
+# Configurations scored per NumPy block
+CONFIG_CHUNK_SIZE = 1024
+
+
+def compute_components(trajectory_path: str, parse_cache_dir: str = None) -> Dict:
+    """
+    Raw, weight-independent score components for one trajectory.
+    For a task with golden path variants they are taken from the variant
+    the evaluator picks (the best match under the default weights).
+    """
+    task_name = extract_task_name_from_filename(Path(trajectory_path).name)
+    try:
+        fingerprint = trajectory_fingerprint(trajectory_path, task_name, parse_cache_dir)
+        golden_paths = get_golden_variants(task_name)
+        if golden_paths is None:
+            return {'error': f'No golden path found for task: {task_name}', 'task_name': task_name}
+        agent_path, runtime = parse_trajectory_cached(trajectory_path, parse_cache_dir, with_runtime=True)
+        _, coverage_metrics = calculate_best_variant_score(
+            agent_path, golden_paths, runtime=runtime, budget=get_task_budget(task_name)
+        )
+    except Exception as e:
+        return {'error': f'Error computing components: {e}', 'task_name': task_name}
+
+    return {
+        'task_name': task_name,
+        'coverage': coverage_metrics['coverage'],
+        'order_score': coverage_metrics['order_score'],
+        'agent_path_length': len(agent_path),
+        'golden_path_length': coverage_metrics['golden_path_length'],
+        'redundancy_penalty_raw': detect_harmful_redundancy(agent_path),
+        'time_efficiency': coverage_metrics['time_efficiency'],
+        'token_efficiency': coverage_metrics['token_efficiency'],
+        'fingerprint': fingerprint,
+    }
+
+
+def collect_components(
+    trajectory_dir: str,
+    cache_file: str = None,
+    parse_cache_dir: str = None,
+    workers: int = 1
+) -> Dict[str, Dict]:
+    """
+    Components for every traj_*.json (or .json.gz / .json.zst) in a
+    directory, keyed by filename.
+
+    Entries in cache_file whose trajectory, golden path and evaluator
+    version are unchanged (and that hold every COMPONENT_KEYS entry) are
+    reused; the rest are recomputed and the cache file is rewritten.
+    """
+    trajectory_files = find_trajectory_files(trajectory_dir)
+
+    cached: Dict[str, Dict] = {}
+    if cache_file and Path(cache_file).exists():
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+
+    components: Dict[str, Dict] = {}
+    pending: List[Path] = []
+    for traj_file in trajectory_files:
+        entry = cached.get(traj_file.name)
+        if (entry is not None and 'error' not in entry and all(key in entry for key in COMPONENT_KEYS)
+                and is_result_current(entry, traj_file)):
+            components[traj_file.name] = entry
+        else:
+            pending.append(traj_file)
+
+    if pending:
+        print(f"Computing components for {len(pending)} trajectories "
+              f"({len(components)} cached)...")
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(pending)))
+        compute = partial(compute_components, parse_cache_dir=parse_cache_dir)
+        paths = [str(traj_file) for traj_file in pending]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(compute, paths))
+        else:
+            outcomes = [compute(path) for path in paths]
+        for traj_file, entry in zip(pending, outcomes):
+            if 'error' in entry:
+                print(f"  {traj_file.name}: {entry['error']}")
+            components[traj_file.name] = entry
+
+    components = {name: components[name] for name in sorted(components)}
+    if cache_file:
+        with open(cache_file, 'w') as f:
+            json.dump(components, f, indent=2)
+    return components
+
+
+def expand_grid(grid: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """Every combination of the grid values, on top of DEFAULT_CONFIG."""
+    unknown = set(grid) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown calibration parameters: {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [
+        {**DEFAULT_CONFIG, **dict(zip(names, values))}
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def average_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Row-wise ranks (1-based) with ties given their average rank.
+    """
+    values = np.atleast_2d(values)
+    rows, cols = values.shape
+    order = np.argsort(values, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    positions = np.broadcast_to(np.arange(cols), (rows, cols))
+
+    starts_group = np.ones((rows, cols), dtype=bool)
+    starts_group[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    ends_group = np.ones((rows, cols), dtype=bool)
+    ends_group[:, :-1] = starts_group[:, 1:]
+
+    group_start = np.maximum.accumulate(np.where(starts_group, positions, 0), axis=1)
+    group_end = np.minimum.accumulate(
+        np.where(ends_group, positions, cols)[:, ::-1], axis=1
+    )[:, ::-1]
+
+    ranks = np.empty((rows, cols))
+    np.put_along_axis(ranks, order, (group_start + group_end) / 2.0 + 1.0, axis=1)
+    return ranks
+
+
+def spearman_rows(scores: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Spearman correlation of each row of scores with labels (NaN if undefined)."""
+    score_ranks = average_ranks(scores)
+    label_ranks = average_ranks(labels)[0]
+    score_centered = score_ranks - score_ranks.mean(axis=1, keepdims=True)
+    label_centered = label_ranks - label_ranks.mean()
+    numerator = score_centered @ label_centered
+    denominator = np.sqrt((score_centered ** 2).sum(axis=1) * (label_centered ** 2).sum())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _score_config_chunk(configs: List[Dict[str, float]], columns: Dict[str, np.ndarray]) -> np.ndarray:
+    params = {
+        name: np.array([config[name] for config in configs])[:, None]
+        for name in DEFAULT_CONFIG
+    }
+    length_efficiency = length_efficiencies(
+        columns['agent_path_length'],
+        columns['golden_path_length'],
+        columns['coverage'],
+        params['high_coverage_threshold']
+    )
+    scores = combine_components(
+        columns['coverage'],
+        columns['order_score'],
+        length_efficiency,
+        columns['redundancy_penalty_raw'],
+        time_efficiency=columns['time_efficiency'],
+        token_efficiency=columns['token_efficiency'],
+        **params
+    )['efficiency_score']
+    return spearman_rows(scores, columns['label'])
+
+
+def sweep(
+    components: Dict[str, Dict],
+    grades: Dict[str, float],
+    configs: List[Dict[str, float]],
+    workers: int = 1
+) -> List[Dict]:
+    """
+    Spearman correlation of every configuration with the grades.
+
+    Returns:
+        One entry per configuration, best correlation first
+    """
+    labelled = []
+    for name, entry in components.items():
+        if 'error' in entry:
+            continue
+        grade = grades.get(name, grades.get(entry['task_name']))
+        if grade is not None:
+            labelled.append((entry, float(grade)))
+    if len(labelled) < 2:
+        raise ValueError("At least two graded trajectories are needed to compute rank correlation")
+
+    # None efficiencies become NaN, which combine_components does not penalize
+    columns = {
+        key: np.array([entry[key] for entry, _ in labelled], dtype=float)
+        for key in COMPONENT_KEYS
+    }
+    columns['label'] = np.array([grade for _, grade in labelled])
+
+    chunks = [configs[i:i + CONFIG_CHUNK_SIZE] for i in range(0, len(configs), CONFIG_CHUNK_SIZE)]
+    score_chunk = partial(_score_config_chunk, columns=columns)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            correlations = np.concatenate(list(pool.map(score_chunk, chunks)))
+    else:
+        correlations = np.concatenate([score_chunk(chunk) for chunk in chunks])
+
+    results = [
+        {'config': config, 'spearman': None if np.isnan(rho) else float(rho)}
+        for config, rho in zip(configs, correlations)
+    ]
+    results.sort(key=lambda r: -np.inf if r['spearman'] is None else r['spearman'], reverse=True)
+    return results
+
+
+def build_cli() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Calibrate efficiency score weights and thresholds against human grades'
+    )
+    parser.add_argument('trajectory_dir', help='Directory containing traj_*.json files')
+    parser.add_argument('--grades', required=True,
+                        help='JSON file mapping trajectory filenames or task names to grades')
+    parser.add_argument('--grid', default=None,
+                        help='JSON file mapping parameter names to lists of values (default: built-in grid)')
+    parser.add_argument('--components-cache', default='calibration_components.json',
+                        help='File caching per-trajectory raw components (default: calibration_components.json)')
+    parser.add_argument('--parse-cache', metavar='DIR', default=None,
+                        help='Cache parsed actions in DIR, keyed by trajectory content and parser version')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for component collection and the sweep (0 = all CPUs)')
+    parser.add_argument('--top', type=int, default=10, help='Number of best configurations to print')
+    parser.add_argument('--save-json', default=None, help='Save every configuration and its correlation')
+    return parser
+
+
+def main() -> None:
+    cli = build_cli()
+    args = cli.parse_args()
+
+    if not Path(args.trajectory_dir).is_dir():
+        cli.error(f"Not a directory: {args.trajectory_dir}")
+
+    with open(args.grades, 'r') as f:
+        grades = json.load(f)
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            grid = json.load(f)
+
+    components = collect_components(
+        args.trajectory_dir, args.components_cache, args.parse_cache, args.workers
+    )
+    configs = expand_grid(grid)
+    print(f"Evaluating {len(configs)} configurations...")
+
+    try:
+        results = sweep(components, grades, configs + [dict(DEFAULT_CONFIG)], args.workers)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    baseline = next(r for r in results if r['config'] == DEFAULT_CONFIG)
+    print("\n" + "=" * 60)
+    print("CALIBRATION RESULTS (Spearman rank correlation)")
+    print("=" * 60)
+    if baseline['spearman'] is not None:
+        print(f"Current defaults: {baseline['spearman']:.3f}")
+    for rank, result in enumerate(results[:args.top], start=1):
+        rho = 'n/a' if result['spearman'] is None else f"{result['spearman']:.3f}"
+        params = ', '.join(f"{name}={value:g}" for name, value in result['config'].items())
+        print(f"{rank:>3}. {rho}  {params}")
+
+    if args.save_json:
+        with open(args.save_json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.save_json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,33 +5,87 @@ Evaluates white agent trajectories by comparing them to golden paths
 and calculating efficiency scores.
 """
 
+import hashlib
 import json
 import argparse
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Dict, List
-from parser import parse_trajectory
-from golden_paths import get_golden_path, get_all_task_names
-from scoring import calculate_efficiency_score, generate_diagnostic_report
+import actions
+import alignment
+import parser as trajectory_parser
+import scoring
+import similarity
+import trajectory_index
+from parse_cache import file_content_hash, get_parse_cache, parse_trajectory_cached
+from parser import find_trajectory_files, strip_compression_suffix
+from profiling import PROFILER, aggregate_profiles, merge_cprofile_dumps, render_profile_summary
+from results_store import ResultsStore, is_store_path, result_key, result_summary
+from golden_paths import (
+    get_all_task_names, get_golden_path, get_golden_variants, get_task_budget, use_registry_dirs
+)
+from reports import REPORT_FORMATS, render_result_report
+from scoring import calculate_best_variant_score
+
+def _source_version(*modules) -> str:
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+# Changes whenever parsing or scoring code changes, so incremental runs
+# re-score everything after an evaluator upgrade
+EVALUATOR_VERSION = _source_version(
+    actions, trajectory_parser, trajectory_index, alignment, similarity, scoring
+)
+
+def evaluator_version() -> str:
+    """EVALUATOR_VERSION qualified by the active similarity backend and order metric."""
+    return f"{EVALUATOR_VERSION}-{scoring.SIMILARITY.name}-{scoring.ORDER_METRIC}"
 
 def extract_task_name_from_filename(filename: str) -> str:
     """
     Extract task name from trajectory filename.
     Ex: 'traj_pm-schedule-meeting-1-image.json' -> 'pm-schedule-meeting-1'
+        'traj_pm-schedule-meeting-1-image.json.gz' -> 'pm-schedule-meeting-1'
     """
+    filename = strip_compression_suffix(filename)
     task_name = filename.replace('traj_', '').replace('-image.json', '').replace('.json', '')
     return task_name
 
-def evaluate_trajectory(trajectory_path: str, task_name: str = None) -> Dict:
+def evaluate_trajectory(
+    trajectory_path: str,
+    task_name: str = None,
+    streaming: bool = False,
+    parse_cache_dir: str = None,
+    indexed: bool = False
+) -> Dict:
     """
     Evaluate a single trajectory file.
+    If streaming is set, the trajectory is parsed incrementally and
+    observation payloads are skipped. If indexed is set, only agent action
+    events are decoded, located through the trajectory's cached event
+    index (see trajectory_index.py). If parse_cache_dir is set, parsed
+    actions are read from / stored in that on-disk cache.
+    
+    Wall-clock time and token usage are scored against the task's budget
+    when its registry entry defines one.
+    
+    No diagnostic report is built here; use result_report to render one
+    on demand. Actions are scored as parsed; the result holds their
+    rendered action strings.
     """
     if task_name is None:
         filename = Path(trajectory_path).name
         task_name = extract_task_name_from_filename(filename)
     
     try:
-        agent_path = parse_trajectory(trajectory_path)
+        agent_path, runtime = parse_trajectory_cached(
+            trajectory_path, parse_cache_dir, streaming=streaming, indexed=indexed, with_runtime=True
+        )
     except FileNotFoundError:
         return {
             'error': f'Trajectory file not found: {trajectory_path}',
@@ -43,64 +97,262 @@ def evaluate_trajectory(trajectory_path: str, task_name: str = None) -> Dict:
             'task_name': task_name
         }
     
-    golden_path = get_golden_path(task_name)
-    if not golden_path:
+    golden_paths = get_golden_variants(task_name)
+    if golden_paths is None:
         return {
             'error': f'No golden path found for task: {task_name}',
             'task_name': task_name,
-            'agent_path': agent_path
+            'agent_path': [action.render() for action in agent_path]
         }
     
-    scores = calculate_efficiency_score(agent_path, golden_path)
-    report = generate_diagnostic_report(agent_path, golden_path, scores)
+    # Score against the golden path variant the agent followed most closely
+    variant, scores = calculate_best_variant_score(
+        agent_path, golden_paths, runtime=runtime, budget=get_task_budget(task_name)
+    )
     
     return {
         'task_name': task_name,
         'trajectory_path': trajectory_path,
         'scores': scores,
-        'agent_path': agent_path,
-        'golden_path': golden_path,
-        'diagnostic_report': report
+        'agent_path': [action.render() for action in agent_path],
+        'golden_path': list(golden_paths.variants[variant].actions)
+    }
+
+def result_report(result: Dict, fmt: str = 'text') -> str:
+    """
+    Render the diagnostic report of an evaluation result in text, json or
+    html, annotated with the golden -> agent step alignment.
+    """
+    return render_result_report(result, fmt, aligner=scoring.ALIGNMENT_ENGINE.align)
+
+def golden_path_fingerprint(task_name: str) -> str:
+    """Short hash of a task's current golden path (and variants and budget, if any)."""
+    entry = get_golden_path(task_name)
+    golden_paths = get_golden_variants(task_name)
+    variants = [list(v.actions) for v in golden_paths.variants[1:]] if golden_paths else []
+    budget = get_task_budget(task_name)
+    if budget or variants:
+        entry = {'golden_path': entry, 'budget': budget}
+        if variants:
+            entry['variants'] = variants
+    return hashlib.sha256(json.dumps(entry, sort_keys=True).encode()).hexdigest()[:16]
+
+def trajectory_fingerprint(trajectory_path: str, task_name: str, parse_cache_dir: str = None) -> Dict:
+    """
+    Record identifying the inputs a result was computed from: the
+    trajectory file, the task's golden path and the evaluator version.
+    The file's content hash is only recorded when a parse cache is used,
+    which stores it anyway (and reuses it while size and mtime match);
+    the file is not read an extra time to fingerprint it.
+    """
+    path = Path(trajectory_path)
+    stat = path.stat()
+    return {
+        'path': str(path.resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': get_parse_cache(parse_cache_dir).content_hash(path) if parse_cache_dir else None,
+        'golden_path': golden_path_fingerprint(task_name),
+        'evaluator_version': evaluator_version()
     }
 
-def evaluate_multiple_trajectories(trajectory_dir: str, output_file: str = None) -> Dict[str, Dict]:
+def is_result_current(previous: Dict, traj_file: Path) -> bool:
+    """
+    Check whether a previous result is still valid for a trajectory file.
+    The file is only re-hashed when its size matches but its mtime changed,
+    and only if the previous result recorded a content hash.
+    """
+    fingerprint = previous.get('fingerprint')
+    if not fingerprint or fingerprint.get('evaluator_version') != evaluator_version():
+        return False
+    if fingerprint.get('golden_path') != golden_path_fingerprint(previous.get('task_name')):
+        return False
+    try:
+        stat = traj_file.stat()
+    except OSError:
+        return False
+    if stat.st_size != fingerprint.get('size'):
+        return False
+    if stat.st_mtime_ns == fingerprint.get('mtime_ns'):
+        return True
+    if not fingerprint.get('sha256'):
+        return False
+    return file_content_hash(traj_file) == fingerprint['sha256']
+
+def load_previous_results(output_file: str) -> Dict[str, Dict]:
+    """
+    Load a previous results file, indexed by resolved trajectory path.
+    Entries without a fingerprint (older results files) are ignored.
+    """
+    try:
+        with open(output_file, 'r') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    
+    by_path = {}
+    for result in previous.values():
+        fingerprint = result.get('fingerprint') if isinstance(result, dict) else None
+        if fingerprint and 'path' in fingerprint:
+            by_path[fingerprint['path']] = result
+    return by_path
+
+def _evaluate_trajectory_safe(
+    trajectory_path: str,
+    streaming: bool = False,
+    parse_cache_dir: str = None,
+    indexed: bool = False
+) -> Dict:
+    """
+    Evaluate a trajectory, turning any unexpected exception into an error
+    result so one bad file cannot abort a batch (or a worker pool).
+    With profiling enabled, the result includes its stage profile.
+    """
+    task_name = extract_task_name_from_filename(Path(trajectory_path).name)
+    with PROFILER.trajectory() as profiled:
+        try:
+            fingerprint = trajectory_fingerprint(trajectory_path, task_name, parse_cache_dir)
+            result = evaluate_trajectory(
+                trajectory_path, streaming=streaming, parse_cache_dir=parse_cache_dir, indexed=indexed
+            )
+            result['fingerprint'] = fingerprint
+        except Exception as e:
+            result = {
+                'error': f'Error evaluating trajectory: {e}',
+                'task_name': task_name
+            }
+    if profiled.profile is not None:
+        result['profile'] = profiled.profile
+    return result
+
+def evaluate_multiple_trajectories(
+    trajectory_dir: str,
+    output_file: str = None,
+    streaming: bool = False,
+    workers: int = 1,
+    parse_cache_dir: str = None,
+    incremental: bool = False,
+    indexed: bool = False
+) -> Dict[str, Dict]:
     """
     Evaluate all trajectory files in a directory.
     
     Args:
         trajectory_dir: Directory containing trajectory JSON files
-        output_file: Optional path to save results JSON
+            (traj_*.json, optionally compressed as .json.gz / .json.zst)
+        output_file: Optional path to save results; a .db/.sqlite path is
+            written incrementally as a results store (see results_store.py)
+        streaming: Parse trajectories incrementally to bound memory use
+        workers: Number of worker processes (1 evaluates in-process,
+            0 uses all available CPUs)
+        parse_cache_dir: Optional on-disk cache of parsed actions
+        incremental: Reuse results from an existing output_file for
+            trajectories whose file, golden path and evaluator version are
+            unchanged, and only evaluate the rest
+        indexed: Decode only agent action events, using each trajectory's
+            cached event index
     
     Returns:
-        Dictionary mapping task names to evaluation results
+        Dictionary mapping task names to evaluation results, in
+        trajectory filename order regardless of the number of workers.
+        Further runs of a task already in the mapping are keyed by their
+        trajectory file name instead.
+        When writing a results store, the returned results omit action
+        lists and reports, which are only kept in the store.
     """
     trajectory_dir = Path(trajectory_dir)
     results = {}
     
-    trajectory_files = list(trajectory_dir.glob('traj_*.json'))
+    trajectory_files = find_trajectory_files(trajectory_dir)
     
     if not trajectory_files:
         print(f"No trajectory files found in {trajectory_dir}")
         return results
-        
-    for traj_file in trajectory_files:
-        print(f"\nEvaluating {traj_file.name}...")
-        result = evaluate_trajectory(str(traj_file))
-        task_name = result.get('task_name', traj_file.stem)
-        results[task_name] = result
-        
-        if 'error' in result:
-            print(f"  Error: {result['error']}")
+    
+    store = ResultsStore(output_file) if output_file and is_store_path(output_file) else None
+    
+    # Previous results that are still valid, by trajectory file
+    reused: Dict[Path, Dict] = {}
+    if incremental and output_file:
+        previous = store.previous_results() if store else load_previous_results(output_file)
+        for traj_file in trajectory_files:
+            result = previous.get(str(traj_file.resolve()))
+            if result is not None and is_result_current(result, traj_file):
+                reused[traj_file] = result
+        print(f"Incremental mode: {len(reused)} unchanged, "
+              f"{len(trajectory_files) - len(reused)} to evaluate")
+    
+    pending = [traj_file for traj_file in trajectory_files if traj_file not in reused]
+    
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(pending)))
+    
+    evaluate = partial(
+        _evaluate_trajectory_safe, streaming=streaming, parse_cache_dir=parse_cache_dir, indexed=indexed
+    )
+    paths = [str(traj_file) for traj_file in pending]
+    
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if pool is not None:
+            print(f"Evaluating {len(paths)} trajectories with {workers} workers...")
+            chunksize = max(1, len(paths) // (workers * 4))
+            outcomes = pool.map(evaluate, paths, chunksize=chunksize)
         else:
-            print(f"  Efficiency Score: {result['scores']['efficiency_score']:.2f}/100")
+            outcomes = map(evaluate, paths)
+        
+        # pool.map yields in submission order, so output stays deterministic
+        outcomes = iter(outcomes)
+        for traj_file in trajectory_files:
+            if traj_file in reused:
+                # A profile from the run that computed it would be misleading
+                result = {key: value for key, value in reused[traj_file].items() if key != 'profile'}
+            else:
+                print(f"\nEvaluating {traj_file.name}...")
+                result = next(outcomes)
+                if 'error' in result:
+                    print(f"  Error: {result['error']}")
+                else:
+                    print(f"  Efficiency Score: {result['scores']['efficiency_score']:.2f}/100")
+                if store is not None:
+                    # Stream the row out and only keep the scores in memory
+                    store.write(result, str(traj_file.resolve()))
+                    result = result_summary(result)
+            task_name = result.get('task_name', traj_file.stem)
+            results[result_key(results, task_name, str(traj_file))] = result
+        if store is not None:
+            store.prune(str(traj_file.resolve()) for traj_file in trajectory_files)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if store is not None:
+            store.close()
     
-    if output_file:
+    if store is not None:
+        print(f"\nResults saved to {output_file}")
+    elif output_file:
         with open(output_file, 'w') as f:
             json.dump(results, f, indent=2)
         print(f"\nResults saved to {output_file}")
     
     return results
 
+def report_profile(profiles: List[Dict], profile_output: str = None) -> None:
+    """
+    Print the aggregated stage profile of a run, optionally save it as
+    JSON, and merge the workers' cProfile dumps if cProfile is on.
+    """
+    summary = aggregate_profiles(profiles)
+    print("\n" + render_profile_summary(summary))
+    if profile_output:
+        with open(profile_output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nProfile saved to {profile_output}")
+    if PROFILER.cprofile_path and merge_cprofile_dumps(PROFILER.cprofile_path):
+        print(f"cProfile statistics saved to {PROFILER.cprofile_path} "
+              f"(inspect with: python -m pstats {PROFILER.cprofile_path})")
+
 def main():
     parser = argparse.ArgumentParser(
         description='Green Agent Evaluator. Evaluate agent trajectory efficiency'
@@ -122,21 +374,115 @@ def main():
         '--output',
         type=str,
         default=None,
-        help='Output file path for results in JSON format'
+        help='Output file path for results (JSON, or a SQLite results store for .db/.sqlite paths)'
     )
     parser.add_argument(
         '--report',
         action='store_true',
         help='Print detailed report'
     )
+    parser.add_argument(
+        '--report-format',
+        choices=REPORT_FORMATS,
+        default='text',
+        help='Format of the --report output (default: text)'
+    )
+    parser.add_argument(
+        '--report-file',
+        type=str,
+        default=None,
+        help='Write the --report output to this file instead of printing it'
+    )
     parser.add_argument(
         '--list-tasks',
         action='store_true',
         help='List all available task names'
     )
+    parser.add_argument(
+        '--golden-paths',
+        action='append',
+        default=[],
+        metavar='DIR',
+        help='Extra golden path registry directory (one <task>.json per task); may be repeated'
+    )
+    parser.add_argument(
+        '--similarity',
+        choices=sorted(similarity.BACKENDS),
+        default=None,
+        help=f'Fuzzy action similarity backend (default: {similarity.DEFAULT_BACKEND}; '
+             f'indel/rapidfuzz are faster but score differently)'
+    )
+    parser.add_argument(
+        '--order-metric',
+        choices=alignment.ORDER_METRICS,
+        default=None,
+        help=f'Metric behind order_score (default: {alignment.DEFAULT_ORDER_METRIC}); '
+             f'lis and kendall measure the order of the matched agent steps; golden is the '
+             f'original metric and is 1.0 whenever anything matched'
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='Parse trajectories incrementally, skipping observation payloads (lower memory use)'
+    )
+    parser.add_argument(
+        '--indexed',
+        action='store_true',
+        help='Decode only agent action events, located through an event index cached next to '
+             'each trajectory (<file>.idx); fastest for repeated runs over large trajectories'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of worker processes for directory evaluation (0 = all CPUs, default: 1)'
+    )
+    parser.add_argument(
+        '--parse-cache',
+        type=str,
+        default=None,
+        metavar='DIR',
+        help='Cache parsed actions in DIR, keyed by trajectory content and parser version'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only re-score trajectories whose file or golden path changed since the --output results'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Record per-stage timings, call counts and bytes read for every trajectory'
+    )
+    parser.add_argument(
+        '--profile-output',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Save the aggregated --profile statistics (with histograms) as JSON (implies --profile)'
+    )
+    parser.add_argument(
+        '--cprofile',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Also collect cProfile statistics from all processes into FILE (implies --profile)'
+    )
     
     args = parser.parse_args()
     
+    if args.golden_paths:
+        use_registry_dirs(args.golden_paths)
+    
+    if args.similarity:
+        scoring.set_similarity_backend(args.similarity)
+    
+    if args.order_metric:
+        scoring.set_order_metric(args.order_metric)
+    
+    if args.profile or args.profile_output or args.cprofile:
+        PROFILER.enable(cprofile_path=args.cprofile)
+    
     if args.list_tasks:
         print("Available tasks:")
         for task_name in get_all_task_names():
@@ -146,6 +492,9 @@ def main():
     if args.trajectory is None:
         parser.error("trajectory path is required (unless using --list-tasks)")
     
+    if args.incremental and not args.output:
+        parser.error("--incremental requires --output (the previous results file)")
+    
     input_path = Path(args.trajectory)
     
     if not input_path.exists():
@@ -153,7 +502,16 @@ def main():
         sys.exit(1)
     
     if input_path.is_file():
-        result = evaluate_trajectory(str(input_path), args.task_name)
+        with PROFILER.trajectory() as profiled:
+            result = evaluate_trajectory(
+                str(input_path), args.task_name, streaming=args.streaming, parse_cache_dir=args.parse_cache,
+                indexed=args.indexed
+            )
+            report = None
+            if args.report and 'error' not in result:
+                report = result_report(result, args.report_format)
+        if profiled.profile is not None:
+            result['profile'] = profiled.profile
         
         if 'error' in result:
             print(f"Error: {result['error']}")
@@ -168,17 +526,35 @@ def main():
         print(f"Path Similarity: {result['scores']['path_similarity']:.3f}")
         print(f"Redundancy Penalty: {result['scores']['redundancy_penalty']:.3f}")
         print(f"Path Length Ratio: {result['scores']['path_length_ratio']:.2f}x")
+        if result['scores'].get('wall_time') is not None:
+            print(f"Wall Time: {result['scores']['wall_time']:.1f}s")
+        if result['scores'].get('llm_calls'):
+            print(f"Tokens: {result['scores']['total_tokens']} ({result['scores']['llm_calls']} LLM calls)")
         
-        if args.report:
-            print("\n" + result['diagnostic_report'])
+        if report is not None:
+            if args.report_file:
+                Path(args.report_file).write_text(report)
+                print(f"\nReport saved to {args.report_file}")
+            else:
+                print("\n" + report)
         
-        if args.output:
+        if args.output and is_store_path(args.output):
+            with ResultsStore(args.output) as store:
+                store.write(result, str(Path(args.trajectory).resolve()))
+            print(f"\nResults saved to {args.output}")
+        elif args.output:
             with open(args.output, 'w') as f:
                 json.dump(result, f, indent=2)
             print(f"\nResults saved to {args.output}")
+        
+        if PROFILER.enabled:
+            report_profile([result.get('profile')], args.profile_output)
     
     elif input_path.is_dir():
-        results = evaluate_multiple_trajectories(str(input_path), args.output)
+        results = evaluate_multiple_trajectories(
+            str(input_path), args.output, streaming=args.streaming, workers=args.workers,
+            parse_cache_dir=args.parse_cache, incremental=args.incremental, indexed=args.indexed
+        )
         
         print("\n" + "=" * 60)
         print("BATCH EVALUATION SUMMARY")
@@ -188,6 +564,9 @@ def main():
                 print(f"{task_name}: ERROR - {result['error']}")
             else:
                 print(f"{task_name}: {result['scores']['efficiency_score']:.2f}/100")
+        
+        if PROFILER.enabled:
+            report_profile([result.get('profile') for result in results.values()], args.profile_output)
     
     else:
         print(f"Error: Path is neither a file nor directory: {args.trajectory}")
@@ -1,125 +1,215 @@
 """
-Programmatic definitions of Golden Paths.
+Golden Path registry.
 
-We define each Golden Path as a list of standardized action strings
-that match the output format of the parser.
+Each Golden Path is a list of standardized action strings that match the
+output format of the parser. Paths are stored one task per JSON file:
+
+    golden_path_registry/<task-name>.json
+    {
+      "task_name": "pm-send-hello-message",
+      "goal": "Send a message to general channel and notify active users.",
+      "golden_path": ["goto_url(url='...')", "..."],
+      "variants": [["goto_url(url='...')", "..."]],
+      "budget": {"wall_time": 60, "total_tokens": 60000}
+    }
+
+The optional variants list other valid ways to complete the task; an agent
+is scored against whichever of golden_path and the variants it matches best
+(see scoring.calculate_best_variant_score). The optional budget caps the
+wall-clock seconds and LLM tokens a run of the task should take; see
+RUNTIME_BUDGETS.
+
+Only the tasks that are actually requested are read, and each is parsed
+once per process. Extra registry directories (e.g. private tasks) can be
+listed in the GOLDEN_PATH_DIRS environment variable, separated by
+os.pathsep; a task defined in a later directory overrides earlier ones.
+
+scoring (and with it the similarity and report modules) is only imported
+once a path is compiled, so listing tasks or reading raw entries stays
+cheap.
 """
 
-# Task 1: pm-schedule-meeting-1
-GOLDEN_PATH_PM_SCHEDULE_MEETING_1 = [
-    "goto_url(url='http://the-agent-company.com:3000/home')",
-    "send_message(recipient='Emily Zhou', content='...')",
-    "send_message(recipient='Liu Qiang', content='...')",
-    "write_file(path='/workspace/conclusion.txt')",
-    "finish()"
-]
-
-# Task 2: sde-run-janusgraph
-GOLDEN_PATH_SDE_RUN_JANUSGRAPH = [
-    "execute_bash(command='cd /workspace && git clone http://the-agent-company.com:8929/root/janusgraph')",
-    "execute_bash(command='cd /workspace/janusgraph && mvn clean install -DskipTests')",
-    "execute_bash(command='cd /workspace/janusgraph && bin/janusgraph.sh start')",
-    "finish()"
-]
-
-# Task 3: hr-new-grad-job-description-3
-GOLDEN_PATH_HR_NEW_GRAD_JOB_DESCRIPTION_3 = [
-    "read_file(path='/instruction/task.md')",
-    "goto_url(url='http://the-agent-company.com:3000/home')",
-    "send_message(recipient='Zhang Wei', content='...')",
-    "send_message(recipient='Li Ming', content='...')",
-    "read_file(path='/instruction/template.md')",
-    "goto_url(url='http://the-agent-company.com:8092/')",
-    "write_file(path='/Documents/job_description.md')",
-    "write_file(path='/workspace/link.txt')",
-    "finish()"
-]
-
-# Task 4: sde-create-new-repo
-GOLDEN_PATH_SDE_CREATE_NEW_REPO = [
-    "goto_url(url='http://the-agent-company.com:3000/')",
-    "send_message(recipient='Zhang Wei', content='...')",
-    "execute_bash(command='[create new GitLab repository via GitLab API or git commands]')",
-    "write_file(path='/workspace/new-storage-project/README.md')",
-    "finish()"
-]
-
-# Task 5: pm-send-hello-message
-GOLDEN_PATH_PM_SEND_HELLO_MESSAGE = [
-    "goto_url(url='http://the-agent-company.com:3000/home')",
-    "goto_url(url='http://the-agent-company.com:3000/channel/general')",
-    "send_message(content='[Hi and @active_users]')",
-    "finish()"
-]
-
-# Task 6: finance-qualified-bill-ask-for-reimburse
-GOLDEN_PATH_FINANCE_QUALIFIED_BILL = [
-    "goto_url(url='http://the-agent-company.com:8092/')",
-    "read_file(path='/Documents/Financials/receipt.jpg')",
-    "read_file(path='/Documents/Administrative Specialist/Reimbursement Policy.pdf')",
-    "goto_url(url='http://the-agent-company.com:3000/')",
-    "send_message(recipient='Mike Chen', content='...')",
-    "finish()"
-]
-
-# Task 7: ds-janusgraph-exercise
-GOLDEN_PATH_DS_JANUSGRAPH_EXERCISE = [
-    "execute_bash(command='cd /workspace && git clone http://the-agent-company.com:8929/root/janusgraph')",
-    "execute_bash(command='cd /workspace/janusgraph && bin/janusgraph.sh start')",
-    "read_file(path='/workspace/employee_diagram.jpg')",
-    "write_file(path='/workspace/create_org_chart.py')",
-    "execute_bash(command='cd /workspace && python create_org_chart.py')",
-    "finish()"
-]
-
-# Task 8: ml-generate-gradcam
-GOLDEN_PATH_ML_GENERATE_GRADCAM = [
-    "goto_url(url='http://the-agent-company.com:8092/')",
-    "read_file(path='/Documents/Research/test_image.jpg')",
-    "write_file(path='/workspace/gradcam_script.py')",
-    "execute_bash(command='cd /workspace && python gradcam_script.py')",
-    "write_file(path='/workspace/gradcam_explanation.txt')",
-    "finish()"
-]
-
-# Task 9: research-answer-questions-on-paper
-GOLDEN_PATH_RESEARCH_ANSWER_QUESTIONS = [
-    "goto_url(url='http://the-agent-company.com:8092/')",
-    "read_file(path='/Documents/Research/Noise Simulation/noise_simulation_paper.pdf')",
-    "read_file(path='/Documents/Research/Noise Simulation/noise_simulation_analysis_sheet.txt')",
-    "write_file(path='/workspace/noise_simulation_analysis_sheet.txt')",
-    "finish()"
-]
-
-# Task 10: qa-escalate-emergency
-GOLDEN_PATH_QA_ESCALATE_EMERGENCY = [
-    "goto_url(url='http://the-agent-company.com:3000/')",
-    "send_message(recipient='Zhang Wei', content='...')",
-    "send_message(recipient='Sarah Johnson', content='...')",
-    "finish()"
-]
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
 
-# Map task names to their golden paths
-GOLDEN_PATHS = {
-    'pm-schedule-meeting-1': GOLDEN_PATH_PM_SCHEDULE_MEETING_1,
-    'sde-run-janusgraph': GOLDEN_PATH_SDE_RUN_JANUSGRAPH,
-    'hr-new-grad-job-description-3': GOLDEN_PATH_HR_NEW_GRAD_JOB_DESCRIPTION_3,
-    'sde-create-new-repo': GOLDEN_PATH_SDE_CREATE_NEW_REPO,
-    'pm-send-hello-message': GOLDEN_PATH_PM_SEND_HELLO_MESSAGE,
-    'finance-qualified-bill-ask-for-reimburse': GOLDEN_PATH_FINANCE_QUALIFIED_BILL,
-    'ds-janusgraph-exercise': GOLDEN_PATH_DS_JANUSGRAPH_EXERCISE,
-    'ml-generate-gradcam': GOLDEN_PATH_ML_GENERATE_GRADCAM,
-    'research-answer-questions-on-paper': GOLDEN_PATH_RESEARCH_ANSWER_QUESTIONS,
-    'qa-escalate-emergency': GOLDEN_PATH_QA_ESCALATE_EMERGENCY,
+from alignment import CompiledGoldenPath, GoldenPathTrie
+
+DEFAULT_REGISTRY_DIR = Path(__file__).resolve().parent / 'golden_path_registry'
+
+# Task budget keys (RuntimeStats fields) and the score component each drives
+RUNTIME_BUDGETS = {
+    'wall_time': 'time_efficiency',
+    'total_tokens': 'token_efficiency',
 }
 
+# Extra registry directories, searched after the bundled one
+REGISTRY_DIRS_ENV = 'GOLDEN_PATH_DIRS'
+
+
+class GoldenPathRegistry(Mapping):
+    """
+    Lazily loaded, file-backed mapping of task name -> golden path.
+
+    Args:
+        directories: Registry directories; later ones take precedence
+    """
+
+    def __init__(self, directories: Sequence[Path]):
+        self.directories = [Path(directory) for directory in directories]
+        self._entries: Dict[str, Optional[Dict]] = {}
+        self._compiled: Dict[str, CompiledGoldenPath] = {}
+        self._variants: Dict[str, GoldenPathTrie] = {}
+        self._task_names: Optional[List[str]] = None
+
+    def add_directories(self, directories: Sequence[Path]) -> None:
+        """Append registry directories and drop everything cached so far."""
+        self.directories.extend(Path(directory) for directory in directories)
+        self._entries.clear()
+        self._compiled.clear()
+        self._variants.clear()
+        self._task_names = None
+
+    def _task_file(self, task_name: str) -> Optional[Path]:
+        if not task_name or Path(task_name).name != task_name:
+            return None
+        for directory in reversed(self.directories):
+            task_file = directory / f'{task_name}.json'
+            if task_file.is_file():
+                return task_file
+        return None
+
+    def entry(self, task_name: str) -> Optional[Dict]:
+        """Full registry entry for a task (golden_path, goal, ...), or None."""
+        if task_name not in self._entries:
+            task_file = self._task_file(task_name)
+            entry = None
+            if task_file is not None:
+                with open(task_file, 'r') as f:
+                    entry = json.load(f)
+                if not isinstance(entry.get('golden_path'), list):
+                    raise ValueError(f"{task_file}: 'golden_path' must be a list of actions")
+                variants = entry.get('variants')
+                if variants is not None and (
+                    not isinstance(variants, list)
+                    or not all(isinstance(variant, list) and variant for variant in variants)
+                ):
+                    raise ValueError(f"{task_file}: 'variants' must be a list of non-empty action lists")
+                budget = entry.get('budget')
+                if budget is not None and (
+                    not isinstance(budget, dict)
+                    or set(budget) - set(RUNTIME_BUDGETS)
+                    or not all(isinstance(value, (int, float)) and value > 0 for value in budget.values())
+                ):
+                    raise ValueError(
+                        f"{task_file}: 'budget' must map {', '.join(RUNTIME_BUDGETS)} to positive numbers"
+                    )
+            self._entries[task_name] = entry
+        return self._entries[task_name]
+
+    def compiled(self, task_name: str) -> Optional[CompiledGoldenPath]:
+        """Golden path of a task with normalized forms precomputed, or None."""
+        compiled = self._compiled.get(task_name)
+        if compiled is None:
+            entry = self.entry(task_name)
+            if entry is None or not entry['golden_path']:
+                return None
+            from scoring import compile_golden_path
+            compiled = compile_golden_path(entry['golden_path'])
+            self._compiled[task_name] = compiled
+        return compiled
+
+    def variants(self, task_name: str) -> Optional[GoldenPathTrie]:
+        """
+        Trie of a task's golden path (variant 0) and its alternative
+        variants, or None if the task has no golden path.
+        """
+        trie = self._variants.get(task_name)
+        if trie is None:
+            compiled = self.compiled(task_name)
+            if compiled is None:
+                return None
+            from scoring import compile_golden_variants
+            trie = compile_golden_variants([compiled] + self.entry(task_name).get('variants', []))
+            self._variants[task_name] = trie
+        return trie
+
+    def task_names(self) -> List[str]:
+        """All task names, from file names only (entries are not parsed)."""
+        if self._task_names is None:
+            names = set()
+            for directory in self.directories:
+                if directory.is_dir():
+                    names.update(task_file.stem for task_file in directory.glob('*.json'))
+            self._task_names = sorted(names)
+        return self._task_names
+
+    def __getitem__(self, task_name: str) -> List[str]:
+        entry = self.entry(task_name)
+        if entry is None:
+            raise KeyError(task_name)
+        return entry['golden_path']
+
+    def __contains__(self, task_name) -> bool:
+        return self._task_file(task_name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.task_names())
+
+    def __len__(self) -> int:
+        return len(self.task_names())
+
+
+def registry_dirs() -> List[Path]:
+    """The bundled registry directory followed by any GOLDEN_PATH_DIRS."""
+    extra = os.environ.get(REGISTRY_DIRS_ENV, '')
+    return [DEFAULT_REGISTRY_DIR] + [Path(d) for d in extra.split(os.pathsep) if d]
+
+
+# Map task names to their golden paths
+GOLDEN_PATHS = GoldenPathRegistry(registry_dirs())
+
+def use_registry_dirs(directories: Sequence[str]) -> None:
+    """
+    Add registry directories (searched after, and overriding, the current
+    ones). They are also exported through GOLDEN_PATH_DIRS so worker
+    processes started afterwards see the same registry.
+    """
+    directories = [str(Path(directory).resolve()) for directory in directories]
+    extra = [d for d in os.environ.get(REGISTRY_DIRS_ENV, '').split(os.pathsep) if d]
+    os.environ[REGISTRY_DIRS_ENV] = os.pathsep.join(extra + directories)
+    GOLDEN_PATHS.add_directories(directories)
+
 def get_golden_path(task_name: str) -> list:
     """
     Get the golden path for a given task name.
     """
     return GOLDEN_PATHS.get(task_name, [])
 
+def get_compiled_golden_path(task_name: str) -> Optional[CompiledGoldenPath]:
+    """
+    Get the golden path for a task with its normalized forms precomputed,
+    or None if the task has no golden path.
+    """
+    return GOLDEN_PATHS.compiled(task_name)
+
+def get_golden_variants(task_name: str) -> Optional[GoldenPathTrie]:
+    """
+    Get every golden path variant of a task as a GoldenPathTrie (the
+    primary golden path first), or None if the task has no golden path.
+    """
+    return GOLDEN_PATHS.variants(task_name)
+
+def get_task_budget(task_name: str) -> Optional[Dict[str, float]]:
+    """
+    Get the runtime budget of a task (wall_time seconds, total_tokens),
+    or None if the task defines none.
+    """
+    entry = GOLDEN_PATHS.entry(task_name)
+    return entry.get('budget') if entry else None
+
 def get_all_task_names() -> list:
     """Get a list of all task names."""
-    return list(GOLDEN_PATHS.keys())
-
+    return list(GOLDEN_PATHS.task_names())
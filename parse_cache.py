@@ -0,0 +1,280 @@
+"""
+On-disk cache of parsed trajectory action lists and runtime statistics
+(each Action and the RuntimeStats stored as JSON arrays of their fields).
+
+Entries are keyed by the trajectory's content hash plus a parser version
+derived from the source of parser.py (and trajectory_index.py), so any change to the parsing rules
+invalidates the cache automatically. A per-path stat record (size, mtime)
+avoids re-hashing files that have not been touched. The cache (entries
+and stat records) is bounded in total size and evicts least recently used
+files first. Each ParseCache keeps a running total of what it wrote and
+only rescans the directory when that total passes max_bytes, or every
+RESCAN_INTERVAL writes to pick up files written by other processes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import actions as trajectory_actions
+import parser as trajectory_parser
+import trajectory_index
+from actions import Action
+from parser import RuntimeStats, parse_trajectory
+from profiling import PROFILER
+
+DEFAULT_CACHE_DIR = Path('.parse_cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Bump when the layout of cache entries changes
+CACHE_FORMAT_VERSION = 3
+
+# Eviction trims the cache to this fraction of max_bytes, so the next few
+# writes do not trigger another eviction
+EVICT_LOW_WATER = 0.9
+
+# Writes between full rescans of the cache directory
+RESCAN_INTERVAL = 64
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def _compute_parser_version() -> str:
+    digest = hashlib.sha256()
+    # Entries are stored as Action fields, so actions.py is part of the layout
+    for module in (trajectory_actions, trajectory_parser, trajectory_index):
+        digest.update(Path(module.__file__).read_bytes())
+    digest.update(str(CACHE_FORMAT_VERSION).encode())
+    return digest.hexdigest()[:16]
+
+
+PARSER_VERSION = _compute_parser_version()
+
+
+def file_content_hash(path: Path) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f, PROFILER.stage('hash') as stage:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            stage.add_bytes(len(chunk))
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path: Path, payload) -> int:
+    # Write to a temp file and rename so concurrent readers (e.g. evaluator
+    # worker processes) never see a partial entry. Returns the file size.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        return size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ParseCache:
+    """
+    Size-bounded on-disk cache of parse_trajectory results.
+
+    Args:
+        cache_dir: Directory holding the cache
+        max_bytes: Upper bound on the total size of cache entries and stat
+            records
+        parser_version: Version string mixed into every key
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        parser_version: str = PARSER_VERSION
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+        self.hits = 0
+        self.misses = 0
+        # Bytes in the cache as of the last scan, plus what was written since
+        self._total_bytes: Optional[int] = None
+        self._writes_since_scan = 0
+
+    @property
+    def _entries_dir(self) -> Path:
+        return self.cache_dir / 'actions'
+
+    @property
+    def _stats_dir(self) -> Path:
+        return self.cache_dir / 'stat'
+
+    def content_hash(self, trajectory_path: Path) -> str:
+        """
+        Content hash of a trajectory, reusing the stored hash when the
+        file's size and mtime are unchanged.
+        """
+        trajectory_path = Path(trajectory_path)
+        stat = trajectory_path.stat()
+        path_key = hashlib.sha1(str(trajectory_path.resolve()).encode()).hexdigest()
+        stat_file = self._stats_dir / f'{path_key}.json'
+
+        try:
+            record = json.loads(stat_file.read_text())
+            if record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+                self._touch(stat_file)
+                return record['sha256']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        content_hash = file_content_hash(trajectory_path)
+        self._written(_write_json_atomic(stat_file, {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': content_hash
+        }))
+        return content_hash
+
+    def entry_path(self, trajectory_path: Path) -> Path:
+        """Path of the cache entry for a trajectory's current contents."""
+        content_hash = self.content_hash(trajectory_path)
+        return self._entries_dir / f'{content_hash}-{self.parser_version}.json'
+
+    def get(self, trajectory_path: Path) -> Optional[Tuple[List[Action], RuntimeStats]]:
+        """Return cached (actions, runtime stats) for a trajectory, or None on a miss."""
+        entry = self.entry_path(trajectory_path)
+        try:
+            payload = json.loads(entry.read_text())
+            actions = [Action(*fields) for fields in payload['actions']]
+            runtime = RuntimeStats(*payload['runtime'])
+        except (OSError, ValueError, TypeError, KeyError):
+            self.misses += 1
+            return None
+        self._touch(entry)
+        self.hits += 1
+        return actions, runtime
+
+    def put(self, trajectory_path: Path, actions: List[Action], runtime: RuntimeStats) -> None:
+        """Store the parsed actions and runtime stats for a trajectory and enforce the size bound."""
+        self._written(_write_json_atomic(
+            self.entry_path(trajectory_path), {'actions': actions, 'runtime': runtime}
+        ))
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # Mark a file as used so eviction is least-recently-used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _written(self, size: int) -> None:
+        # Account for a new file; rescan (and evict) only when the running
+        # total passes max_bytes or after RESCAN_INTERVAL writes
+        self._writes_since_scan += 1
+        if self._total_bytes is not None:
+            self._total_bytes += size
+        if (self._total_bytes is None or self._total_bytes > self.max_bytes
+                or self._writes_since_scan >= RESCAN_INTERVAL):
+            self.evict()
+
+    def parse(
+        self,
+        trajectory_path,
+        streaming: bool = False,
+        indexed: bool = False,
+        with_runtime: bool = False
+    ):
+        """parse_trajectory with caching (runtime stats are always cached)."""
+        with PROFILER.stage('parse.cache'):
+            cached = self.get(trajectory_path)
+        if cached is None:
+            cached = parse_trajectory(
+                str(trajectory_path), streaming=streaming, indexed=indexed, with_runtime=True
+            )
+            with PROFILER.stage('parse.cache'):
+                self.put(trajectory_path, *cached)
+        return cached if with_runtime else cached[0]
+
+    def evict(self) -> int:
+        """
+        Scan the cache and, if it exceeds max_bytes, delete least recently
+        used entries and stat records until it fits in
+        EVICT_LOW_WATER * max_bytes.
+
+        Returns:
+            Number of files removed
+        """
+        entries = []
+        total = 0
+        for directory in (self._entries_dir, self._stats_dir):
+            for entry in directory.glob('*.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry))
+                total += stat.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_LOW_WATER
+            for _, size, entry in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        self._total_bytes = total
+        self._writes_since_scan = 0
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cache entry and stat record."""
+        for directory in (self._entries_dir, self._stats_dir):
+            for entry in directory.glob('*.json'):
+                entry.unlink()
+        self._total_bytes = None
+
+
+# One ParseCache per directory and process, so its running size total
+# carries over between parse_trajectory_cached calls
+_PARSE_CACHES: Dict[Path, ParseCache] = {}
+
+
+def get_parse_cache(cache_dir) -> ParseCache:
+    """The shared ParseCache of a cache directory."""
+    cache_dir = Path(cache_dir)
+    cache = _PARSE_CACHES.get(cache_dir)
+    if cache is None:
+        cache = _PARSE_CACHES[cache_dir] = ParseCache(cache_dir)
+    return cache
+
+
+def parse_trajectory_cached(
+    trajectory_path,
+    cache_dir=None,
+    streaming: bool = False,
+    indexed: bool = False,
+    with_runtime: bool = False
+):
+    """
+    Parse a trajectory, going through the on-disk cache when cache_dir is set.
+    Returns the actions, or (actions, RuntimeStats) if with_runtime is set.
+    """
+    if cache_dir is None:
+        return parse_trajectory(
+            str(trajectory_path), streaming=streaming, indexed=indexed, with_runtime=with_runtime
+        )
+    return get_parse_cache(cache_dir).parse(
+        trajectory_path, streaming=streaming, indexed=indexed, with_runtime=with_runtime
+    )
@@ -1,134 +1,592 @@
+import gzip
+import io
 import json
+import os
 import re
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
 
+from actions import Action
+from profiling import PROFILER
+from trajectory_index import TrajectoryReader
 
-def parse_trajectory(json_log_path):
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Number of raw events after a fill() that are searched for a separate click()
+LOOK_AHEAD_EVENTS = 4
+
+# Read size used by the streaming parser
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Skipped observation events are yielded as {'observation': None} plus
+# their timestamp. The stand-in keeps event positions intact for the
+# look-ahead window without decoding the observation payload.
+_TIMESTAMP_RE = re.compile(r'"timestamp"\s*:\s*"([^"\\]*)"')
+
+_STRUCTURAL_RE = re.compile(r'["{}\[\]]')
+_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_NON_WHITESPACE_RE = re.compile(r'\S')
+
+# Compressed trajectory logs (<name>.json<suffix>) are decompressed on the fly
+COMPRESSION_SUFFIXES = ('.gz', '.zst')
+TRAJECTORY_SUFFIXES = ('.json',) + tuple(f'.json{suffix}' for suffix in COMPRESSION_SUFFIXES)
+
+
+def compression_suffix(path):
+    """The compression suffix of a trajectory path ('.gz', '.zst'), or ''."""
+    name = str(path)
+    return next((suffix for suffix in COMPRESSION_SUFFIXES if name.endswith(f'.json{suffix}')), '')
+
+
+def strip_compression_suffix(name):
+    """'traj_x.json.gz' -> 'traj_x.json'; other names are returned unchanged."""
+    suffix = compression_suffix(name)
+    return name[:-len(suffix)] if suffix else name
+
+
+def find_trajectory_files(directory, pattern='traj_*'):
     """
-    Parse a trajectory JSON log file and extract standardized major actions.
+    Trajectory logs in a directory whose name matches pattern plus one of
+    TRAJECTORY_SUFFIXES, sorted by name.
+    """
+    directory = Path(directory)
+    files = set()
+    for suffix in TRAJECTORY_SUFFIXES:
+        files.update(directory.glob(f'{pattern}{suffix}'))
+    return sorted(files)
+
+
+def open_trajectory(json_log_path):
+    """
+    Open a trajectory log for reading as text, decompressing .json.gz and
+    .json.zst files as they are read (zstd needs the zstandard package).
+    """
+    suffix = compression_suffix(json_log_path)
+    if suffix == '.gz':
+        return gzip.open(json_log_path, 'rt')
+    if suffix == '.zst':
+        if zstandard is None:
+            raise ImportError(
+                f"Reading {json_log_path} requires the zstandard package (pip install zstandard)"
+            )
+        raw = zstandard.ZstdDecompressor().stream_reader(open(json_log_path, 'rb'), closefd=True)
+        return io.TextIOWrapper(raw)
+    return open(json_log_path, 'r')
+
+
+def iter_trajectory_events(json_log_path, skip_observations=True, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Incrementally iterate over the events of a trajectory JSON log file
+    (optionally compressed, see open_trajectory).
+    
+    The file is read in chunks and each top-level event object is decoded
+    on its own, so memory use is bounded by the largest kept event rather
+    than by the file size. Observation events (and their ``extras`` such as
+    ``set_of_marks`` screenshots) are scanned past without being decoded.
     
     Args:
         json_log_path: Path to the JSON log file
+        skip_observations: Yield a lightweight stub (holding only the
+            timestamp) instead of decoding observation events
+        chunk_size: Number of characters read per chunk
         
-    Returns:
-        List of standardized action strings
+    Yields:
+        Event dictionaries in file order
     """
-    with open(json_log_path, 'r') as f:
-        data = json.load(f)
-    
-    actions = []
-    
-    # Convert to list with indices for look-ahead capability
-    data_list = list(data)
-    
-    for idx, obj in enumerate(data_list):
-        # Filter: Only process objects where source is "agent" and action exists
-        # Skip observations (objects with observation key)
-        if obj.get('source') != 'agent':
-            continue
-        if 'observation' in obj:
-            continue
-        if 'action' not in obj:
-            continue
+    with open_trajectory(json_log_path) as f:
+        buf = ''
+        pos = 0
+        eof = False
         
-        action_type = obj.get('action')
-        args = obj.get('args', {})
+        def more(keep_from):
+            # Drop consumed text and append the next chunk. Returns the
+            # offset that was removed from the front of the buffer.
+            nonlocal buf, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[keep_from:] + chunk
+            return keep_from
         
-        # Handle different action types
-        if action_type == 'run':
-            # execute_bash: extract command from args['command']
-            if 'command' in args:
-                cmd = args['command']
-                actions.append(f"execute_bash(command='{cmd}')")
+        def next_char():
+            nonlocal pos
+            while True:
+                m = _NON_WHITESPACE_RE.search(buf, pos)
+                if m:
+                    pos = m.start()
+                    return buf[pos]
+                if eof:
+                    return ''
+                pos = len(buf)
+                pos -= more(pos)
         
-        elif action_type == 'run_ipython':
-            # read_file or write_file: parse args['code'] to find file_editor calls
-            if 'code' in args:
-                code = args['code']
-                # Look for file_editor(**{'command': '...', 'path': '...'})
-                # Pattern: file_editor(**{'command': 'view', 'path': '...'})
-                # or file_editor(**{'command': 'create', 'path': '...'})
-                # or file_editor(**{'command': 'insert', 'path': '...'})
-                # or file_editor(**{'command': 'str_replace', 'path': '...'})
-                
-                # Extract path using regex
-                path_match = re.search(r"'path':\s*'([^']+)'", code)
-                if path_match:
-                    path = path_match.group(1)
-                    
-                    # Check for command type
-                    command_match = re.search(r"'command':\s*'([^']+)'", code)
-                    if command_match:
-                        command = command_match.group(1)
-                        
-                        if command == 'view':
-                            actions.append(f"read_file(path='{path}')")
-                        elif command in ['create', 'insert', 'str_replace']:
-                            actions.append(f"write_file(path='{path}')")
+        def key_follows():
+            # A top-level string is a key only if a ':' follows (as in
+            # trajectory_index.scan_events); otherwise it is a value such as
+            # "message": "observation". The event being read stays buffered.
+            nonlocal pos, start, key_start
+            while True:
+                m = _NON_WHITESPACE_RE.search(buf, pos)
+                if m:
+                    return buf[m.start()] == ':'
+                if eof:
+                    return False
+                removed = more(start)
+                pos -= removed
+                start -= removed
+                key_start -= removed
         
-        elif action_type == 'browse_interactive':
-            # goto_url or send_message: parse args['browser_actions']
-            if 'browser_actions' in args:
-                browser_actions = args['browser_actions']
-                
-                # Check for goto('...')
-                goto_match = re.search(r"goto\(['\"]([^'\"]+)['\"]\)", browser_actions)
-                if goto_match:
-                    url = goto_match.group(1)
-                    actions.append(f"goto_url(url='{url}')")
+        if next_char() != '[':
+            raise ValueError(f"Trajectory log is not a JSON array of events: {json_log_path}")
+        pos += 1
+        
+        while True:
+            c = next_char()
+            if c == ',':
+                pos += 1
+                continue
+            if c == ']':
+                return
+            if c != '{':
+                raise ValueError(f"Unexpected {c!r} in trajectory log: {json_log_path}")
+            
+            start = pos
+            keep = True
+            depth = 0
+            while True:
+                m = _STRUCTURAL_RE.search(buf, pos)
+                if not m:
+                    if eof:
+                        raise ValueError(f"Truncated trajectory log: {json_log_path}")
+                    pos = len(buf)
+                    removed = more(start if keep else pos)
+                    pos -= removed
+                    start -= removed
                     continue
+                token = m.group()
+                pos = m.end()
                 
-                # Check for send_message: fill('...', '...') followed by press(..., 'Enter') or click(...)
-                # We need to find fill('...', '...') and extract the second argument (message content)
-                # Then check if it's followed by press(..., 'Enter') or click(...)
-                # Improved regex to handle messages with quotes and special characters
-                # Pattern: fill(quote1...quote1, quote2...quote2) where quotes can be ' or "
-                # Use non-greedy matching with backreferences to handle the closing quote properly
-                fill_match = re.search(r"fill\((['\"])(.*?)\1\s*,\s*(['\"])(.*?)\3\)", browser_actions, re.DOTALL)
-                if fill_match:
-                    # Check if followed by press(..., 'Enter') or click(...) in the same action
-                    has_press_or_click = re.search(r"(press\([^)]*['\"]Enter['\"]\)|click\([^)]*\))", browser_actions)
-                    
-                    # Also check if the next agent action has a click (for cases where fill and click are separate)
-                    if not has_press_or_click:
-                        # Look ahead in the data list to find the next agent action
-                        for look_ahead_idx in range(idx + 1, min(idx + 5, len(data_list))):
-                            next_obj = data_list[look_ahead_idx]
-                            if (next_obj.get('source') == 'agent' 
-                                and 'observation' not in next_obj
-                                and 'action' in next_obj):
-                                if next_obj.get('action') == 'browse_interactive':
-                                    next_ba = next_obj.get('args', {}).get('browser_actions', '')
-                                    if 'click' in next_ba and 'fill' not in next_ba:
-                                        has_press_or_click = True
-                                        break
-                                else:
-                                    # If we hit a non-browse_interactive action, stop looking
-                                    break
+                if token == '"':
+                    key_start = pos
+                    while True:
+                        pos = _STRING_BODY_RE.match(buf, pos).end()
+                        if pos < len(buf) and buf[pos] == '"':
+                            break
+                        # Closing quote (or the character after a backslash)
+                        # is in the next chunk
+                        if eof:
+                            raise ValueError(f"Truncated trajectory log: {json_log_path}")
+                        removed = more(start if keep else pos)
+                        pos -= removed
+                        start -= removed
+                        key_start -= removed
+                    pos += 1
+                    if (skip_observations and keep and depth == 1
+                            and buf[key_start:pos - 1] == 'observation'
+                            and key_follows()):
+                        keep = False
+                        # OpenHands writes the timestamp before the observation key
+                        timestamp = _TIMESTAMP_RE.search(buf, start, key_start)
+                        stub = {'observation': None}
+                        if timestamp:
+                            stub['timestamp'] = timestamp.group(1)
+                elif token in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        break
+            
+            yield json.loads(buf[start:pos]) if keep else stub
+
+
+def _is_agent_action(obj):
+    return (obj.get('source') == 'agent'
+            and 'observation' not in obj
+            and 'action' in obj)
+
+
+class BrowserCall(NamedTuple):
+    """One call of a BrowserGym action script, e.g. fill('12', 'Hi')."""
+    name: str
+    # String literal arguments as written (escape sequences are kept)
+    args: Tuple[str, ...]
+
+
+# One token per match: a string literal, a call's name and opening
+# parenthesis, a comment, or a bare parenthesis; anything else is skipped
+_BROWSER_TOKEN_RE = re.compile(r"""
+    '([^'\\]*(?:\\.[^'\\]*)*)'
+  | "([^"\\]*(?:\\.[^"\\]*)*)"
+  | ([A-Za-z_]\w*)\s*\(
+  | (\#[^\n]*)
+  | ([()])
+""", re.VERBOSE | re.DOTALL)
+
+# Calls that submit a filled-in message
+_CLICK_CALLS = frozenset({'click', 'dblclick'})
+
+_EDITOR_PATH_RE = re.compile(r"'path':\s*'([^']+)'")
+_EDITOR_COMMAND_RE = re.compile(r"'command':\s*'([^']+)'")
+_GREETING_RE = re.compile(r"Hello\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)")
+
+
+@lru_cache(maxsize=4096)
+def tokenize_browser_actions(script):
+    """
+    Split a BrowserGym action script into its top-level calls in one pass.
+    
+    Args:
+        script: browser_actions string, e.g. "fill('12', 'Hi')\\nclick('13')"
+        
+    Returns:
+        Tuple of BrowserCall in script order; keyword and non-string
+        arguments are skipped, as are comments and unterminated calls.
+        Results are cached, since short scripts like click('12') recur.
+    """
+    calls = []
+    name = None
+    args = []
+    depth = 0
+    for single, double, call_name, comment, paren in _BROWSER_TOKEN_RE.findall(script):
+        if call_name:
+            if depth == 0:
+                name, args = call_name, []
+            depth += 1
+        elif paren == '(':
+            depth += 1
+        elif paren == ')':
+            if depth:
+                depth -= 1
+                if depth == 0 and name is not None:
+                    calls.append(BrowserCall(name, tuple(args)))
+                    name = None
+        elif comment:
+            continue
+        elif depth == 1 and name is not None:
+            # A string literal directly inside the call is one of its arguments
+            args.append(single or double)
+    return tuple(calls)
+
+
+def _browser_calls(obj):
+    # Tokenized script of a browse_interactive agent action, else ()
+    if _is_agent_action(obj) and obj.get('action') == 'browse_interactive':
+        return tokenize_browser_actions(obj.get('args', {}).get('browser_actions', ''))
+    return ()
+
+
+def _submits(call):
+    return call.name in _CLICK_CALLS or (call.name == 'press' and 'Enter' in call.args)
+
+
+def _fill_submitted(calls, index, following):
+    # A fill() is sent by a later click() or press(..., 'Enter') in the same
+    # script, or, for the script's last fill(), by a click in the next
+    # browser actions
+    for call in calls[index + 1:]:
+        if call.name == 'fill':
+            return False
+        if _submits(call):
+            return True
+    for next_obj, next_calls in following:
+        if _is_agent_action(next_obj):
+            if next_obj.get('action') != 'browse_interactive':
+                # If we hit a non-browse_interactive action, stop looking
+                return False
+            names = {call.name for call in next_calls}
+            if names & _CLICK_CALLS and 'fill' not in names:
+                return True
+    return False
+
+
+def _extract_actions(obj, calls, following):
+    """
+    Convert a single agent action event into standardized Actions.
+    
+    Args:
+        obj: Event dictionary
+        calls: tokenize_browser_actions() of the event's browser_actions
+            (empty for other events)
+        following: Up to LOOK_AHEAD_EVENTS (event, calls) pairs that come
+            after obj, used to pair a fill() with a click() in a later event
+        
+    Returns:
+        List of Actions (with the event's id and timestamp); empty if the
+        event is not a major action. A browser action script yields one
+        action per goto() and per submitted fill().
+    """
+    action_type = obj.get('action')
+    args = obj.get('args', {})
+    event = {'event_id': obj.get('id'), 'timestamp': obj.get('timestamp')}
+    
+    # Handle different action types
+    if action_type == 'run':
+        # execute_bash: extract command from args['command']
+        if 'command' in args:
+            return [Action('execute_bash', command=args['command'], **event)]
+    
+    elif action_type == 'run_ipython':
+        # read_file or write_file: parse args['code'] to find file_editor calls
+        if 'code' in args:
+            code = args['code']
+            # Look for file_editor(**{'command': '...', 'path': '...'})
+            # Pattern: file_editor(**{'command': 'view', 'path': '...'})
+            # or file_editor(**{'command': 'create', 'path': '...'})
+            # or file_editor(**{'command': 'insert', 'path': '...'})
+            # or file_editor(**{'command': 'str_replace', 'path': '...'})
+            
+            # Extract path using regex
+            path_match = _EDITOR_PATH_RE.search(code)
+            if path_match:
+                path = path_match.group(1)
+                
+                # Check for command type
+                command_match = _EDITOR_COMMAND_RE.search(code)
+                if command_match:
+                    command = command_match.group(1)
                     
-                    if has_press_or_click:
-                        message = fill_match.group(4)  # Fourth group is the message content (second argument)
-                        
-                        # Try to extract recipient from message content
-                        # Pattern: "Hello [Name]," or "Hello [Name]!" or "Hello [Name] "
-                        recipient = None
-                        hello_match = re.search(r"Hello\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", message)
-                        if hello_match:
-                            recipient = hello_match.group(1)
-                        
-                        # If recipient found, include it in the output
-                        if recipient:
-                            actions.append(f"send_message(recipient='{recipient}', content='{message}')")
-                        else:
-                            actions.append(f"send_message(content='{message}')")
+                    if command == 'view':
+                        return [Action('read_file', path=path, **event)]
+                    elif command in ['create', 'insert', 'str_replace']:
+                        return [Action('write_file', path=path, **event)]
+    
+    elif action_type == 'browse_interactive':
+        # goto_url for goto('...'); send_message for fill('...', '...')
+        # followed by press(..., 'Enter') or click(...)
+        actions = []
+        for index, call in enumerate(calls):
+            if call.name == 'goto' and call.args and call.args[0]:
+                actions.append(Action('goto_url', url=call.args[0], **event))
+            elif call.name == 'fill' and len(call.args) >= 2 and _fill_submitted(calls, index, following):
+                # The second argument is the message content
+                message = call.args[1]
+                # Try to extract recipient from message content
+                # Pattern: "Hello [Name]," or "Hello [Name]!" or "Hello [Name] "
+                greeting = _GREETING_RE.search(message)
+                # recipient stays None for channel messages
+                recipient = greeting.group(1) if greeting else None
+                actions.append(Action('send_message', recipient=recipient, content=message, **event))
+        return actions
+    
+    elif action_type == 'finish':
+        return [Action('finish', **event)]
+    
+    return []
+
+
+class RuntimeStats(NamedTuple):
+    """
+    Wall-clock time and LLM token usage of a trajectory.
+    
+    Time fields are in seconds and None when the events carry no
+    timestamps; token fields are 0 when they carry no usage metadata.
+    """
+    # First to last event
+    wall_time: Optional[float] = None
+    # Between consecutive agent actions
+    mean_step_latency: Optional[float] = None
+    max_step_latency: Optional[float] = None
+    # Between an agent action and its observation, summed over all steps
+    idle_time: Optional[float] = None
+    max_idle_gap: Optional[float] = None
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    # Mean increase in prompt tokens from one LLM call to the next
+    prompt_token_growth: float = 0.0
+
+
+class RuntimeTracker:
+    """
+    Accumulates RuntimeStats from trajectory events fed in file order.
+    
+    Timing comes from each event's 'timestamp', token usage from
+    tool_call_metadata.model_response.usage of agent actions. A response
+    that issued several tool calls is attached to each of them but only
+    counted once, by its id. Observation stubs only need their timestamp.
+    """
+    
+    def __init__(self):
+        self.first_time = None
+        self.last_time = None
+        self._last_action_time = None
+        self._pending_action_time = None
+        self._step_latencies = []
+        self._idle_gaps = []
+        self._response_ids = set()
+        self._prompt_tokens = []
+        self.completion_tokens = 0
+        self.total_tokens = 0
+    
+    def add(self, obj):
+        """Account for the next event."""
+        time = None
+        timestamp = obj.get('timestamp')
+        if timestamp:
+            try:
+                moment = datetime.fromisoformat(timestamp)
+            except (TypeError, ValueError):
+                pass
+            else:
+                # Compare as naive UTC (OpenHands writes naive timestamps)
+                if moment.tzinfo is not None:
+                    moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+                time = moment
+                if self.first_time is None:
+                    self.first_time = time
+                self.last_time = time
         
-        elif action_type == 'finish':
-            actions.append("finish()")
+        if _is_agent_action(obj):
+            if time is not None:
+                if self._last_action_time is not None:
+                    self._step_latencies.append((time - self._last_action_time).total_seconds())
+                self._last_action_time = time
+            self._pending_action_time = time
+            self._add_usage(obj.get('tool_call_metadata'))
+        elif 'observation' in obj and obj.get('source') != 'user':
+            # The first observation after an action is its result
+            if time is not None and self._pending_action_time is not None:
+                self._idle_gaps.append((time - self._pending_action_time).total_seconds())
+            self._pending_action_time = None
+    
+    def _add_usage(self, metadata):
+        response = metadata.get('model_response') if metadata else None
+        usage = response.get('usage') if response else None
+        if not usage:
+            return
+        response_id = response.get('id')
+        if response_id is not None:
+            if response_id in self._response_ids:
+                return
+            self._response_ids.add(response_id)
+        prompt_tokens = usage.get('prompt_tokens') or 0
+        completion_tokens = usage.get('completion_tokens') or 0
+        self._prompt_tokens.append(prompt_tokens)
+        self.completion_tokens += completion_tokens
+        self.total_tokens += usage.get('total_tokens') or prompt_tokens + completion_tokens
+    
+    def stats(self):
+        """RuntimeStats of the events seen so far."""
+        latencies = self._step_latencies
+        gaps = self._idle_gaps
+        prompt_tokens = self._prompt_tokens
+        return RuntimeStats(
+            wall_time=(self.last_time - self.first_time).total_seconds() if self.first_time is not None else None,
+            mean_step_latency=sum(latencies) / len(latencies) if latencies else None,
+            max_step_latency=max(latencies) if latencies else None,
+            idle_time=sum(gaps) if gaps else None,
+            max_idle_gap=max(gaps) if gaps else None,
+            llm_calls=len(prompt_tokens),
+            prompt_tokens=sum(prompt_tokens),
+            completion_tokens=self.completion_tokens,
+            total_tokens=self.total_tokens,
+            prompt_token_growth=(
+                (prompt_tokens[-1] - prompt_tokens[0]) / (len(prompt_tokens) - 1)
+                if len(prompt_tokens) > 1 else 0.0
+            ),
+        )
+
+
+def parse_events(events, runtime=None):
+    """
+    Extract standardized major actions from an iterable of trajectory events.
+    
+    Events are consumed one at a time. Only a bounded window of
+    LOOK_AHEAD_EVENTS following events is held for fill -> click detection,
+    and each event's browser actions are tokenized once as it enters it.
     
+    Args:
+        events: Iterable of event dictionaries in trajectory order
+        runtime: Optional RuntimeTracker that is fed every event
+        
+    Returns:
+        List of Actions
+    """
+    actions = []
+    window = deque()
+    
+    def flush_one():
+        obj, calls = window.popleft()
+        # Filter: Only process objects where source is "agent" and action exists
+        # Skip observations (objects with observation key)
+        if _is_agent_action(obj):
+            actions.extend(_extract_actions(obj, calls, window))
+    
+    for obj in events:
+        if runtime is not None:
+            runtime.add(obj)
+        window.append((obj, _browser_calls(obj)))
+        if len(window) > LOOK_AHEAD_EVENTS:
+            flush_one()
+    while window:
+        flush_one()
+    
+    return actions
+
+
+def _is_agent_action_kind(kind):
+    # kind is the (source, action, observation) of an indexed event
+    source, action, observation = kind
+    return source == 'agent' and action is not None and observation is None
+
+
+def parse_trajectory(json_log_path, streaming=False, indexed=False, with_runtime=False):
+    """
+    Parse a trajectory JSON log file and extract standardized major actions.
+    
+    Args:
+        json_log_path: Path to the JSON log file; .json.gz and .json.zst
+            files are decompressed while they are read
+        streaming: Read the file incrementally and skip observation payloads
+            instead of loading the whole document
+        indexed: Use the byte-offset index of the file's events (built once
+            and cached next to it, see trajectory_index.py) and decode only
+            agent action events; takes precedence over streaming. Compressed
+            files cannot be indexed and are parsed in streaming mode instead.
+        with_runtime: Also return the trajectory's RuntimeStats
+        
+    Returns:
+        List of Actions (render() gives the standardized action strings),
+        or (actions, RuntimeStats) if with_runtime is set
+    """
+    if indexed and compression_suffix(json_log_path):
+        indexed, streaming = False, True
+    
+    runtime = RuntimeTracker() if with_runtime else None
+    
+    if indexed:
+        with PROFILER.stage('parse.indexed') as stage, TrajectoryReader(json_log_path) as reader:
+            actions = parse_events(reader.iter_events(_is_agent_action_kind), runtime)
+            stage.add_bytes(reader.bytes_decoded)
+    elif streaming:
+        with PROFILER.stage('parse.streaming', os.path.getsize(json_log_path)):
+            actions = parse_events(iter_trajectory_events(json_log_path), runtime)
+    else:
+        with open_trajectory(json_log_path) as f, PROFILER.stage('parse.decode', os.path.getsize(json_log_path)):
+            data = json.load(f)
+        
+        with PROFILER.stage('parse.extract'):
+            actions = parse_events(data, runtime)
+    
+    if runtime is not None:
+        return actions, runtime.stats()
     return actions
 
 
 if __name__ == '__main__':
-    json_files = [
+    import argparse
+    from parse_cache import parse_trajectory_cached
+    
+    default_files = [
         'traj_pm-schedule-meeting-1-image.json',
         'traj_sde-run-janusgraph-image.json',
         'traj_hr-new-grad-job-description-3-image.json',
@@ -141,8 +599,19 @@ if __name__ == '__main__':
         'traj_qa-escalate-emergency-image.json'
     ]
     
+    cli = argparse.ArgumentParser(description='Parse trajectories into standardized actions')
+    cli.add_argument('files', nargs='*', default=default_files,
+                     help='Trajectory JSON files (default: the bundled task trajectories)')
+    cli.add_argument('--output', default='parsed_actions_output.txt',
+                     help='Output text file (default: parsed_actions_output.txt)')
+    cli.add_argument('--parse-cache', metavar='DIR', default=None,
+                     help='Cache parsed actions in DIR, keyed by trajectory content and parser version')
+    cli_args = cli.parse_args()
+    
+    json_files = cli_args.files
+    
     # Output file name
-    output_file = 'parsed_actions_output.txt'
+    output_file = cli_args.output
     
     # Process each file and write to output file
     with open(output_file, 'w') as out_f:
@@ -150,9 +619,9 @@ if __name__ == '__main__':
             print(f"\n{filename}:")
             out_f.write(f"\n{filename}:\n")
             try:
-                actions = parse_trajectory(filename)
+                actions = parse_trajectory_cached(filename, cli_args.parse_cache)
                 # Write as formatted JSON for readability
-                output_json = json.dumps(actions, indent=2)
+                output_json = json.dumps([action.render() for action in actions], indent=2)
                 print(output_json)
                 out_f.write(output_json)
                 out_f.write("\n")
@@ -166,4 +635,3 @@ if __name__ == '__main__':
                 out_f.write(error_msg + "\n")
     
     print(f"\nOutput written to {output_file}")
-
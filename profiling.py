@@ -0,0 +1,326 @@
+"""
+Opt-in per-stage timing for the evaluation pipeline.
+
+Pipeline code marks its stages with PROFILER.stage(name) (or the
+PROFILER.timed(name) decorator). While profiling is disabled a stage is a
+shared no-op context manager, so the hooks cost next to nothing.
+When enabled (evaluator.py --profile), every trajectory's result gets a
+'profile' entry with per-stage wall time, self time (excluding nested
+stages), call counts and bytes read, and batch runs aggregate them into
+per-stage percentiles and histograms.
+
+Stages:
+- hash: content hashing of trajectory files (fingerprints, parse cache)
+- parse.decode / parse.extract: json.load and action extraction in
+  parse_trajectory; parse.streaming when both are interleaved;
+  parse.indexed when only indexed agent actions are decoded;
+  parse.cache for parse cache lookups and writes
+- index: building a trajectory's event index (trajectory_index.py)
+- normalize: action normalization (cache misses only; hits are free)
+- align: golden -> agent alignment, with align.assign for the assignment
+- similarity: fuzzy similarity of action pairs (cache misses only)
+- redundancy: detect_harmful_redundancy
+- report: diagnostic report rendering
+
+Profiling settings are exported through the environment so worker
+processes pick them up. With a cProfile path set, each process also dumps
+its cumulative cProfile statistics, and merge_cprofile_dumps combines them.
+"""
+
+import cProfile
+import glob
+import os
+import pstats
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional
+
+PROFILE_ENV = 'EVALUATOR_PROFILE'
+CPROFILE_ENV = 'EVALUATOR_CPROFILE'
+
+# Upper bounds (seconds) of the per-trajectory time histogram buckets
+HISTOGRAM_BOUNDS = (1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+
+def _bucket_label(bound: float) -> str:
+    if bound < 1e-3:
+        return f"<{bound * 1e6:.0f}us"
+    if bound < 1:
+        return f"<{bound * 1e3:.0f}ms"
+    return f"<{bound:.0f}s"
+
+
+HISTOGRAM_LABELS = [_bucket_label(bound) for bound in HISTOGRAM_BOUNDS] + [f">={HISTOGRAM_BOUNDS[-1]:.0f}s"]
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_bytes(self, nbytes: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'nbytes', 'start')
+
+    def __init__(self, profiler: 'StageProfiler', name: str, nbytes: int):
+        self.profiler = profiler
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.profiler._children.append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        children = self.profiler._children
+        nested = children.pop()
+        if children:
+            children[-1] += elapsed
+        self.profiler.record(self.name, elapsed, elapsed - nested, self.nbytes)
+        return False
+
+    def add_bytes(self, nbytes: int) -> None:
+        self.nbytes += nbytes
+
+
+class StageProfiler:
+    """
+    Accumulates wall time, self time, calls and bytes per stage for the
+    trajectory currently being evaluated in this process.
+    """
+
+    def __init__(self, enabled: bool = False, cprofile_path: Optional[str] = None):
+        self.enabled = enabled
+        self.cprofile_path = cprofile_path
+        self._stats: Dict[str, List[float]] = {}
+        self._children: List[float] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    def enable(self, cprofile_path: Optional[str] = None) -> None:
+        """Turn profiling on here and in worker processes started afterwards."""
+        self.enabled = True
+        os.environ[PROFILE_ENV] = '1'
+        if cprofile_path:
+            self.cprofile_path = str(cprofile_path)
+            os.environ[CPROFILE_ENV] = self.cprofile_path
+            # Leftovers of an interrupted run would be merged into this one
+            for part in _cprofile_parts(self.cprofile_path):
+                os.remove(part)
+
+    def reset(self) -> None:
+        self._stats = {}
+        self._children = []
+
+    def record(self, name: str, seconds: float, self_seconds: float = None, nbytes: int = 0) -> None:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = [0, 0.0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += seconds if self_seconds is None else self_seconds
+        stats[3] += nbytes
+
+    def stage(self, name: str, nbytes: int = 0):
+        """
+        Context manager timing one stage. nbytes (or add_bytes() on the
+        entered stage) counts the input bytes it read.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, nbytes)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator timing every call of a function as a stage."""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name, 0):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-stage statistics recorded since the last reset."""
+        return {
+            name: {'calls': calls, 'seconds': seconds, 'self_seconds': self_seconds, 'bytes': nbytes}
+            for name, (calls, seconds, self_seconds, nbytes) in sorted(self._stats.items())
+        }
+
+    def trajectory(self) -> 'TrajectoryProfile':
+        """Context manager profiling one trajectory; see TrajectoryProfile."""
+        return TrajectoryProfile(self)
+
+    def _cprofile_start(self) -> None:
+        if self.cprofile_path:
+            if self._cprofile is None:
+                self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _cprofile_stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(f"{self.cprofile_path}.{os.getpid()}")
+
+
+class TrajectoryProfile:
+    """
+    Profile of one trajectory's evaluation. Used as a context manager, it
+    resets the stage statistics on entry and fills .profile on exit (it
+    stays None when profiling is disabled).
+    """
+
+    def __init__(self, profiler: StageProfiler):
+        self.profiler = profiler
+        self.profile: Optional[Dict] = None
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.profiler.reset()
+            self.profiler._cprofile_start()
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler.enabled:
+            elapsed = time.perf_counter() - self.start
+            self.profiler._cprofile_stop()
+            stages = self.profiler.snapshot()
+            self.profile = {
+                'seconds': elapsed,
+                'bytes_read': sum(stage['bytes'] for stage in stages.values()),
+                'stages': stages,
+            }
+        return False
+
+
+PROFILER = StageProfiler(
+    enabled=bool(os.environ.get(PROFILE_ENV)),
+    cprofile_path=os.environ.get(CPROFILE_ENV) or None
+)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _distribution(values: List[float]) -> Dict:
+    values = sorted(values)
+    histogram = dict.fromkeys(HISTOGRAM_LABELS, 0)
+    for value in values:
+        bucket = next(
+            (label for bound, label in zip(HISTOGRAM_BOUNDS, HISTOGRAM_LABELS) if value < bound),
+            HISTOGRAM_LABELS[-1]
+        )
+        histogram[bucket] += 1
+    return {
+        'mean': sum(values) / len(values),
+        'p50': _percentile(values, 0.5),
+        'p95': _percentile(values, 0.95),
+        'max': values[-1],
+        'histogram': histogram,
+    }
+
+
+def aggregate_profiles(profiles: Iterable[Optional[Dict]]) -> Dict:
+    """
+    Combine per-trajectory profiles into totals plus, for every stage, the
+    distribution (mean, p50, p95, max, histogram) of its per-trajectory time.
+    """
+    profiles = [profile for profile in profiles if profile]
+    summary = {'trajectories': len(profiles), 'seconds': 0.0, 'bytes_read': 0, 'stages': {}}
+    if not profiles:
+        return summary
+
+    per_stage: Dict[str, List[Dict]] = {}
+    for profile in profiles:
+        for name, stats in profile['stages'].items():
+            per_stage.setdefault(name, []).append(stats)
+
+    summary['seconds'] = sum(profile['seconds'] for profile in profiles)
+    summary['bytes_read'] = sum(profile['bytes_read'] for profile in profiles)
+    summary['per_trajectory'] = _distribution([profile['seconds'] for profile in profiles])
+    for name in sorted(per_stage):
+        entries = per_stage[name]
+        summary['stages'][name] = {
+            'trajectories': len(entries),
+            'calls': sum(entry['calls'] for entry in entries),
+            'seconds': sum(entry['seconds'] for entry in entries),
+            'self_seconds': sum(entry['self_seconds'] for entry in entries),
+            'bytes': sum(entry['bytes'] for entry in entries),
+            'per_trajectory': _distribution([entry['seconds'] for entry in entries]),
+        }
+    return summary
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def render_profile_summary(summary: Dict) -> str:
+    """Plain-text table of an aggregate_profiles summary."""
+    lines = ["=" * 60, "PROFILE", "=" * 60]
+    lines.append(f"Trajectories: {summary['trajectories']}  "
+                 f"total {_format_seconds(summary['seconds'])}  "
+                 f"read {summary['bytes_read'] / (1 << 20):.1f}MB")
+    if not summary['stages']:
+        return "\n".join(lines)
+
+    lines.append("")
+    lines.append(f"{'stage':<16} {'calls':>8} {'total':>9} {'self':>9} {'self %':>7} "
+                 f"{'p50':>9} {'p95':>9} {'max':>9} {'MB':>8}")
+    total = summary['seconds'] or 1.0
+    for name, stage in summary['stages'].items():
+        dist = stage['per_trajectory']
+        lines.append(
+            f"{name:<16} {stage['calls']:>8} {_format_seconds(stage['seconds']):>9} "
+            f"{_format_seconds(stage['self_seconds']):>9} {stage['self_seconds'] / total:>7.1%} "
+            f"{_format_seconds(dist['p50']):>9} {_format_seconds(dist['p95']):>9} "
+            f"{_format_seconds(dist['max']):>9} {stage['bytes'] / (1 << 20):>8.1f}"
+        )
+
+    lines.append("")
+    lines.append("Per-trajectory time histogram:")
+    lines.append(f"{'stage':<16} " + " ".join(f"{label:>7}" for label in HISTOGRAM_LABELS))
+    rows = [('(trajectory)', summary['per_trajectory'])]
+    rows += [(name, stage['per_trajectory']) for name, stage in summary['stages'].items()]
+    for name, dist in rows:
+        lines.append(f"{name:<16} " + " ".join(f"{dist['histogram'][label]:>7}" for label in HISTOGRAM_LABELS))
+    return "\n".join(lines)
+
+
+def _cprofile_parts(path: str) -> List[str]:
+    # Per-process dumps are named <path>.<pid>
+    parts = sorted(glob.glob(f"{glob.escape(path)}.*"))
+    return [part for part in parts if part.rsplit('.', 1)[-1].isdigit()]
+
+
+def merge_cprofile_dumps(path: str) -> bool:
+    """
+    Merge the per-process dumps written under a cProfile path into path
+    itself and remove them. Returns False if no process wrote a dump.
+    """
+    parts = _cprofile_parts(path)
+    if not parts:
+        return False
+    stats = pstats.Stats(*parts)
+    stats.dump_stats(path)
+    for part in parts:
+        os.remove(part)
+    return True
@@ -8,35 +8,49 @@ golden paths.  Can be used in two modes:
 1. Given a single trajectory JSON file, it will parse the actions,
    align them to the canonical golden path for the specified task,
    and produce a suggested refined path.
-2. When multiple trajectories are available, you can run the script
-   repeatedly and aggregate the suggestions.
+2. Given a directory of trajectories for one task (--trajectory-dir),
+   it parses them in parallel, aligns each run to the canonical path
+   once and builds a consensus refined path with support counts: the
+   most common matched variant of each canonical step, and actions
+   that frequent runs performed but the canonical path lacks. Runs are
+   matched with the evaluator's rules by default, so support counts
+   agree with what scoring considers the same action.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from difflib import SequenceMatcher
+from functools import partial
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence
 
-from parser import parse_trajectory
-from golden_paths import GOLDEN_PATHS
+from actions import ARGUMENT_FIELDS, KEY_FIELDS, ActionLike, render_action
+from alignment import AlignmentEngine
+from parse_cache import parse_trajectory_cached
+from parser import find_trajectory_files
+from golden_paths import get_golden_path
+from scoring import ALIGNMENT_ENGINE, SIMILARITY
 
 DEFAULT_DESCRIPTIONS_PATH = Path("golden_paths_descriptions.md")
 
 @dataclass
 class MatchResult:
-    canonical: str
-    matched: Optional[str]
+    canonical: ActionLike
+    matched: Optional[ActionLike]
     similarity: float
+    index: Optional[int] = None
 
 def load_description_file(path: Path) -> Dict[str, List[str]]:
     """
     Parse the description file and extract canonical action lists
-    for every task.
+    for every task. Bullets after a task's "Variants" header describe
+    alternative paths and are not part of its canonical actions.
     """
     if not path.exists():
         return {}
@@ -44,6 +58,7 @@ def load_description_file(path: Path) -> Dict[str, List[str]]:
     tasks: Dict[str, List[str]] = {}
     current_task: Optional[str] = None
     current_actions: List[str] = []
+    in_variants = False
 
     with path.open("r") as fh:
         for line in fh:
@@ -56,9 +71,14 @@ def load_description_file(path: Path) -> Dict[str, List[str]]:
                     tasks[current_task] = current_actions
                 current_task = clean_line.split(":", 1)[1].strip()
                 current_actions = []
+                in_variants = False
                 continue
 
-            if clean_line.startswith("- ") and current_task:
+            if clean_line.startswith("Variants"):
+                in_variants = True
+                continue
+
+            if clean_line.startswith("- ") and current_task and not in_variants:
                 action = clean_line[2:].strip()
                 current_actions.append(action)
 
@@ -67,70 +87,77 @@ def load_description_file(path: Path) -> Dict[str, List[str]]:
 
     return tasks
 
-def normalize_action(action: str) -> str:
+def normalize_action(action: ActionLike) -> str:
     """
-    Normalize an action string for fuzzy comparison.
-    Cleans the string.
+    Normalize an action for fuzzy comparison.
+    Argument values are blanked; action strings are cleaned with regexes.
     """
+    if not isinstance(action, str):
+        args = ", ".join(
+            f"{name}=''" for name, value in zip(ARGUMENT_FIELDS, action[1:KEY_FIELDS]) if value is not None
+        )
+        return f"{action.type}({args})".lower()
     action = action.strip().lower()
     action = re.sub(r"'[^']*'", "''", action)
     action = re.sub(r'"[^"]*"', '""', action)
     action = re.sub(r"\s+", " ", action)
     return action
 
-def action_similarity(action_1: str, action_2: str) -> float:
-    return SequenceMatcher(None, normalize_action(action_1), normalize_action(action_2)).ratio()
+def normalized_ratio(norm_1: str, norm_2: str, score_cutoff: float = 0.0) -> float:
+    return SIMILARITY(norm_1, norm_2, score_cutoff)
+
+def action_similarity(action_1: ActionLike, action_2: ActionLike) -> float:
+    return normalized_ratio(normalize_action(action_1), normalize_action(action_2))
+
+# Same alignment engine as scoring, with the refiner's looser normalization:
+# quoted strings are blanked and bash commands are matched fuzzily
+REFINE_ENGINE = AlignmentEngine(
+    normalizer=normalize_action,
+    similarity=normalized_ratio,
+)
+
+# Matchers selectable with --matcher; "scoring" reproduces the matches the
+# evaluator counts when scoring
+MATCHERS: Dict[str, AlignmentEngine] = {
+    "refine": REFINE_ENGINE,
+    "scoring": ALIGNMENT_ENGINE,
+}
 
 def align_actions(
-    canonical_actions: Sequence[str],
-    parsed_actions: Sequence[str],
+    canonical_actions: Sequence[ActionLike],
+    parsed_actions: Sequence[ActionLike],
     min_similarity: float = 0.45,
+    engine: AlignmentEngine = REFINE_ENGINE,
 ) -> tuple[List[MatchResult], set[int]]:
     """
-    Align canonical actions to parsed actions using greedy matching with
-    SequenceMatcher similarity.
+    Align canonical actions to parsed actions with the shared alignment
+    engine (optimal one-to-one assignment).
     """
-    matches: List[MatchResult] = []
-    used_indices: set[int] = set()
-
-    for canonical in canonical_actions:
-        best_idx = None
-        best_score = 0.0
-
-        for idx, parsed in enumerate(parsed_actions):
-            if idx in used_indices:
-                continue
-            score = action_similarity(canonical, parsed)
-            if score > best_score:
-                best_score = score
-                best_idx = idx
-
-        if best_idx is not None and best_score >= min_similarity:
-            used_indices.add(best_idx)
-            matches.append(
-                MatchResult(
-                    canonical=canonical,
-                    matched=parsed_actions[best_idx],
-                    similarity=best_score,
-                )
-            )
-        else:
-            matches.append(MatchResult(canonical=canonical, matched=None, similarity=0.0))
-
-    return matches, used_indices
+    alignment = engine.align(canonical_actions, parsed_actions, min_similarity)
+    matches = [
+        MatchResult(
+            canonical=canonical_actions[golden_idx],
+            matched=parsed_actions[agent_idx] if agent_idx is not None else None,
+            similarity=similarity,
+            index=agent_idx,
+        )
+        for golden_idx, agent_idx, similarity in alignment.pairs
+    ]
+    return matches, alignment.used_indices
 
 def refine_golden_path(
     task_name: str,
-    parsed_actions: Sequence[str],
-    canonical_actions: Sequence[str],
+    parsed_actions: Sequence[ActionLike],
+    canonical_actions: Sequence[ActionLike],
     min_similarity: float = 0.45,
+    engine: AlignmentEngine = REFINE_ENGINE,
 ) -> Dict[str, object]:
     matches, matched_indices = align_actions(
-        canonical_actions, parsed_actions, min_similarity
+        canonical_actions, parsed_actions, min_similarity, engine
     )
-    suggested_path = [m.matched or m.canonical for m in matches]
+    suggested_path = [render_action(m.matched or m.canonical) for m in matches]
     unmatched_parsed = [
-        action for idx, action in enumerate(parsed_actions) if idx not in matched_indices
+        render_action(action) for idx, action in enumerate(parsed_actions) if idx not in matched_indices
     ]
 
     return {
@@ -138,8 +165,8 @@ def refine_golden_path(
         "suggested_golden_path": suggested_path,
         "matches": [
             {
-                "canonical": match.canonical,
-                "matched": match.matched,
+                "canonical": render_action(match.canonical),
+                "matched": render_action(match.matched) if match.matched is not None else None,
                 "similarity": match.similarity,
             }
             for match in matches
@@ -148,6 +175,206 @@ def refine_golden_path(
         "parsed_action_count": len(parsed_actions),
     }
 
+def _relative_position(index: int, length: int) -> float:
+    # Centre of the action's slot in a path of the given length, in [0, 1]
+    return (index + 0.5) / length
+
+def _align_trajectory(
+    trajectory_path: str,
+    canonical_actions: Sequence[str],
+    min_similarity: float,
+    parse_cache: Optional[str],
+    matcher: str = "scoring",
+) -> Dict[str, object]:
+    """
+    Parse one trajectory and align it to the canonical path (runs in a
+    worker process in batch mode). Actions come back as action strings, so
+    the same action counts as one variant across runs.
+    """
+    try:
+        parsed_actions = parse_trajectory_cached(trajectory_path, parse_cache)
+    except Exception as e:
+        return {"trajectory": trajectory_path, "error": str(e)}
+
+    matches, matched_indices = align_actions(
+        canonical_actions, parsed_actions, min_similarity, MATCHERS[matcher]
+    )
+    return {
+        "trajectory": trajectory_path,
+        "parsed_count": len(parsed_actions),
+        "matches": [
+            (render_action(m.matched) if m.matched is not None else None, m.similarity, m.index)
+            for m in matches
+        ],
+        "unmatched": [
+            (render_action(action), idx) for idx, action in enumerate(parsed_actions) if idx not in matched_indices
+        ],
+    }
+
+def consensus_refinement(
+    task_name: str,
+    canonical_actions: Sequence[str],
+    runs: Sequence[Dict[str, object]],
+    min_support: float = 0.5,
+) -> Dict[str, object]:
+    """
+    Combine per-trajectory alignments into one suggested golden path.
+
+    Each canonical step is replaced by its most frequently matched agent
+    action when at least min_support of the runs matched it. Unmatched
+    agent actions (grouped by the scoring normalizer, so only actions the
+    evaluator treats as equivalent share a count) performed by at least
+    min_support of the runs are inserted at their mean relative position.
+    """
+    runs = [run for run in runs if "error" not in run]
+    run_count = len(runs)
+    needed = max(1, min_support * run_count)
+
+    steps = []
+    step_positions: List[float] = []
+    for step_idx, canonical in enumerate(canonical_actions):
+        variants: Counter = Counter()
+        similarities: List[float] = []
+        positions: List[float] = []
+        for run in runs:
+            matched, similarity, agent_idx = run["matches"][step_idx]
+            if matched is None:
+                continue
+            variants[matched] += 1
+            similarities.append(similarity)
+            positions.append(_relative_position(agent_idx, run["parsed_count"]))
+
+        support = len(similarities)
+        consensus = variants.most_common(1)[0][0] if support >= needed else canonical
+        mean_position = (
+            sum(positions) / support if positions else _relative_position(step_idx, len(canonical_actions))
+        )
+        # Keep canonical order: a step is never placed before its predecessor
+        step_positions.append(max([mean_position] + step_positions[-1:]))
+        steps.append({
+            "canonical": canonical,
+            "consensus": consensus,
+            "support": support,
+            "support_ratio": support / run_count if run_count else 0.0,
+            "mean_similarity": sum(similarities) / support if support else 0.0,
+            "mean_position": mean_position,
+            "variants": dict(variants.most_common()),
+        })
+
+    # Unmatched actions, counted once per run that performed them
+    extra_runs: Counter = Counter()
+    extra_variants: Dict[str, Counter] = {}
+    extra_positions: Dict[str, List[float]] = {}
+    for run in runs:
+        seen = set()
+        for action, agent_idx in run["unmatched"]:
+            key = ALIGNMENT_ENGINE.normalizer(action)
+            extra_variants.setdefault(key, Counter())[action] += 1
+            extra_positions.setdefault(key, []).append(
+                _relative_position(agent_idx, run["parsed_count"])
+            )
+            if key not in seen:
+                seen.add(key)
+                extra_runs[key] += 1
+
+    frequent_extras = []
+    for key, support in extra_runs.most_common():
+        if support < needed:
+            break
+        positions = extra_positions[key]
+        frequent_extras.append({
+            "action": extra_variants[key].most_common(1)[0][0],
+            "support": support,
+            "support_ratio": support / run_count,
+            "occurrences": len(positions),
+            "mean_position": sum(positions) / len(positions),
+        })
+
+    suggested_path = [step["consensus"] for step in steps]
+    insertions = sorted(
+        frequent_extras,
+        key=lambda extra: extra["mean_position"],
+        reverse=True,
+    )
+    for extra in insertions:
+        # Insert after every canonical step observed earlier in the runs
+        insert_at = sum(1 for position in step_positions if position <= extra["mean_position"])
+        suggested_path.insert(insert_at, extra["action"])
+
+    return {
+        "task_name": task_name,
+        "trajectory_count": run_count,
+        "min_support": min_support,
+        "suggested_golden_path": suggested_path,
+        "steps": steps,
+        "frequent_unmatched_actions": frequent_extras,
+    }
+
+def refine_from_directory(
+    task_name: str,
+    trajectory_dir: Path,
+    canonical_actions: Sequence[str],
+    min_similarity: float = 0.45,
+    min_support: float = 0.5,
+    workers: int = 1,
+    parse_cache: Optional[str] = None,
+    matcher: str = "scoring",
+) -> Dict[str, object]:
+    """
+    Consensus refinement over every *.json trajectory (or .json.gz /
+    .json.zst) in a directory.
+    matcher names the MATCHERS entry used to align each run.
+    """
+    trajectory_files = [str(path) for path in find_trajectory_files(trajectory_dir, pattern="*")]
+    align = partial(
+        _align_trajectory,
+        canonical_actions=list(canonical_actions),
+        min_similarity=min_similarity,
+        parse_cache=parse_cache,
+        matcher=matcher,
+    )
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(trajectory_files)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(align, trajectory_files))
+    else:
+        runs = [align(path) for path in trajectory_files]
+
+    refinement = consensus_refinement(task_name, canonical_actions, runs, min_support)
+    refinement["failed_trajectories"] = [
+        {"trajectory": run["trajectory"], "error": run["error"]} for run in runs if "error" in run
+    ]
+    return refinement
+
+def print_consensus(refinement: Dict[str, object]) -> None:
+    print("\n***Consensus Refinement Summary***")
+    print(f"Task: {refinement['task_name']}")
+    print(f"Trajectories: {refinement['trajectory_count']}")
+    for failure in refinement.get("failed_trajectories", []):
+        print(f"  Skipped {failure['trajectory']}: {failure['error']}")
+    print("Suggested Golden Path:")
+    for idx, action in enumerate(refinement["suggested_golden_path"], start=1):
+        print(f"  {idx}. {action}")
+
+    total = refinement["trajectory_count"]
+    print("\nCanonical steps:")
+    for step in refinement["steps"]:
+        print(
+            f"  {step['support']:>4}/{total} | similarity: {step['mean_similarity']:.3f} "
+            f"| canonical: {step['canonical']} | consensus: {step['consensus']}"
+        )
+
+    if refinement["frequent_unmatched_actions"]:
+        print("\nFrequent actions missing from the canonical path:")
+        for extra in refinement["frequent_unmatched_actions"]:
+            print(
+                f"  {extra['support']:>4}/{total} | position: {extra['mean_position']:.2f} "
+                f"| {extra['action']}"
+            )
+
 def build_cli() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Refine golden paths using actual agent trajectories."
@@ -157,11 +384,15 @@ def build_cli() -> argparse.ArgumentParser:
         required=True,
         help="Task name",
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--trajectory",
-        required=True,
         help="Path to trajectory JSON file produced by TheAgentCompany benchmark.",
     )
+    source.add_argument(
+        "--trajectory-dir",
+        help="Directory of trajectory JSON files for the task; builds a consensus refinement.",
+    )
     parser.add_argument(
         "--descriptions",
         default=str(DEFAULT_DESCRIPTIONS_PATH),
@@ -173,10 +404,35 @@ def build_cli() -> argparse.ArgumentParser:
         default=0.45,
         help="Minimum similarity required to align actions.",
     )
+    parser.add_argument(
+        "--matcher",
+        choices=sorted(MATCHERS),
+        help=(
+            "Action matching rules: 'refine' (fuzzy, quotes blanked) or 'scoring' (same as the evaluator). "
+            "Default: refine for --trajectory, scoring for --trajectory-dir."
+        ),
+    )
+    parser.add_argument(
+        "--min-support",
+        type=float,
+        default=0.5,
+        help="Fraction of runs that must agree before a consensus change is suggested (batch mode).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for parsing and aligning trajectories in batch mode (0 = all CPUs).",
+    )
     parser.add_argument(
         "--save-json",
         help="Optional path to save refinement output JSON.",
     )
+    parser.add_argument(
+        "--parse-cache",
+        metavar="DIR",
+        help="Cache parsed actions in DIR, keyed by trajectory content and parser version.",
+    )
     parser.add_argument(
         "--print-parsed",
         action="store_true",
@@ -190,29 +446,57 @@ def main() -> None:
     args = cli.parse_args()
 
     task_name = args.task.strip()
-    trajectory_path = Path(args.trajectory)
-
-    if not trajectory_path.exists():
-        cli.error(f"Trajectory file not found: {trajectory_path}")
-
-    parsed_actions = parse_trajectory(str(trajectory_path))
-    if args.print_parsed:
-        print("\nParsed actions:")
-        print(json.dumps(parsed_actions, indent=2))
+    # Blanked arguments make unrelated commands look identical, which would
+    # inflate consensus support counts, so batch mode matches like scoring
+    matcher = args.matcher or ("scoring" if args.trajectory_dir else "refine")
 
     descriptions = load_description_file(Path(args.descriptions))
-    canonical_actions = descriptions.get(task_name) or GOLDEN_PATHS.get(task_name)
+    canonical_actions = descriptions.get(task_name) or get_golden_path(task_name)
 
     if not canonical_actions:
         cli.error(
             f"No canonical actions for task '{task_name}'. "
         )
 
+    if args.trajectory_dir:
+        trajectory_dir = Path(args.trajectory_dir)
+        if not trajectory_dir.is_dir():
+            cli.error(f"Trajectory directory not found: {trajectory_dir}")
+
+        refinement = refine_from_directory(
+            task_name=task_name,
+            trajectory_dir=trajectory_dir,
+            canonical_actions=canonical_actions,
+            min_similarity=args.min_similarity,
+            min_support=args.min_support,
+            workers=args.workers,
+            parse_cache=args.parse_cache,
+            matcher=matcher,
+        )
+        print_consensus(refinement)
+
+        if args.save_json:
+            output_path = Path(args.save_json)
+            output_path.write_text(json.dumps(refinement, indent=2))
+            print(f"\nSaved refinement output to {output_path}")
+        return
+
+    trajectory_path = Path(args.trajectory)
+
+    if not trajectory_path.exists():
+        cli.error(f"Trajectory file not found: {trajectory_path}")
+
+    parsed_actions = parse_trajectory_cached(trajectory_path, args.parse_cache)
+    if args.print_parsed:
+        print("\nParsed actions:")
+        print(json.dumps([action.render() for action in parsed_actions], indent=2))
+
     refinement = refine_golden_path(
         task_name=task_name,
         parsed_actions=parsed_actions,
         canonical_actions=canonical_actions,
         min_similarity=args.min_similarity,
+        engine=MATCHERS[matcher],
     )
 
     print("\n***Refinement Summary***")
@@ -0,0 +1,317 @@
+"""
+Diagnostic reports for evaluation results.
+
+Reports are built on demand from a result's scores, paths and (optionally)
+its golden -> agent alignment, so batch evaluation never pays for them.
+The same report can be rendered as text, JSON or HTML.
+"""
+
+import html
+import json
+from typing import Callable, Dict, List, Optional, Sequence
+
+from actions import ActionLike, render_action
+from alignment import Alignment
+from profiling import PROFILER
+
+REPORT_FORMATS = ('text', 'json', 'html')
+
+
+def summary_findings(scores: Dict[str, float]) -> List[str]:
+    """Plain-language observations about a set of scores."""
+    findings = []
+    if scores['coverage'] < 0.5:
+        findings.append("Agent path covers less than half of optimal steps")
+    elif scores['coverage'] < 0.8:
+        findings.append("Agent path covers most optimal steps")
+    else:
+        findings.append("Agent path covers most/all optimal steps")
+
+    if scores['redundancy_penalty'] > 0.3:
+        findings.append("High redundancy detected")
+    if scores['path_length_ratio'] > 2.0:
+        findings.append("Agent path is significantly longer than optimal")
+    elif scores['path_length_ratio'] > 1.5:
+        findings.append("Agent path is moderately longer than optimal")
+    if scores['path_length_ratio'] < 0.7:
+        findings.append("Agent path is shorter than expected (may be missing steps)")
+    for component, resource in (('time_efficiency', 'wall-clock'), ('token_efficiency', 'token')):
+        efficiency = scores.get(component)
+        if efficiency is not None and efficiency < 1.0:
+            findings.append(f"Agent used {1 / efficiency:.1f}x its {resource} budget")
+    return findings
+
+
+def build_report(
+    scores: Dict[str, float],
+    agent_path: Sequence[ActionLike],
+    golden_path: Sequence[ActionLike],
+    alignment: Optional[Alignment] = None,
+    task_name: Optional[str] = None
+) -> Dict:
+    """
+    Structured report for one evaluation.
+
+    Args:
+        scores: Output of calculate_efficiency_score
+        agent_path: Agent actions
+        golden_path: Golden path actions
+        alignment: Optional golden -> agent alignment; when given, the report
+            lists which agent step matched each golden step
+        task_name: Optional task name for the report header
+
+    Returns:
+        JSON-serializable report dictionary
+    """
+    report = {
+        'task_name': task_name,
+        'scores': dict(scores),
+        'golden_path': [render_action(action) for action in golden_path],
+        'agent_path': [render_action(action) for action in agent_path],
+        'findings': summary_findings(scores),
+    }
+    if alignment is not None:
+        report['matches'] = [
+            {'golden_index': golden_idx, 'agent_index': agent_idx, 'similarity': similarity}
+            for golden_idx, agent_idx, similarity in alignment.pairs
+        ]
+        report['unmatched_agent_indices'] = [
+            idx for idx in range(len(agent_path)) if idx not in alignment.used_indices
+        ]
+    return report
+
+
+def _seconds(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.1f}s"
+
+
+def _efficiency(value: Optional[float]) -> str:
+    return '(no budget)' if value is None else f"(budget efficiency: {value:.3f})"
+
+
+def _runtime_lines(scores: Dict) -> List[str]:
+    lines = [
+        f"Wall Time: {_seconds(scores['wall_time'])} {_efficiency(scores.get('time_efficiency'))}",
+        f"Step Latency: {_seconds(scores['mean_step_latency'])} mean, {_seconds(scores['max_step_latency'])} max",
+        f"Idle Time (action -> observation): {_seconds(scores['idle_time'])}, longest gap {_seconds(scores['max_idle_gap'])}",
+    ]
+    if scores['llm_calls']:
+        lines.append(
+            f"Tokens: {scores['total_tokens']} in {scores['llm_calls']} LLM calls "
+            f"({scores['prompt_tokens']} prompt, {scores['completion_tokens']} completion) "
+            f"{_efficiency(scores.get('token_efficiency'))}"
+        )
+        lines.append(f"Prompt Token Growth: {scores['prompt_token_growth']:.0f} per call")
+    if scores.get('runtime_penalty'):
+        lines.append(f"Runtime Penalty: -{scores['runtime_penalty']:.1f} points")
+    return lines
+
+
+def render_text(report: Dict) -> str:
+    """Render a report in the evaluator's plain-text layout."""
+    scores = report['scores']
+    matches = {m['golden_index']: m for m in report.get('matches', [])}
+    lines = ["=" * 60, "EFFICIENCY EVALUATION REPORT", "=" * 60, ""]
+    if report.get('task_name'):
+        lines[3:3] = [f"Task: {report['task_name']}"]
+
+    lines += [f"Overall Efficiency Score: {scores['efficiency_score']:.2f}/100", ""]
+
+    lines.append("Component Scores:")
+    lines.append(f"  Coverage: {scores['coverage']:.3f} ({scores.get('matched_count', 0)}/{scores.get('total_count', 0)} golden steps matched)")
+    lines.append(f"  Order Score: {scores['order_score']:.3f} (0-1)")
+    if 'order_lis' in scores:
+        lines.append(f"  Agent Step Order: {scores['order_lis']:.3f} LIS, {scores['order_kendall']:.3f} Kendall (0-1)")
+    lines.append(f"  Length Efficiency: {scores['length_efficiency']:.3f} (0-1)")
+    lines.append(f"  Redundancy Penalty: {scores['redundancy_penalty']:.3f} (0-1)")
+    lines.append(f"  Path Length Ratio: {scores['path_length_ratio']:.2f}x")
+    if 'avg_similarity' in scores:
+        lines.append(f"  Average Match Similarity: {scores['avg_similarity']:.3f}")
+    if 'completeness_bonus' in scores and scores['completeness_bonus'] > 0:
+        lines.append(f"  Completeness Bonus: +{scores['completeness_bonus']:.1f} points")
+    lines.append("")
+
+    lines.append("Path Comparison:")
+    if 'golden_variant' in scores:
+        lines.append(f"  Golden Variant: {scores['golden_variant'] + 1} of {scores['golden_variants']} (best match)")
+    lines.append(f"  Golden Path Length: {scores['golden_path_length']} actions")
+    lines.append(f"  Agent Path Length: {scores['agent_path_length']} actions")
+    lines.append("")
+
+    if 'wall_time' in scores:
+        lines.append("Runtime:")
+        lines.extend(f"  {line}" for line in _runtime_lines(scores))
+        lines.append("")
+
+    lines.append("Golden Path Actions:")
+    for i, action in enumerate(report['golden_path']):
+        line = f"  {i + 1}. {action}"
+        match = matches.get(i)
+        if match is not None:
+            if match['agent_index'] is None:
+                line += "  [not matched]"
+            else:
+                line += f"  [agent step {match['agent_index'] + 1}, similarity {match['similarity']:.2f}]"
+        lines.append(line)
+    lines.append("")
+
+    lines.append("Agent Path Actions:")
+    lines.extend(f"  {i}. {action}" for i, action in enumerate(report['agent_path'], 1))
+    lines.append("")
+
+    lines.append("Summary of results:")
+    lines.extend(f"  - {finding}" for finding in report['findings'])
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+def render_json(report: Dict) -> str:
+    """Render a report as indented JSON."""
+    return json.dumps(report, indent=2)
+
+
+def render_html(report: Dict) -> str:
+    """Render a report as a standalone HTML page."""
+    scores = report['scores']
+    matches = {m['golden_index']: m for m in report.get('matches', [])}
+    matched_agent = {m['agent_index']: m['golden_index'] for m in matches.values() if m['agent_index'] is not None}
+    esc = html.escape
+    title = f"Efficiency Report: {report['task_name']}" if report.get('task_name') else "Efficiency Report"
+
+    score_rows = "".join(
+        f"<tr><th>{esc(name)}</th><td>{value:.3f}</td></tr>" if isinstance(value, float)
+        else f"<tr><th>{esc(name)}</th><td>{esc(str(value))}</td></tr>"
+        for name, value in scores.items()
+    )
+
+    golden_rows = []
+    for i, action in enumerate(report['golden_path']):
+        match = matches.get(i)
+        if match is None:
+            status, css = "", ""
+        elif match['agent_index'] is None:
+            status, css = "not matched", " class=\"missed\""
+        else:
+            status = f"agent step {match['agent_index'] + 1} ({match['similarity']:.2f})"
+            css = " class=\"matched\""
+        golden_rows.append(f"<tr{css}><td>{i + 1}</td><td><code>{esc(action)}</code></td><td>{esc(status)}</td></tr>")
+
+    agent_rows = []
+    for i, action in enumerate(report['agent_path']):
+        golden_idx = matched_agent.get(i)
+        status = f"golden step {golden_idx + 1}" if golden_idx is not None else ""
+        css = " class=\"matched\"" if golden_idx is not None else ""
+        agent_rows.append(f"<tr{css}><td>{i + 1}</td><td><code>{esc(action)}</code></td><td>{esc(status)}</td></tr>")
+
+    findings = "".join(f"<li>{esc(finding)}</li>" for finding in report['findings'])
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{esc(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; vertical-align: top; }}
+tr.matched {{ background: #e8f5e9; }}
+tr.missed {{ background: #ffebee; }}
+code {{ white-space: pre-wrap; word-break: break-all; }}
+</style>
+</head>
+<body>
+<h1>{esc(title)}</h1>
+<p><strong>Overall Efficiency Score: {scores['efficiency_score']:.2f}/100</strong></p>
+<h2>Component Scores</h2>
+<table>{score_rows}</table>
+<h2>Golden Path</h2>
+<table><tr><th>#</th><th>Action</th><th>Match</th></tr>{"".join(golden_rows)}</table>
+<h2>Agent Path</h2>
+<table><tr><th>#</th><th>Action</th><th>Match</th></tr>{"".join(agent_rows)}</table>
+<h2>Summary</h2>
+<ul>{findings}</ul>
+</body>
+</html>
+"""
+
+
+_RENDERERS: Dict[str, Callable[[Dict], str]] = {
+    'text': render_text,
+    'json': render_json,
+    'html': render_html,
+}
+
+
+def render_report(report: Dict, fmt: str = 'text') -> str:
+    """Render a report in one of REPORT_FORMATS."""
+    try:
+        renderer = _RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(REPORT_FORMATS)})")
+    return renderer(report)
+
+
+def render_result_report(result: Dict, fmt: str = 'text', aligner=None) -> str:
+    """
+    Render the report for an evaluation result (as returned by
+    evaluator.evaluate_trajectory or loaded from a results file/store).
+
+    Args:
+        result: Result with scores, agent_path and golden_path
+        fmt: One of REPORT_FORMATS
+        aligner: Optional callable (golden_path, agent_path) -> Alignment used
+            to annotate step matches; the alignment is only computed here,
+            when a report is actually requested
+    """
+    with PROFILER.stage('report'):
+        agent_path = result.get('agent_path') or []
+        golden_path = result.get('golden_path') or []
+        alignment = None
+        if aligner is not None and agent_path and golden_path:
+            alignment = aligner(golden_path, agent_path)
+        report = build_report(
+            result['scores'], agent_path, golden_path, alignment, task_name=result.get('task_name')
+        )
+        return render_report(report, fmt)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from results_store import ResultsStore, is_store_path
+    from scoring import ALIGNMENT_ENGINE
+
+    cli = argparse.ArgumentParser(description='Render the diagnostic report of a stored evaluation result')
+    cli.add_argument('results', help='Results JSON file or results store written by evaluator.py --output')
+    cli.add_argument(
+        'task_name', help='Task whose report to render (or its results key / trajectory path if it has several runs)'
+    )
+    cli.add_argument('--format', choices=REPORT_FORMATS, default='text', help='Report format (default: text)')
+    cli.add_argument('--output', default=None, help='Write the report to this file instead of printing it')
+    args = cli.parse_args()
+
+    if is_store_path(args.results):
+        with ResultsStore(args.results) as store:
+            try:
+                result = store.get(args.task_name, full=True)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+    else:
+        with open(args.results, 'r') as f:
+            results = json.load(f)
+        # Single-trajectory output files hold one result rather than a mapping
+        result = results if results.get('task_name') == args.task_name else results.get(args.task_name)
+
+    if result is None or 'scores' not in result:
+        reason = result['error'] if result and 'error' in result else 'no result'
+        print(f"Error: Cannot render report for {args.task_name}: {reason}")
+        sys.exit(1)
+
+    report = render_result_report(result, args.format, aligner=ALIGNMENT_ENGINE.align)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+        print(f"Report saved to {args.output}")
+    else:
+        print(report)
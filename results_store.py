@@ -0,0 +1,472 @@
+"""
+SQLite results store for batch evaluations.
+
+Results are written one trajectory at a time as they are produced, instead
+of being held in memory and dumped as one JSON document. Scores live in
+typed columns of the `results` table so dashboards and the query CLI can
+aggregate them without loading any action lists; agent/golden paths go in
+a side table. Rows are keyed by the resolved trajectory file, so several
+runs of the same task are kept side by side. Diagnostic reports are not stored: `show --report` renders
+them on demand from the stored scores and paths.
+
+Query CLI:
+    python results_store.py results.db summary --by category
+    python results_store.py results.db list --sort efficiency_score --limit 20
+    python results_store.py results.db show pm-schedule-meeting-1 --paths
+    python results_store.py results.db show traj_pm-schedule-meeting-1-image.json --paths
+    python results_store.py results.db show pm-schedule-meeting-1 --report --format html > report.html
+    python results_store.py results.db export results.json
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from reports import REPORT_FORMATS, render_result_report
+from scoring import ALIGNMENT_ENGINE
+
+# Bump when the table layout changes
+SCHEMA_VERSION = 4
+
+# Output paths with these suffixes are written as a results store
+STORE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# Score keys stored as typed columns; any other score keys are kept in
+# the extra_scores JSON column
+SCORE_COLUMNS = {
+    'efficiency_score': 'REAL',
+    'coverage': 'REAL',
+    'order_score': 'REAL',
+    'length_efficiency': 'REAL',
+    'redundancy_penalty': 'REAL',
+    'path_similarity': 'REAL',
+    'path_length_ratio': 'REAL',
+    'agent_path_length': 'INTEGER',
+    'golden_path_length': 'INTEGER',
+    'matched_count': 'INTEGER',
+    'total_count': 'INTEGER',
+    'avg_similarity': 'REAL',
+    'completeness_bonus': 'REAL',
+    'wall_time': 'REAL',
+    'total_tokens': 'INTEGER',
+    'time_efficiency': 'REAL',
+    'token_efficiency': 'REAL',
+}
+
+# Rows written between commits
+COMMIT_EVERY = 256
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    trajectory TEXT PRIMARY KEY,
+    task_name TEXT NOT NULL,
+    category TEXT,
+    trajectory_path TEXT,
+    error TEXT,
+    {', '.join(f'{name} {sql_type}' for name, sql_type in SCORE_COLUMNS.items())},
+    extra_scores TEXT,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS results_task ON results (task_name);
+CREATE INDEX IF NOT EXISTS results_category ON results (category);
+CREATE INDEX IF NOT EXISTS results_efficiency ON results (efficiency_score);
+CREATE TABLE IF NOT EXISTS actions (
+    trajectory TEXT NOT NULL,
+    path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    PRIMARY KEY (trajectory, path, position)
+) WITHOUT ROWID;
+"""
+
+
+def is_store_path(path) -> bool:
+    """True if an output path should be written as a results store."""
+    return Path(path).suffix.lower() in STORE_SUFFIXES
+
+
+def task_category(task_name: str) -> str:
+    """Task category prefix, e.g. 'pm' for 'pm-schedule-meeting-1'."""
+    return task_name.split('-', 1)[0]
+
+
+def result_key(results: Dict, task_name: str, trajectory: str) -> str:
+    """
+    Key of a result in a results mapping: the task name, or the trajectory
+    file name (then its full path) when another run of the task already
+    holds it.
+    """
+    for key in (task_name, Path(trajectory).name, trajectory):
+        if key not in results:
+            return key
+    return trajectory
+
+
+def result_summary(result: Dict) -> Dict:
+    """A result without its action lists."""
+    return {
+        key: value for key, value in result.items()
+        if key not in ('agent_path', 'golden_path')
+    }
+
+
+class ResultsStore:
+    """
+    Streaming writer and reader for a SQLite results database.
+
+    Args:
+        db_path: Database file, created if missing
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        has_tables = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'results'"
+        ).fetchone()
+        if has_tables and version != SCHEMA_VERSION:
+            self.conn.close()
+            raise ValueError(
+                f"{db_path} uses results schema v{version}, expected v{SCHEMA_VERSION}; "
+                f"delete it or write to a new file"
+            )
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.commit()
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        """Commit outstanding rows and close the database."""
+        self.conn.commit()
+        self.conn.close()
+
+    def write(self, result: Dict, trajectory: str) -> None:
+        """
+        Insert or replace the rows for one evaluation result.
+
+        Args:
+            result: Evaluation result
+            trajectory: Resolved path of the trajectory file it scores
+        """
+        task_name = result['task_name']
+        scores = dict(result.get('scores') or {})
+        fingerprint = result.get('fingerprint')
+        row = {
+            'trajectory': trajectory,
+            'task_name': task_name,
+            'category': task_category(task_name),
+            'trajectory_path': result.get('trajectory_path'),
+            'error': result.get('error'),
+            'fingerprint': json.dumps(fingerprint) if fingerprint else None,
+        }
+        for name in SCORE_COLUMNS:
+            row[name] = scores.pop(name, None)
+        row['extra_scores'] = json.dumps(scores) if scores else None
+
+        columns = ', '.join(row)
+        placeholders = ', '.join(f':{name}' for name in row)
+        self.conn.execute(f'INSERT OR REPLACE INTO results ({columns}) VALUES ({placeholders})', row)
+
+        self.conn.execute('DELETE FROM actions WHERE trajectory = ?', (trajectory,))
+        for path_name in ('agent', 'golden'):
+            actions = result.get(f'{path_name}_path') or []
+            self.conn.executemany(
+                'INSERT INTO actions (trajectory, path, position, action) VALUES (?, ?, ?, ?)',
+                [(trajectory, path_name, position, action) for position, action in enumerate(actions)]
+            )
+
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.conn.commit()
+            self._pending = 0
+
+    def prune(self, keep_trajectories) -> int:
+        """
+        Delete results for trajectory files not in keep_trajectories.
+
+        Returns:
+            Number of results removed
+        """
+        keep = set(keep_trajectories)
+        stale = [
+            row['trajectory'] for row in self.conn.execute('SELECT trajectory FROM results')
+            if row['trajectory'] not in keep
+        ]
+        for table in ('results', 'actions'):
+            self.conn.executemany(f'DELETE FROM {table} WHERE trajectory = ?', [(path,) for path in stale])
+        self.conn.commit()
+        return len(stale)
+
+    def _row_to_result(self, row: sqlite3.Row) -> Dict:
+        result = {'task_name': row['task_name']}
+        if row['error'] is not None:
+            result['error'] = row['error']
+        else:
+            result['trajectory_path'] = row['trajectory_path']
+            scores = {
+                name: row[name] for name in SCORE_COLUMNS if row[name] is not None
+            }
+            if row['extra_scores']:
+                scores.update(json.loads(row['extra_scores']))
+            result['scores'] = scores
+        if row['fingerprint']:
+            result['fingerprint'] = json.loads(row['fingerprint'])
+        return result
+
+    def actions(self, trajectory: str, path_name: str) -> List[str]:
+        """Stored 'agent' or 'golden' path of a trajectory."""
+        return [
+            row['action'] for row in self.conn.execute(
+                'SELECT action FROM actions WHERE trajectory = ? AND path = ? ORDER BY position',
+                (trajectory, path_name)
+            )
+        ]
+
+    def find(self, key: str) -> Optional[str]:
+        """
+        Resolve a task name, trajectory file name or trajectory path to the
+        stored trajectory it refers to.
+
+        Raises:
+            ValueError: If a task name or file name matches several runs
+        """
+        row = self.conn.execute(
+            'SELECT trajectory FROM results WHERE trajectory = ?', (str(Path(key).resolve()),)
+        ).fetchone()
+        if row is not None:
+            return row['trajectory']
+        matches = [
+            row['trajectory'] for row in self.conn.execute(
+                'SELECT trajectory FROM results WHERE task_name = ? ORDER BY trajectory', (key,)
+            )
+        ]
+        if not matches:
+            matches = [
+                row['trajectory'] for row in self.conn.execute('SELECT trajectory FROM results')
+                if Path(row['trajectory']).name == key
+            ]
+        if len(matches) > 1:
+            raise ValueError(
+                f"{key} matches {len(matches)} trajectories; pass one of: " + ', '.join(matches)
+            )
+        return matches[0] if matches else None
+
+    def get(self, key: str, full: bool = False) -> Optional[Dict]:
+        """
+        Load one result by task name, trajectory file name or path (see
+        find). With full=True the action lists are included, giving the
+        same shape as an entry of the JSON results.
+        """
+        trajectory = self.find(key)
+        if trajectory is None:
+            return None
+        row = self.conn.execute('SELECT * FROM results WHERE trajectory = ?', (trajectory,)).fetchone()
+        result = self._row_to_result(row)
+        if full:
+            for path_name in ('agent', 'golden'):
+                actions = self.actions(trajectory, path_name)
+                # Error results only carry the paths that were available
+                if actions or 'error' not in result:
+                    result[f'{path_name}_path'] = actions
+        return result
+
+    def iter_results(self, full: bool = False) -> Iterator[Dict]:
+        """All results with their trajectory paths, ordered by trajectory file."""
+        rows = self.conn.execute('SELECT * FROM results ORDER BY trajectory').fetchall()
+        for row in rows:
+            result = self._row_to_result(row)
+            if full:
+                result = self.get(row['trajectory'], full=True)
+            yield row['trajectory'], result
+
+    def previous_results(self) -> Dict[str, Dict]:
+        """
+        Results indexed by resolved trajectory path, for incremental runs.
+        Like evaluator.load_previous_results, entries without a fingerprint
+        are ignored.
+        """
+        by_path = {}
+        for row in self.conn.execute('SELECT * FROM results WHERE fingerprint IS NOT NULL'):
+            by_path[row['trajectory']] = self._row_to_result(row)
+        return by_path
+
+    def summary(self, group_by: Optional[str] = None) -> List[Dict]:
+        """
+        Aggregate statistics over all results, optionally per category.
+        """
+        if group_by not in (None, 'category'):
+            raise ValueError(f"Cannot group by {group_by!r}")
+        group_column = f"{group_by} AS grp, " if group_by else "'all' AS grp, "
+        group_clause = f" GROUP BY {group_by} ORDER BY {group_by}" if group_by else ""
+        query = (
+            f"SELECT {group_column}"
+            "COUNT(*) AS trajectories, "
+            "SUM(error IS NOT NULL) AS errors, "
+            "AVG(efficiency_score) AS mean_score, "
+            "MIN(efficiency_score) AS min_score, "
+            "MAX(efficiency_score) AS max_score, "
+            "AVG(coverage) AS mean_coverage, "
+            "AVG(redundancy_penalty) AS mean_redundancy, "
+            "AVG(path_length_ratio) AS mean_length_ratio, "
+            "AVG(wall_time) AS mean_wall_time, "
+            "AVG(total_tokens) AS mean_tokens "
+            f"FROM results{group_clause}"
+        )
+        return [dict(row) for row in self.conn.execute(query)]
+
+    def list_scores(
+        self,
+        sort: str = 'efficiency_score',
+        ascending: bool = False,
+        limit: Optional[int] = None,
+        category: Optional[str] = None
+    ) -> List[Dict]:
+        """Per-trajectory scores, sorted by a score column."""
+        if sort not in SCORE_COLUMNS and sort != 'task_name':
+            raise ValueError(f"Unknown sort column: {sort}")
+        query = (
+            'SELECT task_name, trajectory, error, efficiency_score, coverage, redundancy_penalty, '
+            'path_length_ratio, wall_time, total_tokens FROM results'
+        )
+        params: List = []
+        if category:
+            query += ' WHERE category = ?'
+            params.append(category)
+        query += f" ORDER BY {sort} IS NULL, {sort} {'ASC' if ascending else 'DESC'}, task_name, trajectory"
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        # File names are enough to tell runs of a task apart in a table
+        return [
+            dict(row, trajectory=Path(row['trajectory']).name)
+            for row in self.conn.execute(query, params)
+        ]
+
+
+def _format_number(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
+
+
+def _print_table(rows: List[Dict]) -> None:
+    if not rows:
+        print("(no results)")
+        return
+    headers = list(rows[0])
+    cells = [[_format_number(row[h]) for h in headers] for row in rows]
+    widths = [max(len(h), *(len(c[i]) for c in cells)) for i, h in enumerate(headers)]
+    print('  '.join(h.ljust(w) for h, w in zip(headers, widths)).rstrip())
+    print('  '.join('-' * w for w in widths))
+    for row in cells:
+        print('  '.join(c.ljust(w) for c, w in zip(row, widths)).rstrip())
+
+
+def build_cli() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Query a results store written by evaluator.py')
+    parser.add_argument('store', help='Results database (e.g. results.db)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    summary = commands.add_parser('summary', help='Aggregate score statistics')
+    summary.add_argument('--by', choices=['category'], default=None, help='Group by task category')
+
+    listing = commands.add_parser('list', help='Per-trajectory scores')
+    listing.add_argument('--sort', default='efficiency_score', help='Score column to sort by')
+    listing.add_argument('--asc', action='store_true', help='Sort ascending (default: descending)')
+    listing.add_argument('--limit', type=int, default=None, help='Maximum number of rows')
+    listing.add_argument('--category', default=None, help='Only tasks in this category (e.g. pm)')
+
+    show = commands.add_parser('show', help='One result in detail')
+    show.add_argument('task_name', help='Task name, or trajectory file name or path if the task has several runs')
+    show.add_argument('--paths', action='store_true', help='Print the golden and agent paths')
+    show.add_argument('--report', action='store_true', help='Render the diagnostic report')
+    show.add_argument('--format', choices=REPORT_FORMATS, default='text', help='Report format (default: text)')
+
+    export = commands.add_parser('export', help='Write the store as a results JSON file')
+    export.add_argument('output', help='Output JSON path')
+
+    sql = commands.add_parser('sql', help='Run a read-only SQL query')
+    sql.add_argument('query')
+    return parser
+
+
+def main() -> None:
+    cli = build_cli()
+    args = cli.parse_args()
+
+    if not Path(args.store).exists():
+        cli.error(f"Results store not found: {args.store}")
+
+    with ResultsStore(args.store) as store:
+        if args.command == 'summary':
+            _print_table(store.summary(args.by))
+
+        elif args.command == 'list':
+            try:
+                rows = store.list_scores(args.sort, args.asc, args.limit, args.category)
+            except ValueError as e:
+                cli.error(str(e))
+            _print_table(rows)
+
+        elif args.command == 'show':
+            try:
+                trajectory = store.find(args.task_name)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            result = store.get(trajectory, full=args.report) if trajectory else None
+            if result is None:
+                print(f"Error: No result for task: {args.task_name}")
+                sys.exit(1)
+            if args.report:
+                if 'error' in result:
+                    print(f"Error: {result['error']}")
+                    sys.exit(1)
+                # Report alone, so html/json output can be redirected to a file
+                print(render_result_report(result, args.format, aligner=ALIGNMENT_ENGINE.align))
+                return
+            print(json.dumps(result, indent=2))
+            if args.paths:
+                for path_name in ('golden', 'agent'):
+                    print(f"\n{path_name.capitalize()} Path Actions:")
+                    for i, action in enumerate(store.actions(trajectory, path_name), 1):
+                        print(f"  {i}. {action}")
+
+        elif args.command == 'export':
+            results = {}
+            for trajectory, result in store.iter_results(full=True):
+                results[result_key(results, result['task_name'], trajectory)] = result
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Exported {len(results)} results to {args.output}")
+
+        elif args.command == 'sql':
+            readonly = sqlite3.connect(f'file:{Path(args.store).resolve()}?mode=ro', uri=True)
+            readonly.row_factory = sqlite3.Row
+            try:
+                _print_table([dict(row) for row in readonly.execute(args.query)])
+            except sqlite3.Error as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            finally:
+                readonly.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,10 @@ TRAJECTORY_PATH=""
 OUTPUT_FILE=""
 REPORT_FLAG=""
 TASK_NAME=""
+WORKERS=""
+PARSE_CACHE=""
+INCREMENTAL_FLAG=""
+PROFILE_FLAG=""
 RUN_REFINE=false
 RUN_PARSE=false
 
@@ -34,6 +38,22 @@ while [[ $# -gt 0 ]]; do
             TASK_NAME="$2"
             shift 2
             ;;
+        --workers)
+            WORKERS="$2"
+            shift 2
+            ;;
+        --parse-cache)
+            PARSE_CACHE="$2"
+            shift 2
+            ;;
+        --incremental)
+            INCREMENTAL_FLAG="--incremental"
+            shift
+            ;;
+        --profile)
+            PROFILE_FLAG="--profile"
+            shift
+            ;;
         --refine)
             RUN_REFINE=true
             shift
@@ -49,6 +69,10 @@ while [[ $# -gt 0 ]]; do
             echo "  --output FILE          Save results to JSON file"
             echo "  --report              Print detailed diagnostic report"
             echo "  --task-name NAME      Specify task name explicitly"
+            echo "  --workers N           Evaluate a directory with N worker processes (0 = all CPUs)"
+            echo "  --parse-cache DIR     Cache parsed actions in DIR between runs"
+            echo "  --incremental         Only re-score changed trajectories (requires --output)"
+            echo "  --profile             Print per-stage timings (parse, normalize, align, ...)"
             echo "  --refine              Also run golden path refinement"
             echo "  --parse-only          Only parse trajectories (no evaluation)"
             echo "  --help, -h            Show this help message"
@@ -101,19 +125,37 @@ if [ -n "$TASK_NAME" ]; then
     EVAL_CMD="$EVAL_CMD --task-name \"$TASK_NAME\""
 fi
 
+if [ -n "$WORKERS" ]; then
+    EVAL_CMD="$EVAL_CMD --workers \"$WORKERS\""
+fi
+
+if [ -n "$PARSE_CACHE" ]; then
+    EVAL_CMD="$EVAL_CMD --parse-cache \"$PARSE_CACHE\""
+fi
+
+if [ -n "$INCREMENTAL_FLAG" ]; then
+    EVAL_CMD="$EVAL_CMD $INCREMENTAL_FLAG"
+fi
+
+if [ -n "$PROFILE_FLAG" ]; then
+    EVAL_CMD="$EVAL_CMD $PROFILE_FLAG"
+fi
+
 # Run parse-only mode
 if [ "$RUN_PARSE" = true ]; then
     echo "Running parser only..."
     if [ -d "$TRAJECTORY_PATH" ]; then
-        # For directories, we need to handle this differently
-        # The parser.py script processes files in current directory
-        echo "Note: parser.py processes files in current directory"
-        echo "Copying trajectory files to current directory..."
-        cp "$TRAJECTORY_PATH"/traj_*.json . 2>/dev/null || {
-            echo "Warning: No traj_*.json files found in $TRAJECTORY_PATH"
-        }
+        shopt -s nullglob
+        TRAJ_FILES=("$TRAJECTORY_PATH"/traj_*.json "$TRAJECTORY_PATH"/traj_*.json.gz "$TRAJECTORY_PATH"/traj_*.json.zst)
+        shopt -u nullglob
+        if [ ${#TRAJ_FILES[@]} -eq 0 ]; then
+            echo "Warning: No traj_*.json(.gz|.zst) files found in $TRAJECTORY_PATH"
+            exit 0
+        fi
+    else
+        TRAJ_FILES=("$TRAJECTORY_PATH")
     fi
-    python parser.py
+    python parser.py "${TRAJ_FILES[@]}" ${PARSE_CACHE:+--parse-cache "$PARSE_CACHE"}
     exit 0
 fi
 
@@ -133,7 +175,7 @@ if [ "$RUN_REFINE" = true ]; then
     if [ -f "$TRAJECTORY_PATH" ]; then
         # Single file
         FILENAME=$(basename "$TRAJECTORY_PATH")
-        TASK=$(echo "$FILENAME" | sed 's/traj_//' | sed 's/-image.json//' | sed 's/.json//')
+        TASK=$(echo "$FILENAME" | sed -E 's/\.(gz|zst)$//' | sed 's/traj_//' | sed 's/-image.json//' | sed 's/.json//')
         
         echo "Refining golden path for task: $TASK"
         python refine_golden_paths.py \
@@ -1,149 +1,284 @@
 """
 Scoring functions for comparing agent trajectories to golden paths.
 
-Provides path similarity, redundancy detection, efficiency
-scoring, and report generation.
+Provides path similarity, redundancy detection, runtime budgets,
+efficiency scoring, and report generation.
 """
 
-from typing import List, Dict, Tuple, Optional
-from difflib import SequenceMatcher
+from typing import Callable, List, Dict, NamedTuple, Sequence, Tuple, Optional
+from collections import deque
+from functools import lru_cache, partial
+import os
 import re
 
-def normalize_action_for_matching(action: str) -> str:
+from actions import Action, ActionLike, parse_action
+from alignment import (
+    DEFAULT_ORDER_METRIC, ORDER_METRICS, Alignment, AlignmentEngine, CompiledGoldenPath, GoldenPath,
+    GoldenPathTrie
+)
+from golden_paths import RUNTIME_BUDGETS
+from parser import RuntimeStats
+from profiling import PROFILER
+from reports import build_report, render_text
+from similarity import BACKEND_ENV, DEFAULT_BACKEND, SimilarityBackend
+
+class BashRule(NamedTuple):
+    """
+    One row of the bash command classification table.
+    
+    A rule applies when every all_of substring and at least one any_of
+    substring occur in the command. It contributes its component, the
+    first qualifier whose substrings occur, and anything returned by
+    extract(command).
     """
-    Normalize an action string for matching comparison.
+    component: Optional[str]
+    any_of: Tuple[str, ...]
+    all_of: Tuple[str, ...] = ()
+    qualifiers: Tuple[Tuple[Tuple[str, ...], str], ...] = ()
+    extract: Optional[Callable[[str], List[str]]] = None
+
+_GIT_CLONE_REPO_RE = re.compile(r'git clone\s+[^\s]+\s+([^\s/]+)')
+_CD_TARGET_RE = re.compile(r'cd\s+([^\s&|;]+)')
+
+def _git_clone_components(command: str) -> List[str]:
+    # Extract repo name if present
+    repo_match = _GIT_CLONE_REPO_RE.search(command)
+    return [f"repo_{repo_match.group(1)}"] if repo_match else []
+
+def _cd_components(command: str) -> List[str]:
+    # Directory change - extract meaningful target directory name
+    cd_match = _CD_TARGET_RE.search(command)
+    if cd_match:
+        dir_name = cd_match.group(1).split('/')[-1]
+        if dir_name:
+            return [f"cd_{dir_name}"]
+    return []
+
+# Checked in order; the first matching rule classifies the command
+BASH_RULES: Tuple[BashRule, ...] = (
+    BashRule('git_clone', ('git clone',), extract=_git_clone_components),
+    BashRule('git_ops', ('git init', 'git add', 'git commit', 'git push')),
+    BashRule('maven', ('mvn', 'maven'), qualifiers=((('install', 'package'), 'build'),)),
+    BashRule('python', ('python', 'pytest', 'pip install'), qualifiers=(
+        (('pytest',), 'test'),
+        (('venv', 'virtualenv'), 'venv'),
+        (('install',), 'install'),
+    )),
+    BashRule('start_server', ('start',), all_of=('bin/',)),
+    BashRule(None, ('cd /',), extract=_cd_components),
+)
+
+# Words skipped when falling back to the first significant command word
+_COMMON_BASH_WORDS = frozenset({'cd', '&&', '|', ';', 'source', 'export', 'mkdir', '-p'})
+
+class ActionNormalizer:
+    """
+    Normalize actions for matching comparison.
     Keeps more detail than before - preserves action types, recipients, file paths.
     Only normalizes truly variable content like message text and specific URLs.
+    
+    Actions are normalized from a single Action field per action type
+    (the command, URL, path or recipient); legacy action strings are parsed
+    into an Action first. Bash commands are classified with the BASH_RULES
+    table. Results are memoized in bounded LRU caches, one per action type
+    keyed on that field's value, plus one keyed on raw strings.
+    
+    Args:
+        maxsize: Maximum number of cached normalizations per cache
+        bash_rules: Ordered bash classification table
     """
-    action_type_match = re.match(r'^(\w+)\(', action)
-    if not action_type_match:
-        return action.lower().strip()
     
-    action_type = action_type_match.group(1)
+    DOMAIN_RE = re.compile(r'://([^/]+)(/.*)?')
+    WHITESPACE_RE = re.compile(r'\s+')
+    
+    # URL path fragment -> normalized goto_url target, first match wins
+    URL_SECTIONS = (
+        ('/channel/', 'channel'),
+        ('/direct/', 'direct'),
+        ('/directory/', 'directory'),
+        ('/home', 'home'),
+    )
     
-    if action_type == 'execute_bash':
+    # The Action field each action type is normalized from
+    NORMALIZED_FIELDS = {
+        'execute_bash': 'command',
+        'send_message': 'recipient',
+        'goto_url': 'url',
+        'read_file': 'path',
+        'write_file': 'path',
+    }
+    
+    def __init__(self, maxsize: int = 65536, bash_rules: Tuple[BashRule, ...] = BASH_RULES):
+        self.bash_rules = bash_rules
+        self.maxsize = maxsize
+        handlers = {
+            'execute_bash': self._normalize_bash,
+            'send_message': self._normalize_message,
+            'goto_url': self._normalize_url,
+            'read_file': self._normalize_file,
+            'write_file': self._normalize_file,
+        }
+        # action type -> (field index, handler, cached handler); keying each
+        # cache on one string field keeps lookups as cheap as for strings
+        self._handlers = {}
+        for action_type, field_name in self.NORMALIZED_FIELDS.items():
+            handler = partial(handlers[action_type], action_type)
+            cached = lru_cache(maxsize=maxsize)(PROFILER.timed('normalize')(handler))
+            self._handlers[action_type] = (Action._fields.index(field_name), handler, cached)
+        self._cached_text = lru_cache(maxsize=maxsize)(self._normalize_text)
+    
+    def __call__(self, action: ActionLike) -> str:
+        if isinstance(action, str):
+            return self._cached_text(action)
+        entry = self._handlers.get(action.type)
+        if entry is None:
+            return 'finish()' if action.type == 'finish' else action.render().lower().strip()
+        index, _, cached = entry
+        return cached(action[index])
+    
+    def _caches(self) -> List[Callable]:
+        return [self._cached_text] + [cached for _, _, cached in self._handlers.values()]
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Return cache statistics (hits, misses, currsize, maxsize) summed over all caches."""
+        infos = [cache.cache_info() for cache in self._caches()]
+        return {
+            'hits': sum(info.hits for info in infos),
+            'misses': sum(info.misses for info in infos),
+            'maxsize': self.maxsize,
+            'currsize': sum(info.currsize for info in infos),
+        }
+    
+    def cache_clear(self) -> None:
+        """Empty the caches and reset their statistics."""
+        for cache in self._caches():
+            cache.cache_clear()
+    
+    def classify_bash_command(self, command: str) -> List[str]:
+        """Return the matching components for a bash command."""
+        for rule in self.bash_rules:
+            if not all(s in command for s in rule.all_of):
+                continue
+            if not any(s in command for s in rule.any_of):
+                continue
+            components = [rule.component] if rule.component else []
+            for substrings, qualifier in rule.qualifiers:
+                if any(s in command for s in substrings):
+                    components.append(qualifier)
+                    break
+            if rule.extract is not None:
+                components.extend(rule.extract(command))
+            return components
+        return []
+    
+    @PROFILER.timed('normalize')
+    def _normalize_text(self, text: str) -> str:
+        action = parse_action(text)
+        if action is None:
+            return text.lower().strip()
+        if action.type == 'finish':
+            return 'finish()'
+        entry = self._handlers.get(action.type)
+        if entry is None:
+            return text.lower().strip()
+        index, handler, _ = entry
+        return handler(action[index])
+    
+    def _normalize_bash(self, action_type: str, command: Optional[str]) -> str:
         # Extract meaningful parts of bash commands for matching
-        command_match = re.search(r"command='([^']+)'", action)
-        if command_match:
-            command = command_match.group(1)
-            command = re.sub(r'\s+', ' ', command.strip())
-            
-            # Extract key command components
-            components = []
-            
-            # Check for common command patterns
-            if 'git clone' in command:
-                components.append('git_clone')
-                # Extract repo name if present
-                repo_match = re.search(r'git clone\s+[^\s]+\s+([^\s/]+)', command)
-                if repo_match:
-                    components.append(f"repo_{repo_match.group(1)}")
-            elif 'git init' in command or 'git add' in command or 'git commit' in command or 'git push' in command:
-                components.append('git_ops')
-            elif 'mvn' in command or 'maven' in command:
-                components.append('maven')
-                if 'install' in command or 'package' in command:
-                    components.append('build')
-            elif 'python' in command or 'pytest' in command or 'pip install' in command:
-                components.append('python')
-                if 'pytest' in command:
-                    components.append('test')
-                elif 'venv' in command or 'virtualenv' in command:
-                    components.append('venv')
-                elif 'install' in command:
-                    components.append('install')
-            elif 'bin/' in command and ('start' in command or 'sh start' in command):
-                components.append('start_server')
-            elif 'cd /workspace' in command or 'cd /' in command:
-                # Directory change - extract target directory
-                cd_match = re.search(r'cd\s+([^\s&|;]+)', command)
-                if cd_match:
-                    dir_path = cd_match.group(1)
-                    # Extract meaningful directory name
-                    dir_name = dir_path.split('/')[-1]
-                    if dir_name:
-                        components.append(f"cd_{dir_name}")
-            
-            # If no specific patterns matched, try to extract first significant word
-            if not components:
-                # Split command and look for first non-common word
-                words = command.split()
-                common_words = {'cd', '&&', '|', ';', 'source', 'export', 'mkdir', '-p'}
-                for word in words:
-                    if word not in common_words and len(word) > 2:
-                        components.append(f"cmd_{word}")
-                        break
-            
-            if components:
-                return f"{action_type}({'_'.join(components)})"
-            else:
-                return f"{action_type}(unknown)"
-        return f"{action_type}()"
+        if not command:
+            return f"{action_type}()"
+        command = self.WHITESPACE_RE.sub(' ', command.strip())
+        
+        components = self.classify_bash_command(command)
+        
+        # If no specific patterns matched, try to extract first significant word
+        if not components:
+            for word in command.split():
+                if word not in _COMMON_BASH_WORDS and len(word) > 2:
+                    components.append(f"cmd_{word}")
+                    break
+        
+        if components:
+            return f"{action_type}({'_'.join(components)})"
+        return f"{action_type}(unknown)"
     
-    elif action_type == 'send_message':
+    def _normalize_message(self, action_type: str, recipient: Optional[str]) -> str:
         # Keep recipient if present
-        recipient_match = re.search(r"recipient='([^']+)'", action)
-        if recipient_match:
-            recipient = recipient_match.group(1)
+        if recipient:
             return f"{action_type}(recipient='{recipient}')"
         # No recipient means it's a channel message
         return f"{action_type}(channel)"
     
-    elif action_type == 'goto_url':
+    def _normalize_url(self, action_type: str, url: Optional[str]) -> str:
         # Keep domain and path type
-        url_match = re.search(r"url='([^']+)'", action)
-        if url_match:
-            url = url_match.group(1)
-            domain_match = re.search(r'://([^/]+)(/.*)?', url)
+        if url:
+            domain_match = self.DOMAIN_RE.search(url)
             if domain_match:
-                domain = domain_match.group(1)
                 path = domain_match.group(2) or ''
-                if '/channel/' in path:
-                    return f"{action_type}(channel)"
-                elif '/direct/' in path:
-                    return f"{action_type}(direct)"
-                elif '/directory/' in path:
-                    return f"{action_type}(directory)"
-                elif '/home' in path:
-                    return f"{action_type}(home)"
-                return f"{action_type}({domain})"
+                for fragment, section in self.URL_SECTIONS:
+                    if fragment in path:
+                        return f"{action_type}({section})"
+                return f"{action_type}({domain_match.group(1)})"
         return f"{action_type}()"
     
-    elif action_type in ['read_file', 'write_file']:
+    def _normalize_file(self, action_type: str, path: Optional[str]) -> str:
         # Keep file path structure but normalize
-        path_match = re.search(r"path='([^']+)'", action)
-        if path_match:
-            path = path_match.group(1)
-            # Keep directory structure
-            if '/workspace/' in path:
-                filename = path.split('/')[-1]
-                return f"{action_type}(workspace/{filename})"
-            elif '/Documents/' in path:
-                # Keep subdirectory structure
-                parts = path.split('/Documents/')
-                if len(parts) > 1:
-                    subpath = parts[1]
-                    return f"{action_type}(Documents/{subpath.split('/')[0]})"
-                return f"{action_type}(Documents)"
-            elif '/instruction/' in path:
-                filename = path.split('/')[-1]
-                return f"{action_type}(instruction/{filename})"
-            return f"{action_type}({path.split('/')[-1]})"
-        return f"{action_type}()"
-    
-    elif action_type == 'finish':
-        return 'finish()'
-    
-    return action.lower().strip()
+        if not path:
+            return f"{action_type}()"
+        if '/workspace/' in path:
+            return f"{action_type}(workspace/{path.split('/')[-1]})"
+        elif '/Documents/' in path:
+            # Keep subdirectory structure
+            subpath = path.split('/Documents/')[1]
+            return f"{action_type}(Documents/{subpath.split('/')[0]})"
+        elif '/instruction/' in path:
+            return f"{action_type}(instruction/{path.split('/')[-1]})"
+        return f"{action_type}({path.split('/')[-1]})"
+
+ACTION_NORMALIZER = ActionNormalizer()
 
-def action_similarity(action_1: str, action_2: str) -> float:
+def normalize_action_for_matching(action: ActionLike) -> str:
     """
-    Calculate similarity between two actions using normalized comparison.
-    For execute_bash commands, requires exact match or very high similarity.
+    Normalize an action (or legacy action string) for matching comparison.
+    Delegates to the shared, memoized ACTION_NORMALIZER.
+    """
+    return ACTION_NORMALIZER(action)
+
+# Fuzzy similarity backend (see similarity.py); difflib unless overridden
+SIMILARITY = SimilarityBackend(os.environ.get(BACKEND_ENV, DEFAULT_BACKEND))
+
+def set_similarity_backend(name: str) -> None:
+    """
+    Select the fuzzy similarity backend ('difflib', 'indel', 'rapidfuzz').
+    Also exported through the environment so worker processes match.
+    """
+    SIMILARITY.set_backend(name)
+    os.environ[BACKEND_ENV] = name
+
+# Order metric behind order_score (see alignment.ORDER_METRICS), selectable
+# like the similarity backend and exported to worker processes the same way
+ORDER_METRIC_ENV = 'ACTION_ORDER_METRIC'
+ORDER_METRIC = os.environ.get(ORDER_METRIC_ENV, DEFAULT_ORDER_METRIC)
+
+def set_order_metric(name: str) -> None:
+    """
+    Select the metric reported as order_score ('golden', 'lis', 'kendall').
+    Also exported through the environment so worker processes match.
+    """
+    global ORDER_METRIC
+    if name not in ORDER_METRICS:
+        raise ValueError(f"Unknown order metric {name!r}; expected one of {', '.join(ORDER_METRICS)}")
+    ORDER_METRIC = name
+    os.environ[ORDER_METRIC_ENV] = name
+
+def normalized_similarity(norm_1: str, norm_2: str, score_cutoff: float = 0.0) -> float:
+    """
+    Similarity between two already-normalized actions.
+    Bash commands must match exactly; other actions use fuzzy matching.
+    Pairs that cannot reach score_cutoff may return 0.0 without being
+    scored exactly.
     """
-    norm_1 = normalize_action_for_matching(action_1)
-    norm_2 = normalize_action_for_matching(action_2)
-    
     # Exact match after normalization
     if norm_1 == norm_2:
         return 1.0
@@ -152,151 +287,223 @@ def action_similarity(action_1: str, action_2: str) -> float:
     if norm_1.startswith('execute_bash(') and norm_2.startswith('execute_bash('):
         return 0.0  # Different bash commands don't match
     
-    # Use SequenceMatcher for fuzzy matching for other action types
-    similarity = SequenceMatcher(None, norm_1, norm_2).ratio()
-    
-    # For other action types, still allow fuzzy matching
-    return similarity
+    # Fuzzy matching for other action types (memoized per pair)
+    return SIMILARITY(norm_1, norm_2, score_cutoff)
+
+def action_similarity(action_1: ActionLike, action_2: ActionLike) -> float:
+    """
+    Calculate similarity between two actions using normalized comparison.
+    For execute_bash commands, requires exact match or very high similarity.
+    """
+    return normalized_similarity(
+        normalize_action_for_matching(action_1),
+        normalize_action_for_matching(action_2)
+    )
+
+# Shared engine: each action is normalized once per alignment
+ALIGNMENT_ENGINE = AlignmentEngine(
+    normalizer=ACTION_NORMALIZER,
+    similarity=normalized_similarity,
+    exact_only_types=('execute_bash',)
+)
+
+def compile_golden_path(golden_path: List[str]) -> CompiledGoldenPath:
+    """
+    Precompute the normalized forms and lookup tables of a golden path.
+    The result can be passed as golden_path to any scoring function.
+    """
+    return ALIGNMENT_ENGINE.compile(golden_path)
+
+def compile_golden_variants(golden_paths: Sequence[GoldenPath]) -> GoldenPathTrie:
+    """
+    Compile alternative golden paths of one task into a trie of normalized
+    steps, for calculate_best_variant_score. The first path is the primary.
+    """
+    return ALIGNMENT_ENGINE.compile_variants(golden_paths)
 
 def align_golden_to_agent(
-    golden_path: List[str],
-    agent_path: List[str],
+    golden_path: GoldenPath,
+    agent_path: Sequence[ActionLike],
     min_similarity: float = 0.45
-) -> Tuple[List[Tuple[Optional[str], Optional[str], float]], set[int]]:
+) -> Tuple[List[Tuple[Optional[ActionLike], Optional[ActionLike], float]], set[int]]:
     """
-    Align golden path steps to agent path steps using greedy matching.
+    Align golden path steps to agent path steps using optimal assignment.
     Returns list of (golden_action, matched_agent_action, similarity) tuples
     and set of used agent indices.
     """
-    matches: List[Tuple[Optional[str], Optional[str], float]] = []
-    used_indices: set[int] = set()
-    
-    for golden_action in golden_path:
-        best_idx = None
-        best_score = 0.0
-        
-        for idx, agent_action in enumerate(agent_path):
-            if idx in used_indices:
-                continue
-            
-            score = action_similarity(golden_action, agent_action)
-            if score > best_score:
-                best_score = score
-                best_idx = idx
-        
-        if best_idx is not None and best_score >= min_similarity:
-            used_indices.add(best_idx)
-            matches.append((golden_action, agent_path[best_idx], best_score))
-        else:
-            matches.append((golden_action, None, 0.0))
-    
-    return matches, used_indices
+    alignment = ALIGNMENT_ENGINE.align(golden_path, agent_path, min_similarity)
+    matches: List[Tuple[Optional[ActionLike], Optional[ActionLike], float]] = [
+        (golden_path[g], agent_path[idx] if idx is not None else None, score)
+        for g, idx, score in alignment.pairs
+    ]
+    return matches, alignment.used_indices
 
 def calculate_coverage_score(
-    golden_path: List[str],
-    agent_path: List[str],
-    min_similarity: float = 0.45
+    golden_path: GoldenPath,
+    agent_path: Sequence[ActionLike],
+    min_similarity: float = 0.45,
+    agent_norms: Optional[Sequence[str]] = None,
+    order_metric: Optional[str] = None,
+    alignment: Optional[Alignment] = None
 ) -> Dict[str, float]:
     """
     Calculate coverage-based similarity: how many golden path steps were matched.
     Returns coverage score (0-1) and order score (0-1).
+    order_score follows order_metric (default: ORDER_METRIC); order_lis and
+    order_kendall are always reported.
+    agent_norms optionally supplies the agent actions already normalized,
+    and alignment an already computed alignment of the two paths.
     """
     if not golden_path:
-        return {'coverage': 1.0, 'order_score': 1.0, 'matched_count': 0, 'total_count': 0}
+        return {'coverage': 1.0, 'order_score': 1.0, 'order_lis': 1.0, 'order_kendall': 1.0,
+                'matched_count': 0, 'total_count': 0}
     
     if not agent_path:
-        return {'coverage': 0.0, 'order_score': 0.0, 'matched_count': 0, 'total_count': len(golden_path)}
+        return {'coverage': 0.0, 'order_score': 0.0, 'order_lis': 0.0, 'order_kendall': 0.0,
+                'matched_count': 0, 'total_count': len(golden_path)}
     
-    matches, used_indices = align_golden_to_agent(golden_path, agent_path, min_similarity)
+    if alignment is None:
+        alignment = ALIGNMENT_ENGINE.align(golden_path, agent_path, min_similarity, agent_norms)
     
     # Coverage: how many golden steps were matched
-    matched_count = sum(1 for _, matched, _ in matches if matched is not None)
+    matched_count = alignment.matched_count
     coverage = matched_count / len(golden_path)
     
-    # Order score: how well the order matches (reward matching in sequence)
-    order_score = 0.0
-    if matched_count > 0:
-        matched_indices = [i for i, (_, matched, _) in enumerate(matches) if matched is not None]
-        if len(matched_indices) > 1:
-            # Check if matched steps are in increasing order
-            is_ordered = all(matched_indices[i] < matched_indices[i+1] 
-                           for i in range(len(matched_indices) - 1))
-            if is_ordered:
-                order_score = 1.0
-            else:
-                # Partial order score based on how many are in order
-                ordered_pairs = sum(1 for i in range(len(matched_indices) - 1)
-                                  if matched_indices[i] < matched_indices[i+1])
-                order_score = ordered_pairs / (len(matched_indices) - 1) if len(matched_indices) > 1 else 1.0
-        else:
-            order_score = 1.0
-    
-    # Average similarity of matched steps
-    matched_similarities = [sim for _, _, sim in matches if sim > 0]
-    avg_similarity = sum(matched_similarities) / len(matched_similarities) if matched_similarities else 0.0
+    # Order score and average similarity come from the same alignment pass
+    order_score = alignment.order(order_metric or ORDER_METRIC)
+    avg_similarity = alignment.avg_similarity
     
     return {
         'coverage': coverage,
         'order_score': order_score,
+        'order_lis': alignment.lis_order,
+        'order_kendall': alignment.kendall_order,
         'matched_count': matched_count,
         'total_count': len(golden_path),
         'avg_similarity': avg_similarity
     }
 
-def detect_harmful_redundancy(agent_path: List[str], window_size: int = 5) -> float:
-    """
-    Detect harmful redundancy: repeated identical actions within a context window.
-    Only penalizes true redundancy, not legitimate repetition (e.g., different files, recipients).
-    Returns a penalty score between 0 and 1.
+class RedundancyTracker:
     """
-    if len(agent_path) <= 1:
-        return 0.0
+    Streaming detector for harmful redundancy: repeated identical actions
+    within a sliding context window, plus excessive repetition overall.
     
-    normalized_actions = [normalize_action_for_matching(action) for action in agent_path]
+    Actions can be fed one at a time while a trajectory is still being
+    written. Each step adds one action to the window and evicts one, so
+    the cost per action is O(1) regardless of window size.
     
-    redundancy_count = 0
-    total_windows = 0
+    Args:
+        window_size: Number of consecutive actions in the context window
+        normalizer: Maps raw actions to the form used to detect repeats
+    """
     
-    # Check redundancy within sliding windows
-    for i in range(len(normalized_actions) - window_size + 1):
-        window = normalized_actions[i:i + window_size]
-        total_windows += 1
+    # An action occurring this many times in one window is redundant
+    WINDOW_REPEAT_THRESHOLD = 3
+    # An action occurring this many times overall is excessive
+    OVERALL_REPEAT_THRESHOLD = 10
+    
+    def __init__(self, window_size: int = 5, normalizer: Callable[[ActionLike], str] = None):
+        if window_size < 1:
+            raise ValueError(f"window_size must be at least 1, got {window_size}")
+        self.window_size = window_size
+        self.normalizer = normalizer or normalize_action_for_matching
+        self.action_count = 0
+        self.redundancy_count = 0
+        self.excessive_redundancy = 0
+        self._window = deque()
+        self._window_counts: Dict[str, int] = {}
+        self._overall_counts: Dict[str, int] = {}
+        # Sum of (count - 2) over actions repeated 3+ times in the window
+        self._window_excess = 0
+    
+    def add(self, action: ActionLike) -> int:
+        """
+        Add the next agent action.
+        
+        Returns:
+            Number of redundant occurrences (3rd and later repeats) in the
+            current window; a non-zero value flags a repetition loop
+        """
+        norm = self.normalizer(action)
+        window_limit = self.WINDOW_REPEAT_THRESHOLD - 1
+        overall_limit = self.OVERALL_REPEAT_THRESHOLD - 1
+        
+        if len(self._window) == self.window_size:
+            evicted = self._window.popleft()
+            count = self._window_counts[evicted]
+            if count > window_limit:
+                self._window_excess -= 1
+            if count == 1:
+                del self._window_counts[evicted]
+            else:
+                self._window_counts[evicted] = count - 1
+        
+        count = self._window_counts.get(norm, 0)
+        if count >= window_limit:
+            self._window_excess += 1
+        self._window_counts[norm] = count + 1
+        self._window.append(norm)
         
-        # Count duplicates in this window
-        action_counts = {}
-        for action in window:
-            action_counts[action] = action_counts.get(action, 0) + 1
+        overall = self._overall_counts.get(norm, 0)
+        if overall >= overall_limit:
+            self.excessive_redundancy += 1  # Penalty for 10th+ occurrence
+        self._overall_counts[norm] = overall + 1
         
-        # Penalize actions that appear 3+ times in the window
-        for action, count in action_counts.items():
-            if count >= 3:
-                redundancy_count += (count - 2)  # Penalty for 3rd+ occurrence
-    
-    # Also check overall redundancy for very repetitive patterns
-    overall_counts = {}
-    for action in normalized_actions:
-        overall_counts[action] = overall_counts.get(action, 0) + 1
-    
-    # Penalize actions that appear many times overall (e.g., 10+ times)
-    excessive_redundancy = 0
-    for action, count in overall_counts.items():
-        if count >= 10:
-            excessive_redundancy += (count - 9)  # Penalty for 10th+ occurrence
-    
-    # Combine window-based and overall redundancy
-    window_penalty = min(redundancy_count / max(len(agent_path), 1), 1.0) if total_windows > 0 else 0.0
-    overall_penalty = min(excessive_redundancy / max(len(agent_path), 1), 1.0)
-    
-    # Take the maximum (worst case)
-    redundancy_penalty = min(max(window_penalty, overall_penalty * 0.5), 1.0)
-    
-    return redundancy_penalty
+        self.action_count += 1
+        # Only full windows are scored
+        if len(self._window) == self.window_size:
+            self.redundancy_count += self._window_excess
+        return self._window_excess
+    
+    def extend(self, actions: Sequence[ActionLike]) -> None:
+        """Add several actions in order."""
+        for action in actions:
+            self.add(action)
+    
+    def penalty(self) -> float:
+        """
+        Redundancy penalty between 0 and 1 for the actions seen so far.
+        """
+        if self.action_count <= 1:
+            return 0.0
+        
+        # Combine window-based and overall redundancy
+        window_penalty = min(self.redundancy_count / self.action_count, 1.0)
+        overall_penalty = min(self.excessive_redundancy / self.action_count, 1.0)
+        
+        # Take the maximum (worst case)
+        return min(max(window_penalty, overall_penalty * 0.5), 1.0)
+
+def detect_harmful_redundancy(
+    agent_path: Sequence[ActionLike],
+    window_size: int = 5,
+    agent_norms: Optional[Sequence[str]] = None
+) -> float:
+    """
+    Detect harmful redundancy: repeated identical actions within a context window.
+    Only penalizes true redundancy, not legitimate repetition (e.g., different files, recipients).
+    Returns a penalty score between 0 and 1.
+    agent_norms optionally supplies the agent actions already normalized.
+    """
+    with PROFILER.stage('redundancy'):
+        if agent_norms is None:
+            tracker = RedundancyTracker(window_size)
+            tracker.extend(agent_path)
+        else:
+            tracker = RedundancyTracker(window_size, normalizer=str)
+            tracker.extend(agent_norms)
+        return tracker.penalty()
 
-def calculate_path_length_efficiency(agent_path_length: int, golden_path_length: int, coverage: float = 1.0) -> float:
+def calculate_path_length_efficiency(
+    agent_path_length: int,
+    golden_path_length: int,
+    coverage: float = 1.0,
+    high_coverage_threshold: float = 0.9
+) -> float:
     """
     Calculate efficiency penalty/bonus based on path length ratio.
     Returns a score between 0 and 1, where 1 is optimal length.
-    Reduces penalties when coverage is high (≥0.9).
+    Reduces penalties when coverage is high (≥high_coverage_threshold).
     """
     if golden_path_length == 0:
         return 1.0 if agent_path_length == 0 else 0.0
@@ -318,77 +525,156 @@ def calculate_path_length_efficiency(agent_path_length: int, golden_path_length:
         base_penalty = 0.25 + (ratio - 2.0) * 0.15
         base_penalty = min(base_penalty, 0.5)  # Cap maximum penalty
     
-    # Reduce penalty by 50% if coverage is high (≥0.9)
-    if coverage >= 0.9:
+    # Reduce penalty by 50% if coverage is high (≥0.9 by default)
+    if coverage >= high_coverage_threshold:
         base_penalty = base_penalty * 0.5
     
     return max(0.0, 1.0 - base_penalty)
 
+def budget_efficiency(actual: Optional[float], budget: Optional[float]) -> Optional[float]:
+    """
+    1.0 within budget, budget / actual above it (5x the budget gives 0.2).
+    None if either value is unknown.
+    """
+    if actual is None or budget is None:
+        return None
+    if actual <= budget:
+        return 1.0
+    return budget / actual
+
+def calculate_runtime_efficiency(
+    runtime: RuntimeStats,
+    budget: Optional[Dict[str, float]] = None
+) -> Dict[str, Optional[float]]:
+    """
+    Runtime statistics of a trajectory plus its efficiency against the
+    task's budget (see RUNTIME_BUDGETS). Components without a budget, or
+    without data (no timestamps / usage metadata), are None.
+    """
+    metrics: Dict[str, Optional[float]] = runtime._asdict()
+    budget = budget or {}
+    for field, component in RUNTIME_BUDGETS.items():
+        actual = metrics[field]
+        if field == 'total_tokens' and not runtime.llm_calls:
+            actual = None
+        metrics[component] = budget_efficiency(actual, budget.get(field))
+    return metrics
+
 def calculate_efficiency_score(
-    agent_path: List[str],
-    golden_path: List[str],
+    agent_path: Sequence[ActionLike],
+    golden_path: GoldenPath,
     coverage_weight: float = 0.6,
     order_weight: float = 0.15,
     length_weight: float = 0.1,
-    redundancy_weight: float = 0.15
+    redundancy_weight: float = 0.15,
+    high_coverage_threshold: float = 0.9,
+    penalty_cap: float = 15.0,
+    completeness_bonus_points: float = 10.0,
+    runtime: Optional[RuntimeStats] = None,
+    budget: Optional[Dict[str, float]] = None,
+    time_weight: float = 0.1,
+    token_weight: float = 0.1,
+    order_metric: Optional[str] = None,
+    alignment: Optional[Alignment] = None,
+    agent_norms: Optional[Sequence[str]] = None,
+    redundancy: Optional[float] = None
 ) -> Dict[str, float]:
     """
     Calculate overall efficiency score comparing agent path to golden path.
     Uses coverage-based scoring instead of sequence similarity.
     Rewards complete paths more heavily.
     
+    With runtime stats, wall-clock time and token usage are scored against
+    the task's budget: each budgeted component costs up to its weight in
+    points as the agent overruns the budget.
+    
     Args:
-        agent_path: List of standardized action strings from agent trajectory
-        golden_path: List of standardized action strings from golden path
+        agent_path: Agent actions (Action records from the parser, or
+            legacy action strings)
+        golden_path: List of standardized action strings from golden path,
+            or its CompiledGoldenPath
         coverage_weight: Weight for coverage component (default 0.6, increased)
         order_weight: Weight for order preservation (default 0.15)
         length_weight: Weight for path length efficiency (default 0.1, reduced)
         redundancy_weight: Weight for redundancy penalty (default 0.15, reduced)
+        high_coverage_threshold: Coverage at which length and redundancy
+            penalties are halved (default 0.9)
+        penalty_cap: Maximum combined length + redundancy penalty points
+            when coverage is perfect (default 15)
+        completeness_bonus_points: Bonus for perfect coverage and good
+            order (default 10)
+        runtime: Optional RuntimeStats of the trajectory (from the parser)
+        budget: Optional task budget, e.g. {'wall_time': 120,
+            'total_tokens': 200000}
+        time_weight: Weight for wall-clock time within budget (default 0.1)
+        token_weight: Weight for token usage within budget (default 0.1)
+        order_metric: Metric behind order_score, one of
+            alignment.ORDER_METRICS (default: ORDER_METRIC, 'lis' unless
+            selected with set_order_metric)
+        alignment: Optional precomputed alignment of golden_path to agent_path
+        agent_norms: Optional agent actions already normalized
+        redundancy: Optional precomputed detect_harmful_redundancy(agent_path)
     
     Returns:
         Dictionary containing:
         - efficiency_score: Overall score (0-100)
         - coverage: Coverage score (0-1)
-        - order_score: Order preservation score (0-1)
+        - order_score: Order preservation score (0-1) under order_metric
+        - order_lis: Longest in-order share of matched agent steps (0-1)
+        - order_kendall: 1 - Kendall tau distance of matched agent steps (0-1)
         - length_efficiency: Path length efficiency (0-1)
         - redundancy_penalty: Redundancy penalty (0-1)
         - path_similarity: Legacy compatibility (coverage score)
         - path_length_ratio: Ratio of agent path length to golden path length
         - completeness_bonus: Bonus points for perfect coverage and order
+        With runtime stats, also every RuntimeStats field plus:
+        - time_efficiency: Wall time within budget (0-1, None if unbudgeted)
+        - token_efficiency: Tokens within budget (0-1, None if unbudgeted)
+        - runtime_penalty: Points deducted for exceeding the budget
     """
     # Calculate coverage-based metrics
-    coverage_metrics = calculate_coverage_score(golden_path, agent_path)
+    # Each agent action is normalized once, for alignment and redundancy
+    if agent_norms is None:
+        agent_norms = [ACTION_NORMALIZER(action) for action in agent_path]
+    coverage_metrics = calculate_coverage_score(
+        golden_path, agent_path, agent_norms=agent_norms, order_metric=order_metric,
+        alignment=alignment
+    )
     coverage = coverage_metrics['coverage']
     order_score = coverage_metrics['order_score']
     
     # Calculate path length efficiency (with coverage-aware penalty reduction)
-    length_efficiency = calculate_path_length_efficiency(len(agent_path), len(golden_path), coverage)
+    length_efficiency = calculate_path_length_efficiency(
+        len(agent_path), len(golden_path), coverage, high_coverage_threshold
+    )
     
     # Calculate harmful redundancy
-    redundancy_penalty_raw = detect_harmful_redundancy(agent_path)
+    if redundancy is None:
+        redundancy = detect_harmful_redundancy(agent_path, agent_norms=agent_norms)
+    redundancy_penalty_raw = redundancy
     
-    # Reduce redundancy penalty by 50% if coverage is high (≥0.9)
-    if coverage >= 0.9:
+    # Reduce redundancy penalty by 50% if coverage is high (≥0.9 by default)
+    if coverage >= high_coverage_threshold:
         redundancy_penalty = redundancy_penalty_raw * 0.5
     else:
         redundancy_penalty = redundancy_penalty_raw
     
     # Cap total penalties when coverage is perfect
     if coverage >= 1.0:
-        # Maximum total penalty is 15 points when coverage is perfect
+        # Maximum total penalty is penalty_cap (15) points when coverage is perfect
         length_penalty = (1.0 - length_efficiency) * length_weight * 100
         redundancy_penalty_points = redundancy_penalty * redundancy_weight * 100
         total_penalty = length_penalty + redundancy_penalty_points
-        if total_penalty > 15:
+        if total_penalty > penalty_cap:
             # Scale down penalties proportionally
-            scale_factor = 15 / total_penalty
+            scale_factor = penalty_cap / total_penalty
             length_efficiency = 1.0 - (1.0 - length_efficiency) * scale_factor
             redundancy_penalty = redundancy_penalty * scale_factor
     
     # Calculate completeness bonus
     completeness_bonus = 0.0
     if coverage >= 1.0 and order_score >= 0.9:
-        completeness_bonus = 10.0  # 10 point bonus for perfect coverage and good order
+        completeness_bonus = completeness_bonus_points  # 10 point bonus for perfect coverage and good order
     
     # Calculate path length ratio
     if len(golden_path) > 0:
@@ -405,12 +691,24 @@ def calculate_efficiency_score(
         completeness_bonus
     )
     
+    runtime_metrics = {}
+    if runtime is not None:
+        runtime_metrics = calculate_runtime_efficiency(runtime, budget)
+        runtime_penalty = 0.0
+        for component, weight in (('time_efficiency', time_weight), ('token_efficiency', token_weight)):
+            if runtime_metrics[component] is not None:
+                runtime_penalty += weight * (1.0 - runtime_metrics[component]) * 100
+        runtime_metrics['runtime_penalty'] = runtime_penalty
+        efficiency_score -= runtime_penalty
+    
     efficiency_score = max(0, min(100, efficiency_score))
     
     return {
         'efficiency_score': efficiency_score,
         'coverage': coverage,
         'order_score': order_score,
+        'order_lis': coverage_metrics['order_lis'],
+        'order_kendall': coverage_metrics['order_kendall'],
         'length_efficiency': length_efficiency,
         'redundancy_penalty': redundancy_penalty,
         'path_similarity': coverage,  # Legacy compatibility
@@ -420,70 +718,64 @@ def calculate_efficiency_score(
         'matched_count': coverage_metrics['matched_count'],
         'total_count': coverage_metrics['total_count'],
         'avg_similarity': coverage_metrics['avg_similarity'],
-        'completeness_bonus': completeness_bonus
+        'completeness_bonus': completeness_bonus,
+        **runtime_metrics
     }
 
+def calculate_best_variant_score(
+    agent_path: Sequence[ActionLike],
+    golden_paths: GoldenPathTrie,
+    min_similarity: float = 0.45,
+    **kwargs
+) -> Tuple[int, Dict[str, float]]:
+    """
+    Score an agent path against every variant of a task's golden path and
+    keep the best-scoring one.
+    
+    The agent actions are normalized and checked for redundancy once. All
+    variants are aligned together (AlignmentEngine.align_variants), so the
+    assignment for a prefix shared by several variants is solved once. The final scoring of each variant is cheap and runs per variant.
+    
+    Args:
+        agent_path: Agent actions
+        golden_paths: GoldenPathTrie of the task's variants (see
+            compile_golden_variants)
+        min_similarity: Minimum similarity for a golden step to be matched
+        **kwargs: Passed on to calculate_efficiency_score
+    
+    Returns:
+        (variant index, scores of that variant). With more than one variant
+        the scores also hold golden_variant and golden_variants (count).
+    """
+    agent_norms = [ACTION_NORMALIZER(action) for action in agent_path]
+    redundancy = detect_harmful_redundancy(agent_path, agent_norms=agent_norms)
+    alignments = ALIGNMENT_ENGINE.align_variants(
+        golden_paths, agent_path, min_similarity, agent_norms
+    )
+    
+    best_index, best_scores = 0, None
+    for index, (variant, alignment) in enumerate(zip(golden_paths.variants, alignments)):
+        scores = calculate_efficiency_score(
+            agent_path, variant, alignment=alignment, agent_norms=agent_norms,
+            redundancy=redundancy, **kwargs
+        )
+        # Ties go to the earlier variant (the primary path first)
+        if best_scores is None or scores['efficiency_score'] > best_scores['efficiency_score']:
+            best_index, best_scores = index, scores
+    
+    if len(golden_paths) > 1:
+        best_scores['golden_variant'] = best_index
+        best_scores['golden_variants'] = len(golden_paths)
+    return best_index, best_scores
+
 def generate_diagnostic_report(
-    agent_path: List[str],
+    agent_path: Sequence[ActionLike],
     golden_path: List[str],
     scores: Dict[str, float]
 ) -> str:
     """
     Generate a report comparing agent path to golden path.
+    See reports.py for JSON/HTML output and step-match annotations.
     """
-    report = []
-    report.append("=" * 60)
-    report.append("EFFICIENCY EVALUATION REPORT")
-    report.append("=" * 60)
-    report.append("")
-    
-    report.append(f"Overall Efficiency Score: {scores['efficiency_score']:.2f}/100")
-    report.append("")
-    
-    report.append("Component Scores:")
-    report.append(f"  Coverage: {scores['coverage']:.3f} ({scores.get('matched_count', 0)}/{scores.get('total_count', 0)} golden steps matched)")
-    report.append(f"  Order Score: {scores['order_score']:.3f} (0-1)")
-    report.append(f"  Length Efficiency: {scores['length_efficiency']:.3f} (0-1)")
-    report.append(f"  Redundancy Penalty: {scores['redundancy_penalty']:.3f} (0-1)")
-    report.append(f"  Path Length Ratio: {scores['path_length_ratio']:.2f}x")
-    if 'avg_similarity' in scores:
-        report.append(f"  Average Match Similarity: {scores['avg_similarity']:.3f}")
-    if 'completeness_bonus' in scores and scores['completeness_bonus'] > 0:
-        report.append(f"  Completeness Bonus: +{scores['completeness_bonus']:.1f} points")
-    report.append("")
-    
-    report.append("Path Comparison:")
-    report.append(f"  Golden Path Length: {scores['golden_path_length']} actions")
-    report.append(f"  Agent Path Length: {scores['agent_path_length']} actions")
-    report.append("")
-    
-    report.append("Golden Path Actions:")
-    for i, action in enumerate(golden_path, 1):
-        report.append(f"  {i}. {action}")
-    report.append("")
-    
-    report.append("Agent Path Actions:")
-    for i, action in enumerate(agent_path, 1):
-        report.append(f"  {i}. {action}")
-    report.append("")
-    
-    report.append("Summary of results:")
-    if scores['coverage'] < 0.5:
-        report.append("  - Agent path covers less than half of optimal steps")
-    elif scores['coverage'] < 0.8:
-        report.append("  - Agent path covers most optimal steps")
-    else:
-        report.append("  - Agent path covers most/all optimal steps")
-    
-    if scores['redundancy_penalty'] > 0.3:
-        report.append("  - High redundancy detected")
-    if scores['path_length_ratio'] > 2.0:
-        report.append("  - Agent path is significantly longer than optimal")
-    elif scores['path_length_ratio'] > 1.5:
-        report.append("  - Agent path is moderately longer than optimal")
-    if scores['path_length_ratio'] < 0.7:
-        report.append("  - Agent path is shorter than expected (may be missing steps)")
-    
-    report.append("=" * 60)
-    
-    return "\n".join(report)
+    with PROFILER.stage('report'):
+        return render_text(build_report(scores, agent_path, golden_path))
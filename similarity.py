@@ -0,0 +1,121 @@
+"""
+Similarity backends for normalized action strings.
+
+Every backend is a function (norm_1, norm_2, score_cutoff=0.0) -> float in
+[0, 1]. When the similarity is below score_cutoff a backend may return any
+value below the cutoff (0.0) instead of computing it exactly, which lets
+callers that only care about matches above a threshold skip most work.
+
+- difflib: difflib.SequenceMatcher ratio, the reference used for scoring.
+  Pairs are pruned with the Indel ratio, which is an upper bound of it
+  (matching blocks form a common subsequence), so results are identical.
+- indel: pure-Python bit-parallel LCS (Indel) ratio, 2 * LCS / (len_1 + len_2).
+  Several times faster, but not equal to the difflib ratio.
+- rapidfuzz: the same Indel ratio from rapidfuzz, if installed.
+
+test_similarity.py checks the backends against difflib on the bundled
+trajectories.
+"""
+
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Callable, Dict
+
+from profiling import PROFILER
+
+try:
+    from rapidfuzz.distance import Indel as _RapidfuzzIndel
+except ImportError:
+    _RapidfuzzIndel = None
+
+DEFAULT_BACKEND = 'difflib'
+
+# Environment variable selecting the backend, so worker processes agree
+BACKEND_ENV = 'ACTION_SIMILARITY_BACKEND'
+
+
+def lcs_length(text_1: str, text_2: str) -> int:
+    """
+    Length of the longest common subsequence, using the bit-parallel
+    algorithm of Allison-Dix / Hyyro (one big-int update per character).
+    """
+    if len(text_1) < len(text_2):
+        text_1, text_2 = text_2, text_1
+    if not text_2:
+        return 0
+
+    # Bit i of masks[c] is set where text_2[i] == c
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(text_2):
+        masks[char] = masks.get(char, 0) | (1 << i)
+
+    full = (1 << len(text_2)) - 1
+    row = full
+    for char in text_1:
+        matches = row & masks.get(char, 0)
+        row = ((row + matches) | (row - matches)) & full
+    return len(text_2) - bin(row).count('1')
+
+
+def indel_ratio(norm_1: str, norm_2: str, score_cutoff: float = 0.0) -> float:
+    """Indel similarity 2 * LCS / (len_1 + len_2)."""
+    total = len(norm_1) + len(norm_2)
+    if total == 0:
+        return 1.0
+    if 2 * min(len(norm_1), len(norm_2)) / total < score_cutoff:
+        return 0.0
+    ratio = 2 * lcs_length(norm_1, norm_2) / total
+    return ratio if ratio >= score_cutoff else 0.0
+
+
+def difflib_ratio(norm_1: str, norm_2: str, score_cutoff: float = 0.0) -> float:
+    """SequenceMatcher ratio, skipped for pairs that cannot reach score_cutoff."""
+    if score_cutoff > 0.0 and indel_ratio(norm_1, norm_2) < score_cutoff:
+        return 0.0
+    return SequenceMatcher(None, norm_1, norm_2).ratio()
+
+
+def rapidfuzz_ratio(norm_1: str, norm_2: str, score_cutoff: float = 0.0) -> float:
+    """Indel similarity computed by rapidfuzz."""
+    return _RapidfuzzIndel.normalized_similarity(norm_1, norm_2, score_cutoff=score_cutoff)
+
+
+BACKENDS: Dict[str, Callable[..., float]] = {
+    'difflib': difflib_ratio,
+    'indel': indel_ratio,
+}
+if _RapidfuzzIndel is not None:
+    BACKENDS['rapidfuzz'] = rapidfuzz_ratio
+
+
+class SimilarityBackend:
+    """
+    Memoized similarity function with a switchable backend.
+
+    Args:
+        name: Key of BACKENDS
+        maxsize: Maximum number of cached (norm_1, norm_2, cutoff) entries
+    """
+
+    def __init__(self, name: str = DEFAULT_BACKEND, maxsize: int = 1 << 17):
+        self.maxsize = maxsize
+        self.set_backend(name)
+
+    def set_backend(self, name: str) -> None:
+        """Switch backend (and start with an empty cache)."""
+        if name not in BACKENDS:
+            raise ValueError(
+                f"Unknown similarity backend: {name} (available: {', '.join(sorted(BACKENDS))})"
+            )
+        self.name = name
+        # Only cache misses reach the profiler hook
+        self._cached = lru_cache(maxsize=self.maxsize)(PROFILER.timed('similarity')(BACKENDS[name]))
+
+    def __call__(self, norm_1: str, norm_2: str, score_cutoff: float = 0.0) -> float:
+        return self._cached(norm_1, norm_2, score_cutoff)
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def cache_clear(self) -> None:
+        self._cached.cache_clear()
@@ -0,0 +1,69 @@
+"""
+Regression tests for the streaming trajectory reader.
+
+Run with: python -m pytest test_parser.py
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from parser import iter_trajectory_events, parse_trajectory
+
+BUNDLED_TRAJECTORIES = sorted(Path(__file__).resolve().parent.glob('traj_*.json'))
+
+# An action whose message is the string "observation", an observation with
+# keys before and after it, and a value containing escaped quotes and braces
+EVENTS = [
+    {"id": 1, "timestamp": "2024-05-01T10:00:00", "source": "agent", "action": "run",
+     "message": "observation", "args": {"command": "ls -la"}},
+    {"id": 2, "timestamp": "2024-05-01T10:00:02", "source": "agent", "observation": "run",
+     "content": "observation \"{[\" done", "extras": {"command": "ls -la"}},
+    {"id": 3, "timestamp": "2024-05-01T10:00:03", "source": "agent", "action": "message",
+     "args": {"content": "\\\"observation\\\": {"}, "message": "observation"},
+    {"id": 4, "timestamp": "2024-05-01T10:00:05", "source": "agent", "action": "finish", "args": {}},
+]
+
+
+def _expected_events(events):
+    return [
+        {'observation': None, 'timestamp': event['timestamp']} if 'observation' in event else event
+        for event in events
+    ]
+
+
+@pytest.fixture
+def trajectory(tmp_path):
+    path = tmp_path / 'traj_streaming.json'
+    # Spaces before the colons, so a chunk can end between key and ':'
+    path.write_text(json.dumps(EVENTS, indent=1, separators=(',', ' : ')))
+    return path
+
+
+def test_observation_value_is_not_a_key(trajectory):
+    expected = [action.render() for action in parse_trajectory(str(trajectory))]
+    assert expected == ["execute_bash(command='ls -la')", 'finish()']
+    assert [action.render() for action in parse_trajectory(str(trajectory), streaming=True)] == expected
+    assert [action.render() for action in parse_trajectory(str(trajectory), indexed=True)] == expected
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 11, 16, 64, 1 << 20])
+def test_chunk_boundaries(trajectory, chunk_size):
+    events = list(iter_trajectory_events(trajectory, chunk_size=chunk_size))
+    assert events == _expected_events(EVENTS)
+
+
+def test_chunk_boundaries_without_skipping(trajectory):
+    for chunk_size in range(1, 48):
+        events = list(iter_trajectory_events(trajectory, skip_observations=False, chunk_size=chunk_size))
+        assert events == EVENTS
+
+
+@pytest.mark.parametrize('path', BUNDLED_TRAJECTORIES, ids=lambda path: path.name)
+def test_streaming_matches_full_parse(path):
+    expected = parse_trajectory(str(path), with_runtime=True)
+    for chunk_size in (97, 4096):
+        events = list(iter_trajectory_events(path, chunk_size=chunk_size))
+        assert events == _expected_events(json.loads(path.read_text()))
+    assert parse_trajectory(str(path), streaming=True, with_runtime=True) == expected
@@ -0,0 +1,93 @@
+"""
+Parity tests for the similarity backends, on every distinct normalized
+action of the bundled trajectories and golden paths.
+
+Run with: python -m pytest test_similarity.py
+"""
+
+import itertools
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pytest
+
+import scoring
+import similarity
+from evaluator import extract_task_name_from_filename
+from golden_paths import GOLDEN_PATHS
+from parser import parse_trajectory
+from scoring import ACTION_NORMALIZER
+from similarity import BACKENDS, difflib_ratio, indel_ratio
+
+BUNDLED_TRAJECTORIES = sorted(Path(__file__).resolve().parent.glob('traj_*.json'))
+CUTOFF = 0.45
+
+
+@pytest.fixture(scope='module')
+def pairs():
+    norms = set()
+    for trajectory_file in BUNDLED_TRAJECTORIES:
+        norms.update(ACTION_NORMALIZER(action) for action in parse_trajectory(str(trajectory_file)))
+    for task_name in GOLDEN_PATHS:
+        norms.update(ACTION_NORMALIZER(action) for action in GOLDEN_PATHS[task_name])
+    return list(itertools.permutations(sorted(norms), 2)) + [(norm, norm) for norm in norms] + [('', '')]
+
+
+@pytest.fixture(scope='module')
+def reference(pairs):
+    return [SequenceMatcher(None, a, b).ratio() for a, b in pairs]
+
+
+def test_difflib_backend_is_sequence_matcher(pairs, reference):
+    assert [difflib_ratio(a, b) for a, b in pairs] == reference
+
+
+@pytest.mark.parametrize('name', sorted(set(BACKENDS) - {'difflib'}))
+def test_indel_bounds_sequence_matcher(pairs, reference, name):
+    # Matching blocks form a common subsequence, so Indel >= SequenceMatcher
+    backend = BACKENDS[name]
+    for (a, b), ref in zip(pairs, reference):
+        assert backend(a, b) >= ref - 1e-12, (a, b)
+
+
+@pytest.mark.parametrize('name', sorted(BACKENDS))
+def test_cutoff_pruning_keeps_matches(pairs, name):
+    backend = BACKENDS[name]
+    for a, b in pairs:
+        exact = backend(a, b)
+        pruned = backend(a, b, CUTOFF)
+        if exact >= CUTOFF:
+            assert pruned == exact, (a, b)
+        else:
+            assert pruned < CUTOFF, (a, b)
+
+
+@pytest.mark.skipif('rapidfuzz' not in BACKENDS, reason='rapidfuzz is not installed')
+def test_indel_matches_rapidfuzz(pairs):
+    for a, b in pairs:
+        assert indel_ratio(a, b) == pytest.approx(BACKENDS['rapidfuzz'](a, b), abs=1e-12), (a, b)
+
+
+def test_bundled_scores_unchanged(monkeypatch):
+    # The default backend, with cutoff pruning and memoization, scores the
+    # bundled trajectories exactly as plain SequenceMatcher does
+    scored = []
+    for trajectory_file in BUNDLED_TRAJECTORIES:
+        golden_path = GOLDEN_PATHS.get(extract_task_name_from_filename(trajectory_file.name))
+        if golden_path:
+            scored.append((parse_trajectory(str(trajectory_file)), golden_path))
+    assert scored
+
+    def efficiency_scores(backend_name):
+        scoring.SIMILARITY.set_backend(backend_name)
+        return [scoring.calculate_efficiency_score(agent, golden) for agent, golden in scored]
+
+    monkeypatch.setitem(
+        BACKENDS, 'sequencematcher', lambda a, b, score_cutoff=0.0: SequenceMatcher(None, a, b).ratio()
+    )
+    active = scoring.SIMILARITY.name
+    try:
+        expected = efficiency_scores('sequencematcher')
+        assert efficiency_scores(similarity.DEFAULT_BACKEND) == expected
+    finally:
+        scoring.SIMILARITY.set_backend(active)
@@ -0,0 +1,306 @@
+"""
+Memory-mapped, offset-indexed access to trajectory events.
+
+One scan over the mmapped file records, for every top-level event, its byte
+range, its top-level 'source', 'action' and 'observation' values and its
+'timestamp'. The
+index is cached next to the trajectory as <file>.idx and rebuilt when the
+file's size or mtime changes. Afterwards any event, range of events or
+kind of event can be decoded without reading the rest of the file.
+
+Usage:
+    python trajectory_index.py traj.json                      # events per kind
+    python trajectory_index.py traj.json --range 4000:4100    # decode a range
+    python trajectory_index.py traj.json --action browse_interactive
+    python trajectory_index.py traj.json --observation browse --range 0:10
+"""
+
+import json
+import mmap
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from profiling import PROFILER
+
+# Bump when the index layout changes
+INDEX_VERSION = 2
+
+INDEX_SUFFIX = '.idx'
+
+# Top-level event fields recorded in the index
+INDEXED_FIELDS = ('source', 'action', 'observation')
+
+_STRUCTURAL_RE = re.compile(rb'["{}\[\]]')
+_STRING_BODY_RE = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_NON_WHITESPACE_RE = re.compile(rb'\S')
+# Also recorded, per event rather than as part of its kind
+TIMESTAMP_FIELD = 'timestamp'
+_INDEXED_KEYS = {field.encode(): field for field in INDEXED_FIELDS + (TIMESTAMP_FIELD,)}
+
+# (source, action, observation) of an event; missing fields are None
+EventKind = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def index_path(trajectory_path) -> Path:
+    """Sidecar index file of a trajectory."""
+    return Path(f"{trajectory_path}{INDEX_SUFFIX}")
+
+
+def scan_events(
+    buf,
+    name: str = 'trajectory'
+) -> Tuple[List[int], List[int], List[EventKind], List[Optional[str]]]:
+    """
+    Locate the top-level events of a JSON array of event objects.
+
+    Args:
+        buf: Bytes-like view of the whole file (e.g. an mmap)
+        name: Used in error messages
+
+    Returns:
+        (starts, ends, kinds, timestamps): byte range [start, end), kind and
+        timestamp (None if missing) of every event
+    """
+    starts: List[int] = []
+    ends: List[int] = []
+    kinds: List[EventKind] = []
+    timestamps: List[Optional[str]] = []
+
+    def next_char(pos):
+        m = _NON_WHITESPACE_RE.search(buf, pos)
+        return (m.start(), buf[m.start()]) if m else (len(buf), None)
+
+    pos, c = next_char(0)
+    if c != ord('['):
+        raise ValueError(f"Trajectory log is not a JSON array of events: {name}")
+    pos += 1
+
+    while True:
+        pos, c = next_char(pos)
+        if c == ord(','):
+            pos += 1
+            continue
+        if c == ord(']'):
+            return starts, ends, kinds, timestamps
+        if c != ord('{'):
+            raise ValueError(f"Unexpected {chr(c) if c is not None else 'end of file'!r} in trajectory log: {name}")
+
+        start = pos
+        fields: Dict[str, str] = {}
+        key = None
+        depth = 0
+        while True:
+            m = _STRUCTURAL_RE.search(buf, pos)
+            if not m:
+                raise ValueError(f"Truncated trajectory log: {name}")
+            token = buf[m.start()]
+            pos = m.end()
+            if token == ord('"'):
+                string_start = pos
+                pos = _STRING_BODY_RE.match(buf, pos).end()
+                if pos >= len(buf):
+                    raise ValueError(f"Truncated trajectory log: {name}")
+                pos += 1
+                if depth == 1:
+                    # A top-level string is a key if a ':' follows, else a value
+                    after, c = next_char(pos)
+                    if c == ord(':'):
+                        key = _INDEXED_KEYS.get(bytes(buf[string_start:pos - 1]))
+                        pos = after + 1
+                    elif key is not None:
+                        fields[key] = json.loads(buf[string_start - 1:pos])
+                        key = None
+            elif token in b'{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+        starts.append(start)
+        ends.append(pos)
+        kinds.append(tuple(fields.get(field) for field in INDEXED_FIELDS))
+        timestamps.append(fields.get(TIMESTAMP_FIELD))
+
+
+def _write_index_atomic(path: Path, payload: Dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TrajectoryReader:
+    """
+    Random access to the events of a trajectory JSON log.
+
+    Args:
+        trajectory_path: Trajectory JSON file
+        use_cache: Load / store the index in the <file>.idx sidecar (an
+            unwritable directory just means the index is not kept)
+
+    Use as a context manager, or call close(), to release the mapping.
+    """
+
+    def __init__(self, trajectory_path, use_cache: bool = True):
+        self.path = Path(trajectory_path)
+        self._file = open(self.path, 'rb')
+        try:
+            stat = os.fstat(self._file.fileno())
+            if stat.st_size == 0:
+                raise ValueError(f"Trajectory log is not a JSON array of events: {self.path}")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.bytes_decoded = 0
+        self._load_index(use_cache)
+
+    def _load_index(self, use_cache: bool) -> None:
+        sidecar = index_path(self.path)
+        if use_cache:
+            try:
+                with open(sidecar, 'r') as f:
+                    index = json.load(f)
+                if (index.get('version') == INDEX_VERSION and index.get('size') == self.size
+                        and index.get('mtime_ns') == self.mtime_ns):
+                    vocabulary = [tuple(kind) for kind in index['kinds']]
+                    self.starts = index['starts']
+                    self.ends = index['ends']
+                    self.kinds = [vocabulary[kind_id] for kind_id in index['kind_ids']]
+                    self.timestamps = index['timestamps']
+                    return
+            except (OSError, ValueError, KeyError, IndexError, TypeError):
+                pass
+
+        with PROFILER.stage('index', self.size):
+            self.starts, self.ends, self.kinds, self.timestamps = scan_events(self._map, str(self.path))
+        if use_cache:
+            vocabulary = sorted(set(self.kinds), key=lambda kind: tuple(value or '' for value in kind))
+            kind_ids = {kind: kind_id for kind_id, kind in enumerate(vocabulary)}
+            try:
+                _write_index_atomic(sidecar, {
+                    'version': INDEX_VERSION,
+                    'size': self.size,
+                    'mtime_ns': self.mtime_ns,
+                    'kinds': vocabulary,
+                    'starts': self.starts,
+                    'ends': self.ends,
+                    'kind_ids': [kind_ids[kind] for kind in self.kinds],
+                    'timestamps': self.timestamps,
+                })
+            except OSError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.events(range(len(self))[index]))
+        return self.event(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def kind(self, index: int) -> Dict[str, Optional[str]]:
+        """Indexed fields of an event, without decoding it."""
+        return dict(zip(INDEXED_FIELDS, self.kinds[index]))
+
+    def raw(self, index: int) -> bytes:
+        """The undecoded JSON text of an event."""
+        return self._map[self.starts[index]:self.ends[index]]
+
+    def event(self, index: int) -> Dict:
+        """Decode one event (negative indices count from the end)."""
+        if index < 0:
+            index += len(self)
+        raw = self.raw(index)
+        self.bytes_decoded += len(raw)
+        return json.loads(raw)
+
+    def events(self, indices: Optional[Iterable[int]] = None) -> Iterator[Dict]:
+        """Decode the given events (default: all), in the given order."""
+        for index in range(len(self)) if indices is None else indices:
+            yield self.event(index)
+
+    def find(
+        self,
+        source: Optional[str] = None,
+        action: Optional[str] = None,
+        observation: Optional[str] = None
+    ) -> List[int]:
+        """Indices of the events whose indexed fields match every given value."""
+        wanted = [(i, value) for i, value in enumerate((source, action, observation)) if value is not None]
+        return [
+            index for index, kind in enumerate(self.kinds)
+            if all(kind[i] == value for i, value in wanted)
+        ]
+
+    def iter_events(self, decode: Callable[[EventKind], bool]) -> Iterator[Dict]:
+        """
+        Every event in file order; events whose kind fails decode() are
+        yielded as stubs holding only their indexed fields and timestamp.
+        """
+        for index, kind in enumerate(self.kinds):
+            if decode(kind):
+                yield self.event(index)
+            else:
+                stub = {field: value for field, value in zip(INDEXED_FIELDS, kind) if value is not None}
+                timestamp = self.timestamps[index]
+                if timestamp is not None:
+                    stub[TIMESTAMP_FIELD] = timestamp
+                yield stub
+
+
+def _parse_range(text: str) -> slice:
+    start, _, stop = text.partition(':')
+    return slice(int(start) if start else None, int(stop) if stop else None)
+
+
+if __name__ == '__main__':
+    import argparse
+    from collections import Counter
+
+    cli = argparse.ArgumentParser(description='Random access to the events of a trajectory JSON log')
+    cli.add_argument('trajectory', help='Trajectory JSON file')
+    cli.add_argument('--range', default=None, metavar='START:STOP',
+                     help='Event positions to print (Python slice semantics)')
+    cli.add_argument('--source', default=None, help="Only events with this 'source'")
+    cli.add_argument('--action', default=None, help="Only events with this 'action'")
+    cli.add_argument('--observation', default=None, help="Only events with this 'observation'")
+    cli.add_argument('--no-cache', action='store_true', help=f'Do not read or write the {INDEX_SUFFIX} sidecar')
+    args = cli.parse_args()
+
+    with TrajectoryReader(args.trajectory, use_cache=not args.no_cache) as reader:
+        filtered = args.source or args.action or args.observation
+        if args.range is None and not filtered:
+            counts = Counter(reader.kinds)
+            print(f"{len(reader)} events in {args.trajectory}")
+            for (source, action, observation), count in sorted(counts.items(), key=lambda item: -item[1]):
+                kind = f"action={action}" if action else f"observation={observation}"
+                print(f"  {count:>8}  source={source} {kind}")
+        else:
+            indices = reader.find(args.source, args.action, args.observation) if filtered else range(len(reader))
+            if args.range is not None:
+                # Applies to the filtered events when filters are given
+                indices = indices[_parse_range(args.range)]
+            for index in indices:
+                print(json.dumps({'position': index, 'event': reader.event(index)}))